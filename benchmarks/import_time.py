@@ -0,0 +1,127 @@
+# benchmarks/import_time.py
+"""
+Cold-start import budget for the modules every page and worker imports.
+
+    python -m benchmarks.import_time                 check all targets, exit 1 on regression
+    python -m benchmarks.import_time --top 15        also list the slowest imports
+
+A target fails when its import time beyond pandas exceeds its budget, or
+when it imports a module of ``FORBIDDEN``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# target → budget (ms) for its import time on top of pandas
+BUDGETS_MS: Dict[str, float] = {
+    "ingestion.db_utils": 150,
+    "reporting.quarterly_report.modules_registry": 200,
+    "reporting.quarterly_report.scheduler": 250,
+}
+
+# renderer, browser and LLM libraries belong to the code paths that use them
+FORBIDDEN = (
+    "selenium", "webdriver_manager", "altair", "altair_saver", "great_tables", "vl_convert",
+    "langchain", "langchain_core", "langchain_community", "langchain_openai", "langgraph", "streamlit",
+)
+BASELINE = "pandas"
+BUDGET_SCALE = float(os.environ.get("IMPORT_BUDGET_SCALE", 1.0))   # > 1 on slow machines
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def trace_import(target: str) -> List[Dict]:
+    """``-X importtime`` rows (self_us, cumulative_us, depth, module) of importing ``target``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": str(REPO_ROOT)},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr.splitlines()[-1] if proc.stderr else ''}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append({"self_us": int(m.group(1)), "cumulative_us": int(m.group(2)),
+                         "depth": (len(m.group(3)) - 1) // 2, "module": m.group(4)})
+    return rows
+
+
+def measure(target: str, repeat: int = 3) -> Dict:
+    best = None
+    for _ in range(max(1, repeat)):
+        rows = trace_import(target)
+        total_us = next((r["cumulative_us"] for r in rows if r["module"] == target), 0)
+        baseline_us = next((r["cumulative_us"] for r in rows if r["module"] == BASELINE), 0)
+        run = {"rows": rows, "total_ms": total_us / 1000, "baseline_ms": baseline_us / 1000,
+               "own_ms": (total_us - baseline_us) / 1000}
+        if best is None or run["own_ms"] < best["own_ms"]:
+            best = run
+    modules = {r["module"] for r in best["rows"]}
+    best["forbidden"] = sorted(m for m in modules if m.split(".")[0] in FORBIDDEN)
+    return best
+
+
+def check(targets: Dict[str, float], repeat: int = 3, top: int = 0) -> Dict:
+    report = {}
+    for target, budget in targets.items():
+        budget = budget * BUDGET_SCALE
+        try:
+            res = measure(target, repeat)
+        except RuntimeError as e:
+            report[target] = {"ok": False, "error": str(e), "budget_ms": budget}
+            print(f"❌ {e}")
+            continue
+        over = res["own_ms"] > budget
+        report[target] = {
+            "own_ms": round(res["own_ms"], 1),
+            "total_ms": round(res["total_ms"], 1),
+            "pandas_ms": round(res["baseline_ms"], 1),
+            "budget_ms": budget,
+            "forbidden": res["forbidden"],
+            "ok": not over and not res["forbidden"],
+            "slowest": [
+                {"module": r["module"], "self_ms": round(r["self_us"] / 1000, 1)}
+                for r in sorted(res["rows"], key=lambda r: r["self_us"], reverse=True)[:top]
+            ],
+        }
+        status = "✅" if report[target]["ok"] else "❌"
+        print(f"{status} {target}: {res['own_ms']:.0f} ms (budget {budget:.0f} ms, "
+              f"+ pandas {res['baseline_ms']:.0f} ms)")
+        if res["forbidden"]:
+            print(f"   🚫 imports {', '.join(res['forbidden'])}")
+        for row in report[target]["slowest"]:
+            print(f"   {row['self_ms']:8.1f} ms  {row['module']}")
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the cold-start import time budget.")
+    parser.add_argument("targets", nargs="*", help=f"modules to check (default: {', '.join(BUDGETS_MS)})")
+    parser.add_argument("--budget-ms", type=float, help="budget for targets given on the command line")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=0, help="list the N slowest imports per target")
+    parser.add_argument("--out", type=Path, help="write the measurements as JSON")
+    args = parser.parse_args(argv)
+
+    targets = {t: args.budget_ms or BUDGETS_MS.get(t, max(BUDGETS_MS.values())) for t in args.targets} \
+        if args.targets else dict(BUDGETS_MS)
+    report = check(targets, args.repeat, args.top)
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2))
+    return 0 if all(r["ok"] for r in report.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
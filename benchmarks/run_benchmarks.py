@@ -0,0 +1,224 @@
+# benchmarks/run_benchmarks.py
+"""
+Time every report module on synthetic data of increasing size.
+
+    python -m benchmarks.run_benchmarks --rows 10000 100000 1000000
+    python -m benchmarks.run_benchmarks --rows 100000 --modules Payments Invoices --render real
+
+Modules run in dependency order through ``scheduler.execute_module``, with
+the profiler in summary mode; results go to one JSON file per invocation.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks.synthetic import REPORT_NAME, build_dataset, load_dataset
+from ingestion.sqlite_pool import close_thread_connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROWS = [10_000, 100_000]
+DEFAULT_CUTOFF = "2025-03-31"
+DEFAULT_TOLERANCE = 3
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+EXCLUDED_BY_DEFAULT = {"Comments"}
+
+
+# ──────────────────────────────────────────────────────────────
+# RENDER STUBS
+# ──────────────────────────────────────────────────────────────
+def _stub_gt_image(var, db_path, gt_table, simple_gt_save=False, table_width=None, table_height=None):
+    return f"charts_out/{var}_gt.png"
+
+
+def _stub_chart_image(var, db_path, altair_chart) -> Future:
+    done = Future()
+    done.set_result(f"charts_out/{var}.png")
+    return done
+
+
+@contextmanager
+def rendering(mode: str):
+    """Stub the image renders for ``mode == "stub"``; leave them alone for "real"."""
+    if mode == "real":
+        yield
+        return
+    with mock.patch("ingestion.db_utils._render_variable_image", _stub_gt_image), \
+         mock.patch("ingestion.db_utils._submit_chart_image", _stub_chart_image):
+        yield
+
+
+# ──────────────────────────────────────────────────────────────
+# RUN
+# ──────────────────────────────────────────────────────────────
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except Exception:
+        return None
+
+
+def _select_modules(names: Optional[List[str]]):
+    from reporting.quarterly_report.modules_registry import MODULES
+
+    if names:
+        unknown = sorted(set(names) - set(MODULES))
+        if unknown:
+            raise SystemExit(f"Unknown modules: {', '.join(unknown)} (known: {', '.join(MODULES)})")
+        return {k: MODULES[k] for k in MODULES if k in names}
+    # index key by key: .items() would import every module of the lazy registry
+    return {k: MODULES[k] for k in MODULES if k not in EXCLUDED_BY_DEFAULT}
+
+
+def _category_totals(metrics: pd.DataFrame, module_name: str) -> Dict[str, Dict[str, float]]:
+    if metrics.empty:
+        return {}
+    totals = metrics[(metrics.kind == "total") & (metrics.module_name == module_name)]
+    return {row.category: {"calls": int(row.calls), "seconds": round(float(row.duration_s), 4)}
+            for row in totals.itertuples()}
+
+
+def bench_size(n_payments: int, modules, cutoff, seed: int, render: str, workdir: Path) -> Dict:
+    """Build, load and run one dataset size; one result entry."""
+    from ingestion import profiler
+    from reporting.quarterly_report.scheduler import (
+        build_module_graph, execute_module, new_context, topological_order, upstream_names,
+    )
+
+    db_path = workdir / f"bench_{n_payments}.db"
+    t0 = time.perf_counter()
+    tables = build_dataset(n_payments, cutoff, seed)
+    build_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    rows = load_dataset(db_path, tables, cutoff)
+    load_s = time.perf_counter() - t0
+    del tables
+    print(f"📦 {n_payments:,} payments: built in {build_s:.1f}s, loaded in {load_s:.1f}s "
+          f"({db_path.stat().st_size / 1e6:.0f} MB)")
+
+    nodes = build_module_graph(modules)
+    run_id = profiler.start_run(REPORT_NAME, profiler.MODE_SUMMARY)
+    results = {}
+    with rendering(render):
+        for key in topological_order(nodes):
+            mod_cls = modules[key]
+            ctx = new_context(pd.Timestamp(cutoff).date(), DEFAULT_TOLERANCE, str(db_path), REPORT_NAME)
+            ctx.run_id = run_id
+            t0 = time.perf_counter()
+            try:
+                execute_module(mod_cls, ctx, str(db_path), tuple(upstream_names(modules, nodes[key])))
+                status, error = "success", None
+            except Exception as e:
+                logger.debug("Module %s failed", key, exc_info=True)
+                status, error = "failed", f"{type(e).__name__}: {e}"
+            finally:
+                ctx.db.conn.close()
+            wall_s = time.perf_counter() - t0
+            results[key] = {"status": status, "error": error, "wall_s": round(wall_s, 4)}
+            print(f"   {'✅' if status == 'success' else '❌'} {key:<12} {wall_s:8.2f}s"
+                  + (f"  {error}" if error else ""))
+
+    metrics = profiler.load_run_metrics(str(db_path), run_id)
+    module_spans = metrics[metrics.category == "module"] if not metrics.empty else metrics
+    for key, entry in results.items():
+        name = modules[key].__name__
+        span_rows = module_spans[module_spans.module_name == name] if not module_spans.empty else module_spans
+        entry["peak_rss_mb"] = (round(float(span_rows.peak_rss_mb.iloc[-1]), 1)
+                                if len(span_rows) and pd.notna(span_rows.peak_rss_mb.iloc[-1]) else None)
+        entry["categories"] = _category_totals(metrics, name)
+
+    return {
+        "rows": n_payments,
+        "table_rows": rows,
+        "build_s": round(build_s, 3),
+        "load_s": round(load_s, 3),
+        "db_mb": round(db_path.stat().st_size / 1e6, 1),
+        "modules": results,
+    }
+
+
+# ──────────────────────────────────────────────────────────────
+# COMPARE
+# ──────────────────────────────────────────────────────────────
+def compare(current: Dict, baseline: Dict) -> pd.DataFrame:
+    """Wall time of each (size, module) now vs. the baseline file."""
+    def flat(doc):
+        return {(r["rows"], m): e["wall_s"] for r in doc["results"] for m, e in r["modules"].items()
+                if e["status"] == "success"}
+
+    now, before = flat(current), flat(baseline)
+    rows = [
+        {"rows": size, "module": mod, "baseline_s": before[(size, mod)], "current_s": secs,
+         "ratio": round(secs / before[(size, mod)], 2) if before[(size, mod)] else None}
+        for (size, mod), secs in sorted(now.items()) if (size, mod) in before
+    ]
+    return pd.DataFrame(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Benchmark the report modules on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="payments_summa row counts to run (e.g. 10000 100000 5000000)")
+    parser.add_argument("--modules", nargs="+", help="module keys (default: all but Comments)")
+    parser.add_argument("--render", choices=("stub", "real"), default="stub",
+                        help="stub: skip the GT / Altair image renders (no browser needed)")
+    parser.add_argument("--cutoff", default=DEFAULT_CUTOFF)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="result file (default: benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, help="earlier result file to compare against")
+    parser.add_argument("--keep-db", action="store_true", help="keep the generated databases")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    modules = _select_modules(args.modules)
+    doc = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cutoff": args.cutoff,
+            "seed": args.seed,
+            "render": args.render,
+            "modules": list(modules),
+        },
+        "results": [],
+    }
+
+    workdir = Path(tempfile.mkdtemp(prefix="qr_bench_"))
+    for n in args.rows:
+        doc["results"].append(bench_size(n, modules, args.cutoff, args.seed, args.render, workdir))
+        close_thread_connections()   # checkpoints the WAL before the file goes
+        if not args.keep_db:
+            (workdir / f"bench_{n}.db").unlink(missing_ok=True)
+
+    out = args.out or RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=2, default=str))
+    print(f"📝 Results written to {out}" + (f" (databases kept in {workdir})" if args.keep_db else ""))
+
+    if args.baseline:
+        table = compare(doc, json.loads(args.baseline.read_text()))
+        print(table.to_string(index=False) if not table.empty else "No common (size, module) pairs with the baseline")
+    return doc
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,439 @@
+# benchmarks/synthetic.py
+"""
+Synthetic uploads shaped like the SUMMA / COMPASS extracts the modules read:
+one builder per alias in ``ALIASES``, consistent across tables so the joins
+and lookups in the modules do real work. Values are random.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+REPORT_NAME = "Quarterly_Report"
+SUMMA_DATETIME = "%Y-%m-%d %H:%M:%S"      # how the SUMMA date columns land in SQLite
+
+CALL_TYPES = ["STG", "COG", "ADG", "POC", "SYG"]
+CALL_TYPE_WEIGHTS = [0.35, 0.25, 0.2, 0.15, 0.05]
+PAYMENT_TYPES = ["PF", "IP", "FP", "GF", "Other"]
+PAYMENT_TYPE_WEIGHTS = [0.35, 0.3, 0.15, 0.05, 0.15]
+FUNCTIONAL_AREAS = {"HEU": "HORIZONEU_21_27", "H2020": "H2020_14_20"}
+BUDGET_LINES = {"HEU": "01 02 01 01", "H2020": "01 02 99 01"}
+FUND_SOURCES = ["VOBU", "EFTA", "IAR2/2", "EARN/N"]
+UNITS = [f"ERCEA.B.{i}" for i in range(1, 6)]
+
+TABLE_COLORS = {
+    "BLUE": "#2773C5", "LIGHT_BLUE": "#B9DBFF", "GRID_CLR": "#004A99", "DARK_BLUE": "#1B5390",
+    "DARK_GREY": "#242425", "heading_background_color": "#1B5390",
+    "row_group_background_color": "#d6e6f4", "border_color": "#01244B",
+    "stub_background_color": "#d6e6f4", "body_background_color": "#ffffff",
+    "subtotal_background_color": "#E6E6FA", "text_color": "#01244B",
+}
+
+
+@dataclass
+class Universe:
+    """Keys shared between the tables of one synthetic dataset."""
+    rng: np.random.Generator
+    cutoff: pd.Timestamp
+    n_payments: int
+    calls: List[str] = field(default_factory=list)
+    grants: pd.DataFrame = None              # Grant Number, Call, call type, programme
+    po_keys: np.ndarray = None
+    prefinancing_keys: np.ndarray = None
+
+    @property
+    def year(self) -> int:
+        return self.cutoff.year if self.cutoff.month != 1 else self.cutoff.year - 1
+
+    def dates(self, n: int, start: pd.Timestamp, end: pd.Timestamp) -> pd.Series:
+        span = max(1, int((end - start).total_seconds()))
+        offsets = self.rng.integers(0, span, n)
+        return pd.Series(start + pd.to_timedelta(offsets, unit="s")).dt.floor("D")
+
+    def year_dates(self, n: int, years_back: int = 0) -> pd.Series:
+        start = pd.Timestamp(year=self.year - years_back, month=1, day=1)
+        return self.dates(n, start, self.cutoff - pd.Timedelta(days=1))
+
+    def choice(self, values, n: int, p=None) -> np.ndarray:
+        return self.rng.choice(np.asarray(values, dtype=object), n, p=p)
+
+
+def _text_dates(dates: pd.Series, fmt: str = SUMMA_DATETIME) -> pd.Series:
+    return dates.dt.strftime(fmt).where(dates.notna(), None)
+
+
+def _scale(n_payments: int, ratio: float, minimum: int) -> int:
+    return max(minimum, int(n_payments * ratio))
+
+
+# ──────────────────────────────────────────────────────────────
+# GRANTS / PO
+# ──────────────────────────────────────────────────────────────
+def _calls(u: Universe) -> List[str]:
+    calls = []
+    for year in (u.year - 2, u.year - 1, u.year):
+        calls += [f"ERC-{year}-{ct if ct != 'SYG' else 'SyG'}" for ct in CALL_TYPES]
+    return calls
+
+
+def call_overview(u: Universe) -> pd.DataFrame:
+    n = _scale(u.n_payments, 1 / 25, 300)
+    call = u.choice(u.calls, n)
+    call_type = pd.Series(call).str.rsplit("-", n=1).str[-1].str.upper().to_numpy()
+    programme = np.where(pd.Series(call).str[4:8].astype(int) >= 2021, "HEU", "H2020")
+
+    closing = u.year_dates(n, years_back=2)
+    invitation = closing + pd.to_timedelta(u.rng.integers(100, 300, n), unit="D")
+    evaluation = closing + pd.to_timedelta(u.rng.integers(90, 280, n), unit="D")
+    signature = invitation + pd.to_timedelta(u.rng.integers(30, 160, n), unit="D")
+    status = u.choice(["SIGNED", "UNDER_PREPARATION", "CLOSED", "TERMINATED", "REJECTED"], n,
+                      p=[0.7, 0.1, 0.1, 0.05, 0.05])
+    signature = signature.where((status != "UNDER_PREPARATION") & (status != "REJECTED"))
+    visa = signature - pd.to_timedelta(u.rng.integers(1, 10, n), unit="D")
+
+    grants = pd.DataFrame({
+        "Grant Number": np.arange(101_000_000, 101_000_000 + n),
+        "Call": call,
+        "Topic": call,
+        "Instrument": "ERC-" + call_type,
+        "Programme": programme,
+        "Project Status": status,
+        "Call Closing Date": _text_dates(closing),
+        "Invitation Letter Sent": _text_dates(invitation),
+        "Evaluation Result Letter Sent": _text_dates(evaluation),
+        "GA Signature - Commission": _text_dates(signature),
+        "Commitment AO visa": _text_dates(visa),
+        "Eu contribution": u.rng.uniform(150_000, 2_500_000, n).round(2),
+        "Ranking Status": u.choice(["MAIN", "RESERVE"], n, p=[0.9, 0.1]),
+        "GAP_STEP ": u.choice(["GAFile-OVA", "GAFile-FVA", "SA-Wait", "AbacContractCreatedCatchEvent", None], n),
+        "GAP_EXERCISE_STATUS ": u.choice(["GA_SIGNED", "OPEN", None], n),
+        "ERC_PANEL ": u.choice(["Mathematics", "Immunity and Infection", "The Study of the Human Past"], n),
+    })
+    u.grants = grants.assign(call_type=call_type)
+    return grants
+
+
+def budget_follow_up_report(u: Universe) -> pd.DataFrame:
+    g = u.grants
+    return pd.DataFrame({
+        "Project Number": g["Grant Number"],
+        "INVITED": u.rng.choice([1, 1, 1, 0], len(g)),
+        "Budget": g["Eu contribution"],
+        "Status": g["Project Status"],
+    })
+
+
+def ethics_requirements_and_issues(u: Universe) -> pd.DataFrame:
+    g = u.grants
+    return pd.DataFrame({
+        "PROPOSAL\nNUMBER": g["Grant Number"],
+        "ETHICS REVIEW OPINION": u.choice(["CLEARED", "CONDITIONALLY_CLEARED", "PENDING"], len(g),
+                                          p=[0.7, 0.2, 0.1]),
+    })
+
+
+def c0_po_summa(u: Universe) -> pd.DataFrame:
+    g = u.grants
+    n_experts = max(20, len(g) // 10)
+    n = len(g) + n_experts
+    keys = np.arange(4_500_000_000, 4_500_000_000 + n)
+    grant_part = pd.DataFrame({
+        "PO Purchase Order Key": keys[:len(g)],
+        "PO Category Desc": "Grant",
+        "PO ABAC SAP Reference": "ERC-" + g["call_type"].to_numpy() + "-" + g["Grant Number"].astype(str).to_numpy(),
+        "PO Purchase Order Item Desc": g["Topic"].to_numpy(),
+        "PO Purchase Order Desc": g["Topic"].to_numpy(),
+        "Functional Area": [FUNCTIONAL_AREAS[p] for p in g["Programme"]],
+    })
+    expert_part = pd.DataFrame({
+        "PO Purchase Order Key": keys[len(g):],
+        "PO Category Desc": u.choice(["Direct Contract", "Specific Contract"], n_experts),
+        "PO ABAC SAP Reference": "EXPERTS",
+        "PO Purchase Order Item Desc": "Expert remuneration",
+        "PO Purchase Order Desc": "Expert remuneration",
+        "Functional Area": u.choice(list(FUNCTIONAL_AREAS.values()), n_experts),
+    })
+    df = pd.concat([grant_part, expert_part], ignore_index=True)
+    final = u.dates(n, pd.Timestamp(year=u.year - 1, month=1, day=1), pd.Timestamp(year=u.year + 4, month=12, day=31))
+    df["Fund Source"] = u.choice(FUND_SOURCES, n, p=[0.85, 0.05, 0.05, 0.05])
+    df["PO Type"] = u.choice(["Grant", "Procurement"], n, p=[0.9, 0.1])
+    df["PO Final Date of Implementation (dd/mm/yyyy)"] = _text_dates(final)
+    df["PO Open Amount - RAL - Payments Made (PD Approved)"] = u.rng.uniform(0, 1_500_000, n).round(2)
+    u.po_keys = keys
+    return df
+
+
+# ──────────────────────────────────────────────────────────────
+# PAYMENTS
+# ──────────────────────────────────────────────────────────────
+def payments_summa(u: Universe) -> pd.DataFrame:
+    n = u.n_payments
+    g = u.grants
+    grant_idx = u.rng.integers(0, len(g), n)
+    pay_type = u.choice(PAYMENT_TYPES, n, p=PAYMENT_TYPE_WEIGHTS)
+    is_rp = np.isin(pay_type, ["IP", "FP"])
+    grant_no = g["Grant Number"].to_numpy()[grant_idx].astype(str)
+    rp = "RP" + u.rng.integers(1, 5, n).astype(str) + "=" + np.where(pay_type == "FP", "FP", "IP")
+
+    doc_type = np.where(np.isin(pay_type, ["PF", "GF"]),
+                        np.where(pay_type == "GF", "Exp. Guarantee", "Exp Pre-financing"),
+                        "Payment Directive")
+    doc_type = np.where(u.rng.random(n) < 0.02, "Cancellation", doc_type)   # filtered out by the module
+
+    amounts = u.rng.lognormal(11, 1.2, n).round(2)
+    keys = np.arange(70_000_000, 70_000_000 + n)
+    u.prefinancing_keys = keys[doc_type == "Exp Pre-financing"]
+
+    return pd.DataFrame({
+        "Pay Payment Key": keys,
+        "Pay Document Type Desc": doc_type,
+        "Pay Document Date (dd/mm/yyyy)": _text_dates(u.year_dates(n, years_back=0)),
+        "v_payment_type": pay_type,
+        "v_check_payment_type": np.where(is_rp, rp, grant_no),
+        "v_payment_reference_key": np.where(np.isin(pay_type, ["PF", "GF"]), grant_no, None),
+        "Inv Text": np.char.add(grant_no, " ERC periodic report"),
+        "PO Purchase Order Key": u.po_keys[np.minimum(grant_idx, len(u.po_keys) - 1)].astype(float),
+        "Programme": g["Programme"].to_numpy()[grant_idx],
+        "Fund Source": u.choice(["VOBU", "EFTA", "IAR2/2"], n, p=[0.9, 0.05, 0.05]),
+        "v_amount_to_sum": amounts,
+        "v_accepted_amount": amounts,
+        "Pay Workflow Last AOS Person Id": u.choice(["WALASOU", "KACZMUR", "DOEJOHN"], n),
+    })
+
+
+def payments_summa_time(u: Universe) -> pd.DataFrame:
+    keys = u.prefinancing_keys
+    n = len(keys)
+    gross = u.rng.integers(1, 60, n)
+    return pd.DataFrame({
+        "Pay Payment Key": keys.astype(str),
+        "Pay Delay Late Payment Flag (Y/N)": np.where(gross > 30, "Y", "N"),
+        "Pay Delay With Suspension": gross,
+        "Pay Delay Without Suspension": np.maximum(0, gross - u.rng.integers(0, 10, n)),
+    })
+
+
+def forecast(u: Universe) -> pd.DataFrame:
+    rows = [(prog, ct, month) for prog in ("HEU", "H2020") for ct in CALL_TYPES + ["EXPERTS"] for month in range(1, 13)]
+    df = pd.DataFrame(rows, columns=["SCRS_FMWK", "SCRS_CALL_TYPE", "Month_Num"])
+    df["Sum(SCRS_C1_MNT)"] = u.rng.uniform(1e6, 4e7, len(df)).round(2)
+    return df
+
+
+def c0_invoices_summa(u: Universe) -> pd.DataFrame:
+    n = _scale(u.n_payments, 1 / 2, 500)
+    g = u.grants
+    grant_no = g["Grant Number"].to_numpy()[u.rng.integers(0, len(g), n)].astype(str)
+    programme = u.choice(["HEU", "H2020"], n, p=[0.7, 0.3])
+    reception = u.year_dates(n)
+    creation = reception + pd.to_timedelta(u.rng.integers(0, 12, n), unit="D")
+    return pd.DataFrame({
+        "Inv Supplier Invoice Key": np.arange(900_000, 900_000 + n),
+        "Inv Fin Document Type Desc": u.choice(["Expenditure Invoice", "Credit Note"], n, p=[0.95, 0.05]),
+        "Inv Reception Date (dd/mm/yyyy)": _text_dates(reception),
+        "Inv Creation Date (dd/mm/yyyy)": _text_dates(creation),
+        "Inv Parking Person Id": u.choice(["KACZMUR", "WALASOU", "DOEJOHN", None], n),
+        "Official Budget Line": [BUDGET_LINES[p] for p in programme],
+        "v_check_payment_type": np.where(u.rng.random(n) < 0.6, "RP1=IP", grant_no),
+        "Inv Text": np.char.add(grant_no, " invoice"),
+    })
+
+
+# ──────────────────────────────────────────────────────────────
+# BUDGET
+# ──────────────────────────────────────────────────────────────
+def c0_budgetary_execution_details(u: Universe) -> pd.DataFrame:
+    n = _scale(u.n_payments, 1 / 1000, 200)
+    appropriation = u.rng.uniform(1e6, 5e8, n).round(2)
+    committed = (appropriation * u.rng.uniform(0.3, 1.0, n)).round(2)
+    paid = (appropriation * u.rng.uniform(0.2, 0.9, n)).round(2)
+    return pd.DataFrame({
+        "Budget Period": u.choice([u.year, u.year - 1], n, p=[0.8, 0.2]),
+        "Fund Source": u.choice(FUND_SOURCES, n),
+        "Functional Area Desc": u.choice(list(FUNCTIONAL_AREAS.values()), n),
+        "Budget Address": u.choice(["EMPTY", "EXPERTS", "ERC-STG", "ERC-ADG"], n),
+        "Commitment Appropriation": appropriation,
+        "Committed Amount": committed,
+        "Commitment Available ": (appropriation - committed).round(2),
+        "Payment Appropriation": appropriation,
+        "Paid Amount": paid,
+        "Payment Available": (appropriation - paid).round(2),
+    })
+
+
+def c0_commitments_summa(u: Universe) -> pd.DataFrame:
+    n = _scale(u.n_payments, 1 / 100, 200)
+    ilc = u.choice([pd.Timestamp(f"{u.year}-12-31"), pd.Timestamp(f"{u.year + 1}-12-31"),
+                    pd.Timestamp(f"{u.year + 2}-12-31")], n)
+    accepted = u.rng.uniform(1e5, 5e7, n).round(2)
+    return pd.DataFrame({
+        "Fund Source": u.choice(FUND_SOURCES, n),
+        "FR Earmarked Document Type Desc": u.choice(["Global Commitment", "Provisional Commitment"], n, p=[0.8, 0.2]),
+        "FR ILC Date (dd/mm/yyyy)": _text_dates(pd.Series(pd.to_datetime(ilc))),
+        "FR Fund Reservation Desc": [f"ERC-{u.year}-{ct} global commitment" for ct in u.choice(CALL_TYPES, n)],
+        "FR Accepted Amount": accepted,
+        "FR Consumption by PO Amount": (accepted * u.rng.uniform(0, 1, n)).round(2),
+        "FR Consumption by Payment Amount": (accepted * u.rng.uniform(0, 0.8, n)).round(2),
+        "Functional Area Desc": u.choice(list(FUNCTIONAL_AREAS.values()), n),
+    })
+
+
+# ──────────────────────────────────────────────────────────────
+# AMENDMENTS / AUDITS / RECOVERIES
+# ──────────────────────────────────────────────────────────────
+def amendments(u: Universe) -> pd.DataFrame:
+    n = _scale(u.n_payments, 1 / 50, 200)
+    g = u.grants
+    idx = u.rng.integers(0, len(g), n)
+    end = u.year_dates(n)
+    tta = u.rng.integers(5, 90, n)
+    status = u.choice(["SIGNED_CR", "RECEIVED_CR", "ASSESSED_CR", "REJECTED_CR", "WITHDRAWN_CR"], n,
+                      p=[0.6, 0.15, 0.1, 0.1, 0.05])
+    return pd.DataFrame({
+        "PROPOSAL NUMBER": g["Grant Number"].to_numpy()[idx],
+        "FRAMEWORK": np.where(g["Programme"].to_numpy()[idx] == "HEU", "HORIZON", "H2020"),
+        "TOPIC": g["Topic"].to_numpy()[idx],
+        "INSTRUMENT": g["Instrument"].to_numpy()[idx],
+        "AMENDMENT\nTYPE": u.choice(["CONSORTIUM_REQUESTED", "COMMISSION_INITIATED"], n, p=[0.9, 0.1]),
+        "STATUS": status,
+        "START\nDATE": _text_dates(end - pd.to_timedelta(tta, unit="D")),
+        "END\nDATE": _text_dates(end.where(status != "RECEIVED_CR")),
+        "TTA": tta.astype(float),
+        "TTA\nONGOING": np.where(status == "RECEIVED_CR", tta, np.nan),
+        "DESCRIPTION": "Change of beneficiary",
+    })
+
+
+def audit_result_implementation(u: Universe) -> pd.DataFrame:
+    n = _scale(u.n_payments, 1 / 100, 150)
+    start = u.year_dates(n, years_back=2)
+    end = start + pd.to_timedelta(u.rng.integers(20, 400, n), unit="D")
+    end = end.where(u.rng.random(n) < 0.8)
+    return pd.DataFrame({
+        "AUDIT_KEY": [f"{p}{i:05d}" for p, i in zip(u.choice(["CCIA", "CAS-", "EXT-"], n), range(n))],
+        "PROJECT_NUMBER": u.grants["Grant Number"].to_numpy()[u.rng.integers(0, len(u.grants), n)],
+        "ACRONYM": [f"PRJ{i}" for i in range(n)],
+        "BENEFICIARY": u.choice(["University A", "Institute B", "Centre C"], n),
+        "AUDIT_EXTENSION": u.choice(["Y", "N"], n, p=[0.2, 0.8]),
+        "AURI_START": _text_dates(start),
+        "AURI_END_DATE": _text_dates(end),
+        "AURI_MODE": u.choice(["RO", "REPA"], n),
+        "AMOUNT_TO_RECOVER": u.rng.uniform(0, 200_000, n).round(2),
+        "AUDEX_TOTAL_COST_ADJUSTMENT": u.rng.uniform(-150_000, 1_000, n).round(2),
+        "AURI_COST_ADJUSTMENTS": u.rng.uniform(-150_000, 0, n).round(2),
+        "AURI_DEVIATION_COMMENT": u.choice(["", "Late implementation", "Amount differs"], n),
+        "DEVIATION": u.choice(["Y", "N"], n, p=[0.1, 0.9]),
+        "DEVIATION_AMOUNT": u.rng.uniform(0, 20_000, n).round(2),
+    })
+
+
+def c0_ro_yearly_overview(u: Universe) -> pd.DataFrame:
+    n = _scale(u.n_payments, 1 / 100, 150)
+    posting = u.year_dates(n, years_back=1)
+    cashing = posting + pd.to_timedelta(u.rng.integers(5, 120, n), unit="D")
+    amount = u.rng.uniform(1_000, 300_000, n).round(2)
+    return pd.DataFrame({
+        "RO Recovery Order Key": np.arange(3_000_000, 3_000_000 + n),
+        "RO Year Of Origin": posting.dt.year.to_numpy(),
+        "RO Posting Date (SAP Format yyyymmdd)": _text_dates(posting, "%d/%m/%Y"),
+        "RO Cashing Date (dd/mm/yyyy)": _text_dates(cashing, "%d/%m/%Y"),
+        "RO Amount": amount,
+        "RO Cashing Amount": (amount * u.rng.uniform(0, 1, n)).round(2),
+        "RO Open Amount": (amount * u.rng.uniform(0, 0.5, n)).round(2),
+        "RO Cash Year": cashing.dt.year.to_numpy(),
+        "Functional Area": u.choice(list(FUNCTIONAL_AREAS.values()) + ["OTHER"], n),
+    })
+
+
+# ──────────────────────────────────────────────────────────────
+# EDES / REINFORCED MONITORING
+# ──────────────────────────────────────────────────────────────
+def edes_warnings(u: Universe) -> pd.DataFrame:
+    n = _scale(u.n_payments, 1 / 200, 60)
+    return pd.DataFrame({
+        "UNIT": u.choice(UNITS, n),
+        "CALL": [f"ERC-{u.year}-{ct}" for ct in u.choice(CALL_TYPES, n)],
+        "VALID_FROM": _text_dates(u.year_dates(n)),
+        "WARNING_TYPE": u.choice(["W1a", "W2", "W3"], n),
+    })
+
+
+def reinforced_monitoring(u: Universe) -> pd.DataFrame:
+    n = _scale(u.n_payments, 1 / 500, 40)
+    activated = u.year_dates(n)
+    return pd.DataFrame({
+        "Unit": u.choice(UNITS, n),
+        "Activated Date": _text_dates(activated, "%Y-%m-%d"),
+        "Due Date": _text_dates(activated + pd.to_timedelta(u.rng.integers(-30, 120, n), unit="D"), "%Y-%m-%d"),
+        "Project Number": u.grants["Grant Number"].to_numpy()[u.rng.integers(0, len(u.grants), n)],
+    })
+
+
+# Build order matters: later builders use the keys of earlier ones
+ALIASES: Dict[str, Callable[[Universe], pd.DataFrame]] = {
+    "call_overview": call_overview,
+    "budget_follow_up_report": budget_follow_up_report,
+    "ethics_requirements_and_issues": ethics_requirements_and_issues,
+    "c0_po_summa": c0_po_summa,
+    "payments_summa": payments_summa,
+    "payments_summa_time": payments_summa_time,
+    "forecast": forecast,
+    "c0_invoices_summa": c0_invoices_summa,
+    "c0_budgetary_execution_details": c0_budgetary_execution_details,
+    "c0_commitments_summa": c0_commitments_summa,
+    "amendments": amendments,
+    "audit_result_implementation": audit_result_implementation,
+    "c0_ro_yearly_overview": c0_ro_yearly_overview,
+    "edes_warnings": edes_warnings,
+    "reinforced_monitoring": reinforced_monitoring,
+}
+
+
+def build_dataset(n_payments: int, cutoff, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """Every alias in ``ALIASES``, sized for ``n_payments`` payment rows."""
+    u = Universe(rng=np.random.default_rng(seed), cutoff=pd.Timestamp(cutoff), n_payments=int(n_payments))
+    u.calls = _calls(u)
+    return {alias: build(u) for alias, build in ALIASES.items()}
+
+
+def report_parameters(tables: Dict[str, pd.DataFrame], cutoff) -> Dict[str, object]:
+    """Report parameters the modules expect, matching the generated calls."""
+    calls = sorted(tables["call_overview"]["Call"].unique())
+    heu_calls = [c for c in calls if int(c[4:8]) >= 2021]
+    cutoff = pd.Timestamp(cutoff)
+    return {
+        "TABLE_COLORS": TABLE_COLORS,
+        "calls_list": calls,
+        "HEU_Calls": heu_calls,
+        "TTS_Targets": {c: 120 for c in calls},
+        "TTG_Targets": {c: 420 for c in calls},
+        "TTI_Targets": {c: 300 for c in calls},
+        "amendments_report_date": (cutoff - pd.Timedelta(days=1)).date().isoformat(),
+        "current_year": cutoff.year,
+    }
+
+
+def load_dataset(db_path, tables: Dict[str, pd.DataFrame], cutoff, report: str = REPORT_NAME) -> Dict[str, int]:
+    """
+    Write ``tables`` as one upload each (upload_log + snapshot, as the
+    upload page does) and store the matching report parameters.
+    Returns alias → rows written.
+    """
+    from ingestion.db_utils import create_new_report, init_db, insert_upload_log, upsert_report_param
+    from ingestion.snapshot_store import append_snapshot
+    from ingestion.sqlite_pool import connection
+
+    init_db(str(db_path))
+    create_new_report(report, str(db_path))
+    written = {}
+    for alias, df in tables.items():
+        upload_id = insert_upload_log(f"synthetic_{alias}.xlsx", alias, len(df), len(df.columns),
+                                      report, alias, str(db_path))
+        with connection(db_path) as conn:
+            written[alias] = append_snapshot(conn, alias, df, upload_id)
+    for key, value in report_parameters(tables, cutoff).items():
+        upsert_report_param(report, key, value, str(db_path))
+    return written
@@ -0,0 +1,222 @@
+# ingestion/artifact_store.py
+"""
+Typed store for tables that modules hand to each other. A DataFrame is kept
+with its dtypes (Arrow IPC, or pandas table-orient JSON without pyarrow) in
+``report_artifacts``, next to its JSON copy in ``report_variables``; a name
+without an artifact falls back to that JSON value.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from collections.abc import Mapping
+from io import StringIO
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from ingestion.run_cache import current_run_cache
+from ingestion.sqlite_pool import connection
+
+logger = logging.getLogger(__name__)
+
+FORMAT_ARROW = "arrow"
+FORMAT_JSON_TABLE = "json-table"
+
+
+def _ensure_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS report_artifacts (
+            report_name TEXT,
+            module_name TEXT,
+            var_name    TEXT,
+            anchor_name TEXT,
+            format      TEXT,
+            schema      TEXT,
+            payload     BLOB,
+            n_rows      INTEGER,
+            version     INTEGER DEFAULT 1,
+            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(report_name, var_name)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_report_artifacts_anchor
+        ON report_artifacts (report_name, anchor_name)
+    """)
+
+
+# ──────────────────────────────────────────────────────────────
+# ENCODING
+# ──────────────────────────────────────────────────────────────
+def encode_frame(df: pd.DataFrame) -> Tuple[str, bytes]:
+    """(format, payload) for ``df``: Arrow IPC stream when possible, else table-orient JSON."""
+    try:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return FORMAT_ARROW, sink.getvalue().to_pybytes()
+    except ImportError:
+        pass
+    except Exception as e:          # mixed-type object columns, non-string names …
+        logger.debug(f"Frame not storable as Arrow, using JSON: {e}")
+
+    payload = df.to_json(orient="table", index=False, date_format="iso", default_handler=str)
+    return FORMAT_JSON_TABLE, payload.encode("utf-8")
+
+
+def decode_frame(fmt: str, payload: bytes) -> pd.DataFrame:
+    if fmt == FORMAT_ARROW:
+        import pyarrow as pa
+        return pa.ipc.open_stream(payload).read_all().to_pandas()
+    if fmt == FORMAT_JSON_TABLE:
+        return pd.read_json(StringIO(payload.decode("utf-8")), orient="table")
+    raise ValueError(f"Unknown artifact format: {fmt}")
+
+
+def _schema(df: pd.DataFrame) -> str:
+    return json.dumps({str(col): str(dtype) for col, dtype in df.dtypes.items()})
+
+
+# ──────────────────────────────────────────────────────────────
+# WRITE
+# ──────────────────────────────────────────────────────────────
+def save_frame(report: str, module: str, var: str, df: pd.DataFrame, db_path,
+               anchor: Optional[str] = None) -> bool:
+    """
+    Store ``df`` as the typed artifact of (report, var). Returns False (and
+    logs) when the frame cannot be encoded; readers then use the JSON value.
+    """
+    try:
+        fmt, payload = encode_frame(df)
+    except Exception as e:
+        logger.warning(f"Could not store artifact {var}: {e}")
+        with connection(db_path) as conn:    # never leave an older version behind
+            _ensure_table(conn)
+            conn.execute("DELETE FROM report_artifacts WHERE report_name = ? AND var_name = ?", (report, var))
+        return False
+
+    with connection(db_path) as conn:
+        _ensure_table(conn)
+        conn.execute(
+            """
+            INSERT INTO report_artifacts
+                (report_name, module_name, var_name, anchor_name, format, schema, payload, n_rows, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(report_name, var_name) DO UPDATE SET
+                module_name = excluded.module_name,
+                anchor_name = excluded.anchor_name,
+                format      = excluded.format,
+                schema      = excluded.schema,
+                payload     = excluded.payload,
+                n_rows      = excluded.n_rows,
+                version     = report_artifacts.version + 1,
+                created_at  = excluded.created_at
+            """,
+            (report, module, var, anchor or var, fmt, _schema(df), sqlite3.Binary(payload), len(df)),
+        )
+    logger.debug(f"Stored artifact {var} ({fmt}, {len(df)} rows, {len(payload)} bytes)")
+    return True
+
+
+# ──────────────────────────────────────────────────────────────
+# READ
+# ──────────────────────────────────────────────────────────────
+class ReportArtifacts(Mapping):
+    """
+    Lazy name → DataFrame mapping over a report's artifacts.
+    Listing reads only names and versions; a frame is decoded on first access.
+    """
+
+    def __init__(self, report: str, db_path, names: Optional[Iterable[str]] = None):
+        self.report = report
+        self.db_path = db_path
+        self._meta: Dict[str, Tuple[str, int]] = {}    # name → (var_name, version)
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+        names = list(names) if names is not None else None
+        where, params = "report_name = ?", [report]
+        if names is not None:
+            if not names:
+                return
+            marks = ",".join("?" * len(names))
+            where += f" AND (anchor_name IN ({marks}) OR var_name IN ({marks}))"
+            params += names + names
+
+        with connection(db_path) as conn:
+            _ensure_table(conn)
+            rows = conn.execute(
+                f"SELECT var_name, anchor_name, version FROM report_artifacts WHERE {where} ORDER BY created_at",
+                params,
+            ).fetchall()
+        for var, anchor, version in rows:
+            self._meta.setdefault(var, (var, version))
+            self._meta[anchor or var] = (var, version)     # anchors win, as in fetch_vars_for_report
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        if name not in self._meta:
+            raise KeyError(name)
+        if name not in self._frames:
+            self._frames[name] = self._decode(*self._meta[name])
+        return self._frames[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._meta)
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+    def _decode(self, var: str, version: int) -> pd.DataFrame:
+        def build():
+            with connection(self.db_path) as conn:
+                fmt, payload = conn.execute(
+                    "SELECT format, payload FROM report_artifacts WHERE report_name = ? AND var_name = ?",
+                    (self.report, var),
+                ).fetchone()
+            return decode_frame(fmt, payload)
+
+        cache = current_run_cache(self.db_path)
+        if cache is None:
+            return build()
+        return cache.value(f"artifact:{self.report}", None, f"{var}@{version}", build)
+
+
+def _json_fallback(report: str, name: str, db_path) -> Optional[pd.DataFrame]:
+    """The report_variables JSON value of ``name`` as a DataFrame (pre-artifact runs)."""
+    from ingestion.db_utils import _flush_pending_variables
+
+    _flush_pending_variables(db_path)
+    with connection(db_path) as conn:
+        row = conn.execute(
+            "SELECT value FROM report_variables WHERE report_name = ? AND (anchor_name = ? OR var_name = ?) "
+            "ORDER BY anchor_name = ? DESC, created_at DESC LIMIT 1",
+            (report, name, name, name),
+        ).fetchone()
+    if row is None or row[0] is None:
+        return None
+    try:
+        return pd.DataFrame(json.loads(row[0]))
+    except (TypeError, ValueError):
+        return None
+
+
+def load_frames(report: str, names: Iterable[str], db_path) -> Dict[str, Optional[pd.DataFrame]]:
+    """The named tables of ``report`` (None where neither an artifact nor a JSON table exists)."""
+    names = list(names)
+    artifacts = ReportArtifacts(report, db_path, names)
+    frames = {}
+    for name in names:
+        if name in artifacts:
+            frames[name] = artifacts[name]
+        else:
+            logger.debug(f"No artifact for {name}, reading its JSON value")
+            frames[name] = _json_fallback(report, name, db_path)
+    return frames
+
+
+def load_frame(report: str, name: str, db_path) -> Optional[pd.DataFrame]:
+    return load_frames(report, [name], db_path)[name]
@@ -0,0 +1,154 @@
+# ingestion/chart_renderer.py
+"""
+Render queue for Altair → PNG charts. ``submit_chart`` hands the chart spec
+to a pool of warm vl-convert workers and returns a ``Future`` of the PNG
+path; ``VariableBatch.flush`` waits on it before writing the variable row.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from ingestion import profiler
+
+logger = logging.getLogger(__name__)
+
+CHART_WORKERS = int(os.environ.get("CHART_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+CHART_SCALE = 2.0       # higher resolution
+CHART_PPI = 150         # DPI for better quality
+CHARTS_DIR = "charts_out"
+
+_WARMUP_SPEC = {
+    "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+    "data": {"values": [{"x": 1}]},
+    "mark": "point",
+    "encoding": {"x": {"field": "x", "type": "quantitative"}},
+}
+
+
+def chart_path(var_name: str) -> Path:
+    """Where the PNG of chart ``var_name`` is written (same name as before)."""
+    return Path(CHARTS_DIR) / f"{var_name}_tta_chart.png"
+
+
+# ──────────────────────────────────────────────────────────────
+# WORKER SIDE
+# ──────────────────────────────────────────────────────────────
+def _warm_worker() -> None:
+    """Load vl-convert and its JS engine once, so the first real chart is not the slow one."""
+    try:
+        import vl_convert as vlc
+        vlc.vegalite_to_png(vl_spec=_WARMUP_SPEC, scale=1.0)
+    except Exception as e:       # surfaces again, with context, on the first real render
+        logger.debug(f"vl-convert warm-up failed: {e}")
+
+
+def render_spec(spec_json: str, out_path: str, scale: float = CHART_SCALE, ppi: int = CHART_PPI) -> str:
+    """Render a Vega-Lite spec (JSON text) to ``out_path``; returns the path."""
+    try:
+        import vl_convert as vlc
+    except ImportError:
+        raise RuntimeError("vl-convert-python is required but not installed")
+
+    png = vlc.vegalite_to_png(vl_spec=json.loads(spec_json), scale=scale, ppi=ppi)
+    out = Path(out_path)
+    out.parent.mkdir(exist_ok=True)
+    out.write_bytes(png)
+    return str(out)
+
+
+# ──────────────────────────────────────────────────────────────
+# POOL
+# ──────────────────────────────────────────────────────────────
+_EXECUTOR: Executor | None = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _in_daemon_process() -> bool:
+    return bool(mp.current_process().daemon)
+
+
+def _get_executor() -> Executor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            workers = max(1, CHART_WORKERS)
+            # a daemonic scheduler worker may not have children: render on threads there
+            if _in_daemon_process():
+                _EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chart-render",
+                                               initializer=_warm_worker)
+            else:
+                _EXECUTOR = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                                initializer=_warm_worker)
+            logger.info(f"Started chart render pool ({workers} {type(_EXECUTOR).__name__})")
+        return _EXECUTOR
+
+
+def shutdown_chart_pool(wait: bool = True) -> None:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+atexit.register(shutdown_chart_pool)
+
+
+# ──────────────────────────────────────────────────────────────
+# SUBMIT
+# ──────────────────────────────────────────────────────────────
+def _done(path: str) -> Future:
+    fut: Future = Future()
+    fut.set_result(path)
+    return fut
+
+
+def submit_chart(chart, var_name: str, db_path=None) -> Future:
+    """
+    Queue ``chart`` for rendering; the Future resolves to the PNG path.
+    With ``db_path`` the render cache is consulted first and filled afterwards.
+    """
+    # to_dict() here, in the caller, so the active Altair theme is applied
+    spec_json = json.dumps(chart.to_dict(), sort_keys=True, default=str)
+    out_path = chart_path(var_name)
+
+    cache_key = None
+    if db_path is not None:
+        from ingestion.render_cache import chart_cache_key, get_png
+        try:
+            cache_key = chart_cache_key(chart, scale=CHART_SCALE, ppi=CHART_PPI)
+            png = get_png(db_path, cache_key)
+        except Exception as e:
+            logger.warning(f"Could not look up render cache for {var_name}: {e}")
+            cache_key, png = None, None
+        if png is not None:
+            out_path.parent.mkdir(exist_ok=True)
+            out_path.write_bytes(png)
+            logger.debug(f"Render cache hit for {out_path.name}")
+            return _done(str(out_path))
+
+    submitted, t0 = time.time(), time.perf_counter()
+    try:
+        fut = _get_executor().submit(render_spec, spec_json, str(out_path))
+    except RuntimeError as e:       # pool broken / shut down – render here
+        logger.warning(f"Chart render pool unavailable ({e}), rendering {var_name} inline")
+        fut = _done(render_spec(spec_json, str(out_path)))
+
+    # queue wait + render, as seen from the module
+    fut.add_done_callback(lambda f: profiler.record(var_name, "render", submitted, time.perf_counter() - t0,
+                                                    kind="altair"))
+    if cache_key is not None:
+        def _store(f: Future):
+            if f.exception() is None:
+                from ingestion.render_cache import put_png
+                put_png(db_path, cache_key, Path(f.result()).read_bytes(), "altair")
+        fut.add_done_callback(_store)
+    return fut
@@ -1,26 +1,31 @@
 # ingestion/data_ingestion.py
 import os
-import pandas as pd
 from datetime import datetime
 from ingestion.db_utils import insert_upload_log
+from ingestion.stream_ingest import stream_snapshot
+from ingestion.sqlite_pool import connection
 import sqlite3
 
-def ingest_data(file, selected_sheet=None, db_path='database/reporting.db'):
+def ingest_data(file, selected_sheet=None, db_path='database/reporting.db',
+                report_name=None, rules=None, start_row=0):
+    """
+    Stream ``file`` into a new ``raw_data_<timestamp>`` table.
+    Returns (StreamResult, table_name); the file is never loaded whole.
+    """
     ext = os.path.splitext(file.name)[1].lower()
     now = datetime.now().strftime('%Y%m%d_%H%M')
     table_name = f"raw_data_{now}"
 
-    if ext == '.csv':
-        df = pd.read_csv(file)
-    elif ext in ['.xls', '.xlsx']:
-        df = pd.read_excel(file, sheet_name=selected_sheet)
-    else:
-        raise ValueError("Unsupported file format.")
+    upload_id = insert_upload_log(file.name, table_name, 0, 0, report_name, table_name, db_path)
 
     # Upload to SQLite
-    with sqlite3.connect(db_path) as conn:
-        df.to_sql(table_name, conn, index=False, if_exists='replace')
+    with connection(db_path) as conn:
+        result = stream_snapshot(
+            conn, table_name, file, ext, upload_id,
+            sheet=selected_sheet if ext != '.csv' else None,
+            start_row=start_row,
+            rules=rules,
+            extra_columns={"uploaded_at": datetime.now().isoformat()},
+        )
 
-    insert_upload_log(file.name, table_name, df.shape[0], df.shape[1], db_path)
-
-    return df, table_name
+    return result, table_name
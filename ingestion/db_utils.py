@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import os
 import sqlite3, json
 from datetime import datetime
@@ -9,11 +11,11 @@ import logging
 from pathlib import Path
 from typing import Any,  Dict, Type
 import importlib.util
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-
-
-service = Service(ChromeDriverManager().install())
+import copy
+from ingestion.run_cache import current_run_cache
+from ingestion.sqlite_pool import connection, open_connection
+from ingestion.input_tracker import ALIAS as ALIAS_INPUT, PARAMS as PARAMS_INPUT, digest, record_input
+from ingestion import profiler
 
 
 logging.basicConfig(level=logging.DEBUG)
@@ -24,7 +26,7 @@ logger = logging.getLogger(__name__)
 def init_db(db_path='database/reporting.db'):
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cursor = conn.cursor()
 
         # 1) Upload log
@@ -190,23 +192,72 @@ def init_db(db_path='database/reporting.db'):
             CREATE INDEX IF NOT EXISTS idx_report_variables_name
             ON report_variables(var_name);
             """)
-        
+
+        # Selective reads by anchor (ReportVariables)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_report_variables_report_anchor
+            ON report_variables(report_name, anchor_name);
+            """)
+
+        # Closest-upload-to-cutoff lookups (fetch_latest_table_data)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_upload_log_alias_time
+            ON upload_log (table_alias, uploaded_at);
+            """)
+
+        # Change counters of the UI data layer (see "Table generations")
+        _ensure_generations_table(conn)
    
         conn.commit()
 
+# ─────────────────────────────────────────
+# Table generations
+# ─────────────────────────────────────────
+# One counter per table, bumped by the write helpers below in the same
+# transaction as the write. The Streamlit data layer
+# (ui/ui_helpers/cached_data.py) keys its cached reads on them, so a read
+# stays cached until the table really changes – in any process, including
+# the background job workers.
+def _ensure_generations_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_generations (
+            table_name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+def bump_generation(conn: sqlite3.Connection, *tables: str) -> None:
+    """Mark ``tables`` as changed; call inside the writing transaction."""
+    _ensure_generations_table(conn)
+    conn.executemany("""
+        INSERT INTO table_generations (table_name, generation) VALUES (?, 1)
+        ON CONFLICT(table_name) DO UPDATE SET generation = generation + 1
+    """, [(t,) for t in tables])
+
+def table_generations(db_path, tables) -> tuple:
+    """Current generation of each of ``tables`` (0 if never written), in the given order."""
+    with connection(db_path) as conn:
+        _ensure_generations_table(conn)
+        found = dict(conn.execute(
+            f"SELECT table_name, generation FROM table_generations "
+            f"WHERE table_name IN ({','.join('?' for _ in tables)})", tuple(tables)
+        ).fetchall())
+    return tuple(found.get(t, 0) for t in tables)
+
 # ─────────────────────────────────────────
 # Upload log
 # ─────────────────────────────────────────
 # Corrected function signature to accept table_alias
 def insert_upload_log(filename, table_name, rows, cols, report_name, table_alias, db_path='database/reporting.db'):
     now = datetime.now().isoformat()
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cursor = conn.cursor()
         # Corrected INSERT statement to include table_alias
         cursor.execute("""
             INSERT INTO upload_log (filename, table_name, uploaded_at, rows, cols, report_name, table_alias)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (filename, table_name, now, rows, cols, report_name, table_alias))
+        bump_generation(conn, "upload_log")
         conn.commit()
         return cursor.lastrowid
 
@@ -215,16 +266,17 @@ def insert_upload_log(filename, table_name, rows, cols, report_name, table_alias
 # ─────────────────────────────────────────
 def insert_sheet_rule(filename, sheet_name, start_row=0, db_path='database/reporting.db'):
     now = datetime.now().isoformat()
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         conn.execute("DELETE FROM sheet_rules WHERE filename = ?", (filename,))
         conn.execute("""
             INSERT INTO sheet_rules (filename, sheet_name, start_row, rule_created_at)
             VALUES (?, ?, ?, ?)
         """, (filename, sheet_name, start_row, now))
+        bump_generation(conn, "sheet_rules")
         conn.commit()
 
 def get_existing_rule(filename, db_path='database/reporting.db'):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute("SELECT sheet_name, start_row FROM sheet_rules WHERE filename = ?", (filename,))
         row = cur.fetchone()
@@ -234,7 +286,7 @@ def get_existing_rule(filename, db_path='database/reporting.db'):
 # Transform rules
 # ─────────────────────────────────────────
 def get_transform_rules(filename, sheet, db_path='database/reporting.db'):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT original_column, renamed_column, included
@@ -253,7 +305,7 @@ def get_transform_rules(filename, sheet, db_path='database/reporting.db'):
         ]
 
 def save_transform_rules(rules, db_path='database/reporting.db'):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cursor = conn.cursor()
         for rule in rules:
             cursor.execute("""
@@ -272,6 +324,7 @@ def save_transform_rules(rules, db_path='database/reporting.db'):
                 int(rule['included']),
                 rule['created_at']
             ))
+        bump_generation(conn, "transform_rules")
         conn.commit()
 
 # ─────────────────────────────────────────
@@ -279,7 +332,7 @@ def save_transform_rules(rules, db_path='database/reporting.db'):
 # ─────────────────────────────────────────
 def create_new_report(report_name, db_path='database/reporting.db'):
     now = datetime.now().isoformat()
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM reports WHERE report_name = ?", (report_name,))
         exists = cursor.fetchone()[0]
@@ -289,11 +342,12 @@ def create_new_report(report_name, db_path='database/reporting.db'):
             INSERT INTO reports (report_name, created_at)
             VALUES (?, ?)
         """, (report_name, now))
+        bump_generation(conn, "reports")
         conn.commit()
 
 def get_all_reports(db_path='database/reporting.db'):
     import pandas as pd
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         df = pd.read_sql_query("SELECT * FROM reports ORDER BY created_at DESC", conn)
     return df
 
@@ -301,15 +355,16 @@ def get_all_reports(db_path='database/reporting.db'):
 # Report structure logic
 # ─────────────────────────────────────────
 def define_expected_table(report_name, table_alias, required=True, expected_cutoff=None, db_path='database/reporting.db'):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         conn.execute("""
             INSERT INTO report_structure (report_name, table_alias, required, expected_cutoff)
             VALUES (?, ?, ?, ?)
         """, (report_name, table_alias, int(required), expected_cutoff))
+        bump_generation(conn, "report_structure")
         conn.commit()
 
 def get_expected_tables(report_name, db_path='database/reporting.db'):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT table_alias FROM report_structure
@@ -318,7 +373,7 @@ def get_expected_tables(report_name, db_path='database/reporting.db'):
         return [row[0] for row in cursor.fetchall()]
 
 def get_uploaded_tables(report_name, db_path='database/reporting.db'):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT DISTINCT table_alias FROM upload_log
@@ -337,26 +392,28 @@ def is_report_complete(report_name, db_path='database/reporting.db'):
 # ─────────────────────────────────────────
 def log_cutoff(report_name, cutoff_label, cutoff_date, validated=False, db_path='database/reporting.db'):
     now = datetime.now().isoformat()
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         conn.execute("""
             INSERT INTO report_cutoff_log (report_name, cutoff_label, cutoff_date, validated, validated_at)
             VALUES (?, ?, ?, ?, ?)
         """, (report_name, cutoff_label, cutoff_date, int(validated), now))
+        bump_generation(conn, "report_cutoff_log")
         conn.commit()
 
 # ─────────────────────────────────────────
 # File ↔ Table Alias Mapping
 # ─────────────────────────────────────────
 def register_file_alias(filename, alias, db_path='database/reporting.db'):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         conn.execute("""
             INSERT OR REPLACE INTO file_alias_map (filename, table_alias)
             VALUES (?, ?)
         """, (filename, alias))
+        bump_generation(conn, "file_alias_map")
         conn.commit()
 
 def get_alias_for_file(filename, db_path='database/reporting.db'):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute("SELECT table_alias FROM file_alias_map WHERE filename = ?", (filename,))
         row = cur.fetchone()
@@ -367,7 +424,7 @@ def get_alias_for_file(filename, db_path='database/reporting.db'):
 # ─────────────────────────────────────────
 def update_alias_status(alias, filename, db_path='database/reporting.db'):
     now = datetime.now().isoformat()
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute("SELECT id FROM file_alias_map WHERE filename = ?", (filename,))
         row = cur.fetchone()
@@ -378,10 +435,11 @@ def update_alias_status(alias, filename, db_path='database/reporting.db'):
                 VALUES (?, ?, ?)
                 ON CONFLICT(alias) DO UPDATE SET last_loaded_at=excluded.last_loaded_at, file_id=excluded.file_id
             """, (alias, now, file_id))
+            bump_generation(conn, "alias_upload_status")
             conn.commit()
 
 def get_alias_last_load(alias, db_path='database/reporting.db'):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute("SELECT last_loaded_at FROM alias_upload_status WHERE alias = ?", (alias,))
         row = cur.fetchone()
@@ -401,7 +459,7 @@ def get_suggested_structure(report_name, db_path='database/reporting.db'):
         WHERE ul.report_name = ?
           AND rs.table_alias IS NULL
     """
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute(sql, (report_name,))
         return [r[0] for r in cur.fetchall()]
@@ -410,7 +468,7 @@ def alias_exists(alias: str, db_path: str = "database/reporting.db") -> bool:
     """
     Return True if <alias> appears in file_alias_map.alias, else False.
     """
-    with sqlite3.connect(db_path) as con:
+    with connection(db_path) as con:
         cur = con.execute(
             "SELECT 1 FROM file_alias_map WHERE alias = ? LIMIT 1", (alias,)
         )
@@ -422,7 +480,7 @@ def alias_exists(alias: str, db_path: str = "database/reporting.db") -> bool:
 
 def ensure_report_modules_table(db_path: str) -> None:
     """Ensure the report_modules table exists in the database."""
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         conn.execute("""
             CREATE TABLE IF NOT EXISTS report_modules (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -496,7 +554,7 @@ def define_expected_table(
     """
     Upsert a row in report_structure WITHOUT needing a UNIQUE index.
     """
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute(
             """
@@ -526,23 +584,39 @@ def define_expected_table(
                 """,
                 (report_name, table_alias, int(required), expected_cutoff),
             )
+        bump_generation(conn, "report_structure")
         conn.commit()
 
 # helper functions
 
 def upsert_report_param(report_name: str, key: str, value: Any,
                         db_path="database/reporting.db") -> None:
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         conn.execute("""
             INSERT INTO report_parameters (report_name, param_key, param_value)
             VALUES (?,?,?)
             ON CONFLICT(report_name, param_key) DO UPDATE
             SET param_value = excluded.param_value
         """, (report_name, key, json.dumps(value)))
+        bump_generation(conn, "report_parameters")
         conn.commit()
+    cache = current_run_cache(db_path)
+    if cache is not None:
+        cache.invalidate("report_parameters")
 
 def load_report_params(report_name: str, db_path="database/reporting.db") -> dict:
-    with sqlite3.connect(db_path) as conn:
+    # Read once per run when a run cache is active; callers still get their own dict
+    cache = current_run_cache(db_path)
+    if cache is not None:
+        params = copy.deepcopy(dict(cache.value("report_parameters", None, report_name,
+                                                lambda: _load_report_params(report_name, db_path))))
+    else:
+        params = _load_report_params(report_name, db_path)
+    record_input(PARAMS_INPUT, report_name, digest(params))
+    return params
+
+def _load_report_params(report_name: str, db_path="database/reporting.db") -> dict:
+    with connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute("SELECT param_key, param_value FROM report_parameters WHERE report_name = ?",
                     (report_name,))
@@ -564,7 +638,7 @@ def save_report_object(
 ) -> int:
     """Saves or updates a report object definition."""
     now = datetime.now().isoformat()
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cursor = conn.cursor()
         cursor.execute(
             "SELECT id FROM report_objects WHERE object_name = ?", (object_name,)
@@ -613,6 +687,7 @@ def save_report_object(
             )
             obj_id = cursor.lastrowid
             print(f"Inserted new object: {object_name} (ID: {obj_id})")
+        bump_generation(conn, "report_objects")
         conn.commit()
         return obj_id
 
@@ -620,8 +695,7 @@ def get_report_object(
     object_name: str, db_path: str = "database/reporting.db"
 ) -> dict | None:
     """Fetches a specific report object definition by name."""
-    with sqlite3.connect(db_path) as conn:
-        conn.row_factory = sqlite3.Row # Return results as dict-like rows
+    with connection(db_path, row_factory=sqlite3.Row) as conn:  # dict-like rows
         cursor = conn.cursor()
         cursor.execute(
             "SELECT * FROM report_objects WHERE object_name = ?", (object_name,)
@@ -633,7 +707,7 @@ def list_report_objects(
     report_context: str | None = None, db_path: str = "database/reporting.db"
 ) -> pd.DataFrame:
     """Lists all report objects, optionally filtered by report context."""
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         query = "SELECT id, object_name, object_type, description, report_context, updated_at FROM report_objects"
         params = []
         if report_context:
@@ -649,9 +723,10 @@ def delete_report_object(
     object_name: str, db_path: str = "database/reporting.db"
 ) -> None:
     """Deletes a report object by name."""
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM report_objects WHERE object_name = ?", (object_name,))
+        bump_generation(conn, "report_objects")
         conn.commit()
         print(f"Deleted object: {object_name}")
 
@@ -662,7 +737,7 @@ def delete_report_object(
 def list_report_modules(report_name: str, db_path="database/reporting.db"):
     """Return DataFrame with id, module_name, run_order, enabled."""
     import pandas as pd
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         return pd.read_sql_query("""
             SELECT id, module_name, run_order, enabled
             FROM report_modules
@@ -673,7 +748,7 @@ def list_report_modules(report_name: str, db_path="database/reporting.db"):
 def upsert_report_module(report_name: str, module_name: str,
                          run_order: int = None, enabled: bool = True,
                          db_path="database/reporting.db"):
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         cur = conn.cursor()
         cur.execute("""
             INSERT INTO report_modules (report_name, module_name, run_order, enabled)
@@ -682,10 +757,11 @@ def upsert_report_module(report_name: str, module_name: str,
             SET run_order = excluded.run_order,
                 enabled   = excluded.enabled
         """, (report_name, module_name, run_order, int(enabled)))
+        bump_generation(conn, "report_modules")
         conn.commit()
 
 # def delete_report_module(row_id: int, db_path="database/reporting.db"):
-#     with sqlite3.connect(db_path) as conn:
+#     with connection(db_path) as conn:
 #         conn.execute("DELETE FROM report_modules WHERE id = ?", (row_id,))
 #         conn.commit()
 # In ingestion/db_utils.py
@@ -710,7 +786,7 @@ def delete_report_module(mapping_id, db_path):
         # Convert mapping_id to int to ensure proper type
         mapping_id = int(mapping_id)
         
-        with sqlite3.connect(db_path) as conn:
+        with connection(db_path) as conn:
             cursor = conn.cursor()
             
             # First check if the mapping exists
@@ -721,6 +797,7 @@ def delete_report_module(mapping_id, db_path):
             
             # Perform the delete
             cursor.execute("DELETE FROM report_modules WHERE id = ?", (mapping_id,))
+            bump_generation(conn, "report_modules")
             
             # Explicitly commit the transaction
             conn.commit()
@@ -743,14 +820,21 @@ def delete_report_module(mapping_id, db_path):
         return False
 #-------------  Create Report Variables  ------------------
 from pathlib import Path
-import altair as alt
-import altair_saver
 import logging
-import great_tables
 import os
 import sqlite3
 import json
-from typing import Any
+import threading
+from collections.abc import Mapping
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+# Renderer libraries are imported where a table or chart is actually handled,
+# so importing db_utils (every page, every worker) stays cheap
+if TYPE_CHECKING:
+    import altair as alt
+    import great_tables
 
 
 def altair_chart_to_path(chart: alt.TopLevelMixin, var_name: str, folder: str = "charts_out") -> str:
@@ -770,42 +854,19 @@ def altair_chart_to_path(chart: alt.TopLevelMixin, var_name: str, folder: str =
         ValueError: If chart is not an Altair chart object.
         RuntimeError: If chart rendering fails.
     """
-    import os
-    import logging
-    
+    import altair as alt
+    from ingestion.chart_renderer import CHART_PPI, CHART_SCALE, chart_path, render_spec
+
     if not isinstance(chart, alt.TopLevelMixin):
         raise ValueError(f"Expected alt.TopLevelMixin (Chart or LayerChart), got {type(chart)}")
 
-    # Create output directory
-    save_dir = "charts_out"
-    os.makedirs(save_dir, exist_ok=True)
-    out_path = os.path.join(save_dir, f"{var_name}_tta_chart.png")
-
+    out_path = chart_path(var_name)
     try:
-        # Use vl-convert-python directly to avoid altair_saver fallback
-        import vl_convert as vlc
-        
-        # Get the chart specification as a dictionary
-        chart_spec = chart.to_dict()
-        
-        # Convert to PNG using vl-convert directly
-        png_data = vlc.vegalite_to_png(
-            vl_spec=chart_spec,
-            scale=2.0,  # Higher resolution
-            ppi=150     # DPI for better quality
-        )
-        
-        # Write PNG data to file
-        with open(out_path, 'wb') as f:
-            f.write(png_data)
-        
+        # Same renderer as the chart pool workers, run in this process
+        spec_json = json.dumps(chart.to_dict(), sort_keys=True, default=str)
+        render_spec(spec_json, str(out_path), scale=CHART_SCALE, ppi=CHART_PPI)
         logging.debug(f"Saved Altair chart using vl-convert-python directly to {out_path}")
         return str(out_path)
-        
-    except ImportError:
-        logging.error("vl-convert-python is not installed. Install it with: pip install vl-convert-python")
-        raise RuntimeError(f"vl-convert-python is required but not installed")
-        
     except Exception as e:
         logging.error(f"Failed to render Altair chart {var_name} using vl-convert: {str(e)}", exc_info=True)
         raise RuntimeError(f"Failed to render Altair chart {var_name}: {str(e)}")
@@ -1145,6 +1206,196 @@ def save_gt_table_simple(gt_table, file_path, var_name, width=1400, height=800):
         return None
     
 
+_UPSERT_VARIABLE_SQL = """
+    INSERT INTO report_variables
+          (report_name, module_name, var_name,
+           anchor_name, value, gt_image, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(report_name, var_name) DO UPDATE SET
+        module_name = excluded.module_name,
+        anchor_name = excluded.anchor_name,
+        value       = excluded.value,
+        gt_image    = excluded.gt_image,
+        created_at  = excluded.created_at
+"""
+
+_VARIABLE_BATCHES = threading.local()
+
+
+class VariableBatch:
+    """
+    Unit of work for report_variables, bound to one connection.
+
+    Rows are collected and written with a single executemany upsert per
+    flush (on exit, every ``max_rows`` rows, or before a read of the same
+    database in this thread), instead of one connect/commit per variable.
+    A row's picture may still be a Future from the chart render queue; the
+    flush waits for it first. ``var_names`` collects every variable written,
+    whatever module name a builder filed it under; ``failed_renders`` the
+    (variable, error) of every chart whose render failed, for the caller to
+    report (see scheduler.execute_module).
+    """
+
+    def __init__(self, db_path, max_rows: int = 500):
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self.rows: list[tuple] = []
+        self.written = 0
+        self.var_names: set[str] = set()
+        self.failed_renders: list[tuple[str, str]] = []
+        self.con: sqlite3.Connection | None = None
+
+    def __enter__(self):
+        self.con = open_connection(self.db_path)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Flush even when the module failed: what it produced so far is kept, as before
+        try:
+            self.flush()
+        finally:
+            self.con.close()
+            self.con = None
+        return False
+
+    def add(self, row: tuple) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.max_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        rows, self.rows = self.rows, []
+        rows = self._await_renders(rows)
+        if not rows:
+            return
+        try:
+            with profiler.span("report_variables", "write", rows=len(rows)), self.con:
+                self.con.executemany(_UPSERT_VARIABLE_SQL, rows)
+                bump_generation(self.con, "report_variables")
+        except Exception as exc:
+            logging.error("Batched variable write failed (%d rows): %s", len(rows), exc, exc_info=True)
+            raise
+        self.written += len(rows)
+        self.var_names.update(row[2] for row in rows)
+        logging.debug("Flushed %d report variables to %s", len(rows), self.db_path)
+
+    def _await_renders(self, rows: list[tuple]) -> list[tuple]:
+        """Swap chart Futures for their PNG paths; a failed render drops its row and is recorded."""
+        ready = []
+        for row in rows:
+            image = row[5]
+            if isinstance(image, Future):
+                try:
+                    image = image.result()
+                except Exception as exc:
+                    logging.error("Failed to render Altair chart %s: %s", row[2], exc)
+                    self.failed_renders.append((row[2], str(exc)))
+                    continue
+                row = row[:5] + (image,)
+            ready.append(row)
+        return ready
+
+
+def _batch_key(db_path) -> str:
+    return os.path.abspath(str(db_path))
+
+
+def _active_variable_batch(db_path) -> VariableBatch | None:
+    return getattr(_VARIABLE_BATCHES, "active", {}).get(_batch_key(db_path))
+
+
+@contextmanager
+def variable_batch(db_path, max_rows: int = 500):
+    """
+    Route every insert_variable() for ``db_path`` in this thread through one
+    VariableBatch. Nested use joins the outer batch.
+    """
+    active = getattr(_VARIABLE_BATCHES, "active", None)
+    if active is None:
+        active = _VARIABLE_BATCHES.active = {}
+    key = _batch_key(db_path)
+    if key in active:
+        yield active[key]
+        return
+
+    with VariableBatch(db_path, max_rows=max_rows) as batch:
+        active[key] = batch
+        try:
+            yield batch
+        finally:
+            del active[key]
+
+
+def _render_gt_image(gt_table, var, simple_gt_save=False, table_width=None, table_height=None):
+    """Render a GT table to charts_out/ and return the PNG path."""
+    import time
+
+    logging.debug(f"Rendering gt_table for {var}")
+    tmp = Path(f"charts_out/{var}_gt.png")
+    tmp.parent.mkdir(exist_ok=True)
+
+    # Warm browser pool first; the per-call GT.save paths remain as fallback
+    try:
+        from ingestion.render_service import render_gt_table
+        width = table_width if simple_gt_save else None
+        height = (table_height or (600 if table_width else None)) if simple_gt_save else None
+        gt_image = render_gt_table(gt_table, tmp, var, width=width, height=height)
+    except Exception as e:
+        logging.warning(f"Browser pool render failed for {var}, falling back to GT.save: {e}")
+        gt_image = None
+
+    # Choose saving method based on parameter
+    if gt_image is None and simple_gt_save:
+        # Use simple GT table save with optional dimensions
+        save_args = [gt_table, tmp, var]
+
+        # Add dimensions if provided
+        if table_width is not None:
+            save_args.append(table_width)
+            if table_height is not None:
+                save_args.append(table_height)
+            elif table_width is not None:
+                # Width provided but not height - use reasonable default
+                save_args.append(600)  # Default height when width is custom
+
+        gt_image = save_gt_table_simple(*save_args)
+    elif gt_image is None:
+        # Use smart GT table save with automatic size detection (original behavior)
+        gt_image = save_gt_table_smart(gt_table, tmp, var)
+
+        # Post-render delay to ensure file is fully written and resources are freed
+        time.sleep(0.5)
+    logging.debug(f"Saved great_tables to {gt_image}")
+    return gt_image
+
+
+def _render_variable_image(var, db_path, gt_table, simple_gt_save=False, table_width=None, table_height=None):
+    """
+    PNG path for a GT table, served from the render cache when the content
+    and render options are unchanged since an earlier run.
+    """
+    from ingestion.render_cache import gt_cache_key, cached_render
+
+    def render():
+        with profiler.span(var, "render", kind="gt"):
+            return _render_gt_image(gt_table, var, simple_gt_save, table_width, table_height)
+
+    try:
+        cache_key = gt_cache_key(gt_table, simple=simple_gt_save, width=table_width, height=table_height)
+    except Exception as e:
+        logging.warning(f"Could not compute render cache key for {var}: {e}")
+        return render()
+    return cached_render(db_path, cache_key, Path(f"charts_out/{var}_gt.png"), "gt", render)
+
+
+def _submit_chart_image(var, db_path, altair_chart) -> Future:
+    """Queue an Altair chart on the render pool (render cache first); Future of the PNG path."""
+    from ingestion.chart_renderer import submit_chart
+    return submit_chart(altair_chart, var, db_path)
+
+
 def insert_variable(
     report: str,
     module: str,
@@ -1161,185 +1412,288 @@ def insert_variable(
 ) -> None:
     """
     Overwrite the row (report_name, var_name) with a new value (and picture path).
-    Enhanced with better timing and error handling.
+    Images are rendered (or taken from the render cache) before the write
+    transaction opens, so parallel modules never wait on a browser.
+    Altair charts go to the chart render queue: inside a variable_batch the
+    row is queued with the pending render and the caller does not wait.
     
     Args:
         simple_gt_save: If True, uses simple GT save instead of complex smart save
     """
-    import time
-    import gc  # Garbage collection
-    
     if gt_table is not None and altair_chart is not None:
         raise ValueError("Cannot provide both gt_table and altair_chart")
-    if gt_table is not None and not isinstance(gt_table, great_tables.GT):
-        raise ValueError(f"Expected great_tables.GT, got {type(gt_table)}")
-    if altair_chart is not None and not isinstance(altair_chart, alt.TopLevelMixin):
-        raise ValueError(f"Expected alt.TopLevelMixin (Chart or LayerChart), got {type(altair_chart)}")
-
-    con = sqlite3.connect(db_path)
-    cur = con.cursor()
-    try:
-        # 1) Remove any previous copy of this variable
-        cur.execute(
-            "DELETE FROM report_variables WHERE report_name = ? AND var_name = ?",
-            (report, var),
-        )
-
-        # 2) Serialize the Python value
-        val_json = json.dumps(value, default=str)
-
-        # 3) Optional: Render great-tables or Altair chart to PNG and store the path
-        gt_image = None
-        if gt_table is not None:
-            logging.debug(f"Rendering gt_table for {var}")
-            tmp = Path(f"charts_out/{var}_gt.png")
-            tmp.parent.mkdir(exist_ok=True)
-
-            # Choose saving method based on parameter
-            if simple_gt_save:
-                # Use simple GT table save with optional dimensions
-                save_args = [gt_table, tmp, var]
-
-                # Add dimensions if provided
-                if table_width is not None:
-                    save_args.append(table_width)
-                    if table_height is not None:
-                        save_args.append(table_height)
-                    elif table_width is not None:
-                        # Width provided but not height - use reasonable default
-                        save_args.append(600)  # Default height when width is custom
-                
-                gt_image = save_gt_table_simple(*save_args)
-            else:
-                # Use smart GT table save with automatic size detection (original behavior)
-                gt_image = save_gt_table_smart(gt_table, tmp, var)
-            
-            # Post-render delay to ensure file is fully written and resources are freed
-            time.sleep(0.5)
-            logging.debug(f"Saved great_tables to {gt_image}")
-            
-        elif altair_chart is not None:
-            logging.debug(f"Rendering altair_chart for {var}")
-            gt_image = altair_chart_to_path(altair_chart, var)
-            time.sleep(0.3)  # Small delay after Altair render too
-            logging.debug(f"Saved Altair chart path: {gt_image}")
-
-        # 4) Insert the fresh row
-        cur.execute(
-            """
-            INSERT INTO report_variables
-                  (report_name, module_name, var_name,
-                   anchor_name, value, gt_image, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """,
-            (report, module, var, anchor or var, val_json, gt_image),
+    if gt_table is not None:
+        import great_tables
+        if not isinstance(gt_table, great_tables.GT):
+            raise ValueError(f"Expected great_tables.GT, got {type(gt_table)}")
+    if altair_chart is not None:
+        import altair as alt
+        if not isinstance(altair_chart, alt.TopLevelMixin):
+            raise ValueError(f"Expected alt.TopLevelMixin (Chart or LayerChart), got {type(altair_chart)}")
+
+    # 1) Serialize the Python value
+    val_json = json.dumps(value, default=str)
+
+    # 2) Optional: Render great-tables or Altair chart to PNG and store the path
+    batch = _active_variable_batch(db_path)
+    gt_image = None
+    if gt_table is not None:
+        gt_image = _render_variable_image(
+            var, db_path, gt_table,
+            simple_gt_save=simple_gt_save, table_width=table_width, table_height=table_height,
         )
+        logging.debug(f"Rendered image for {var}: {gt_image}")
+    elif altair_chart is not None:
+        gt_image = _submit_chart_image(var, db_path, altair_chart)
+        if batch is None:
+            try:
+                gt_image = gt_image.result()
+            except Exception as e:
+                logging.error(f"Failed to render Altair chart {var}: {str(e)}")
+                raise RuntimeError(f"Failed to render Altair chart {var}: {str(e)}")
+            logging.debug(f"Rendered image for {var}: {gt_image}")
 
-        con.commit()
-        logging.debug("Stored variable %s for report %s (rowid=%s)",
-                      var, report, cur.lastrowid)
+    # 3) Upsert – queued on the active batch, if any, else written right away
+    row = (report, module, var, anchor or var, val_json, gt_image)
+    if batch is not None:
+        batch.add(row)
+        return
 
+    try:
+        with profiler.span(var, "write", rows=1), connection(db_path) as con:
+            con.execute(_UPSERT_VARIABLE_SQL, row)
+            bump_generation(con, "report_variables")
+        logging.debug("Stored variable %s for report %s", var, report)
     except Exception as exc:
-        con.rollback()
         logging.error("insert_variable failed for %s/%s: %s", report, var, exc, exc_info=True)
         raise
-    finally:
-        con.close()
 
-def fetch_vars_for_report(report_name, db_path):
-    con = sqlite3.connect(db_path)
-    df = pd.read_sql_query('''
-        SELECT anchor_name, value FROM report_variables
-        WHERE report_name = ?
-    ''', con, params=(report_name,))
-    con.close()
-    context = {}
-    for _, row in df.iterrows():
-        try:
-            context[row["anchor_name"]] = json.loads(row["value"])
-        except (json.JSONDecodeError, TypeError, ValueError):
-            context[row["anchor_name"]] = row["value"]
-    return context
 
-def fetch_gt_image(report_name, var_name, db_path):
-    conn = sqlite3.connect(db_path)
+def _flush_pending_variables(db_path) -> None:
+    """Readers call this first so a module always sees its own queued writes."""
+    batch = _active_variable_batch(db_path)
+    if batch is not None:
+        batch.flush()
+
+def _decode_variable(value):
     try:
-        cursor = conn.execute('''
-            SELECT gt_image, anchor_name
-            FROM report_variables
-            WHERE report_name = ? AND var_name = ?
-            ORDER BY created_at DESC
-            LIMIT 1
-        ''', (report_name, var_name))
-        result = cursor.fetchone()
-        logging.debug(f"fetch_gt_image result for {var_name}: {result}")
-        if result:
-            gt_image, anchor_name = result
-            return gt_image, anchor_name if anchor_name else var_name  # Fallback to var_name if anchor_name is None
-        return None, None
-    except Exception as e:
-        logging.error(f"Error fetching gt_image for {var_name}: {str(e)}")
-        raise
-    finally:
-        conn.close()
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return value
 
 
-def get_variable_status(report_name, db_path):
-    con = sqlite3.connect(db_path)
-    try:
-        # Query all relevant columns including module_name, except gt_image (BLOB)
-        df = pd.read_sql_query('''
-            SELECT var_name, module_name, value,anchor_name, created_at,
-                   julianday('now') - julianday(created_at) as age_days
-            FROM report_variables
-            WHERE report_name = ?
-        ''', con, params=(report_name,))
+def _glob_escape(text: str) -> str:
+    return "".join(f"[{c}]" if c in "*?[" else c for c in text)
 
-        # Debug: Log the raw DataFrame
-        logging.debug(f"Raw DataFrame dtypes:\n{df.dtypes}")
-        logging.debug(f"Raw DataFrame head:\n{df.head().to_string()}")
 
-        # Ensure all columns are string-safe
-        # Handle var_name
-        df['var_name'] = df['var_name'].astype(str)
+class ReportVariables(Mapping):
+    """
+    Read-only, lazy view of one report's variables, keyed by anchor name
+    (the same keys as ``fetch_vars_for_report``).
+
+    Nothing is read up front. A key is fetched with a ``WHERE anchor_name
+    IN (...)`` query on first access (``prefetch`` loads several in one
+    query), decoded from JSON on first use, and kept for the lifetime of
+    this object. ``matching('pay_credits_*')`` / ``with_prefix`` return the
+    variables whose anchor matches a GLOB pattern.
+    """
 
-        # Handle module_name
-        df['module_name'] = df['module_name'].astype(str)
+    _CHUNK = 500   # stays below SQLite's bound-parameter limit
+
+    def __init__(self, report_name: str, db_path, conn: sqlite3.Connection | None = None):
+        self.report_name = report_name
+        self.db_path = db_path
+        self._conn = conn
+        self._own_conn: sqlite3.Connection | None = None
+        self._raw: dict = {}        # anchor → JSON text (None when the anchor does not exist)
+        self._decoded: dict = {}
+        self._names: list | None = None
+
+    # ── connection ─────────────────────────────────────────
+    def _connection(self) -> sqlite3.Connection:
+        _flush_pending_variables(self.db_path)     # see this thread's queued writes
+        if self._conn is not None:
+            return self._conn
+        if self._own_conn is None:
+            self._own_conn = open_connection(self.db_path)
+        return self._own_conn
+
+    def close(self) -> None:
+        if self._own_conn is not None:
+            self._own_conn.close()
+            self._own_conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
 
-        # Handle value column: decode JSON and convert to string for display
-        def safe_json_load(x):
-            try:
-                return json.loads(x) if x else None
-            except json.JSONDecodeError as e:
-                logging.warning(f"Failed to decode JSON in value column: {x[:100]}... Error: {str(e)}")
-                return "Invalid JSON"
+    # ── loading ────────────────────────────────────────────
+    def _store_rows(self, rows) -> None:
+        for anchor, value in rows:   # rowid order: the last row of an anchor wins, as before
+            self._raw[anchor] = value
+            self._decoded.pop(anchor, None)
+
+    def prefetch(self, *anchors: str) -> "ReportVariables":
+        """Load the given anchors (those not loaded yet) in as few queries as possible."""
+        missing = [a for a in dict.fromkeys(anchors) if a not in self._raw]
+        for i in range(0, len(missing), self._CHUNK):
+            chunk = missing[i:i + self._CHUNK]
+            for anchor in chunk:
+                self._raw[anchor] = _MISSING
+            rows = self._connection().execute(
+                f"SELECT anchor_name, value FROM report_variables "
+                f"WHERE report_name = ? AND anchor_name IN ({','.join('?' * len(chunk))}) ORDER BY rowid",
+                (self.report_name, *chunk),
+            ).fetchall()
+            self._store_rows(rows)
+        return self
+
+    def matching(self, pattern: str) -> dict:
+        """{anchor: value} for every anchor matching the GLOB ``pattern`` (e.g. 'pay_credits_*')."""
+        rows = self._connection().execute(
+            "SELECT anchor_name, value FROM report_variables "
+            "WHERE report_name = ? AND anchor_name GLOB ? ORDER BY rowid",
+            (self.report_name, pattern),
+        ).fetchall()
+        self._store_rows(rows)
+        return {anchor: self[anchor] for anchor in dict.fromkeys(a for a, _ in rows)}
+
+    def with_prefix(self, prefix: str) -> dict:
+        return self.matching(_glob_escape(prefix) + "*")
+
+    # ── mapping ────────────────────────────────────────────
+    def __getitem__(self, anchor: str):
+        if anchor not in self._raw:
+            self.prefetch(anchor)
+        raw = self._raw[anchor]
+        if raw is _MISSING:
+            raise KeyError(anchor)
+        if anchor not in self._decoded:
+            self._decoded[anchor] = _decode_variable(raw)
+        return self._decoded[anchor]
+
+    def __contains__(self, anchor) -> bool:
+        if anchor not in self._raw:
+            self.prefetch(anchor)
+        return self._raw[anchor] is not _MISSING
+
+    def __iter__(self):
+        if self._names is None:
+            self._names = [r[0] for r in self._connection().execute(
+                "SELECT DISTINCT anchor_name FROM report_variables WHERE report_name = ?",
+                (self.report_name,),
+            )]
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        if self._names is None:
+            iter(self)
+        return len(self._names)
+
+    def to_dict(self) -> dict:
+        """Every variable, decoded (what ``fetch_vars_for_report`` returns)."""
+        rows = self._connection().execute(
+            "SELECT anchor_name, value FROM report_variables WHERE report_name = ? ORDER BY rowid",
+            (self.report_name,),
+        ).fetchall()
+        self._store_rows(rows)
+        self._names = list(dict.fromkeys(a for a, _ in rows))
+        return {anchor: self[anchor] for anchor in self._names}
+
+
+_MISSING = object()
+
+
+def report_variables(report_name, db_path, conn: sqlite3.Connection | None = None) -> ReportVariables:
+    """Lazy, selective accessor for a report's variables (see ReportVariables)."""
+    return ReportVariables(report_name, db_path, conn)
 
-        def safe_str(x):
-            try:
-                if isinstance(x, (dict, list)):
-                    return str(x)[:100] + "..."
-                return str(x) if x is not None else "N/A"
-            except Exception as e:
-                logging.warning(f"Failed to convert to string: {x}. Error: {str(e)}")
-                return "Unrepresentable Data"
 
-        df['value'] = df['value'].apply(safe_json_load)
-        df['value'] = df['value'].apply(safe_str)
+def fetch_vars_for_report(report_name, db_path):
+    """Every variable of the report, decoded. Prefer report_variables() when only some are needed."""
+    with report_variables(report_name, db_path) as variables:
+        return variables.to_dict()
 
-        # Handle created_at
-        df['created_at'] = df['created_at'].astype(str)
+def fetch_gt_image(report_name, var_name, db_path):
+    _flush_pending_variables(db_path)
+    with connection(db_path) as conn:
+        try:
+            cursor = conn.execute('''
+                SELECT gt_image, anchor_name
+                FROM report_variables
+                WHERE report_name = ? AND var_name = ?
+                ORDER BY created_at DESC
+                LIMIT 1
+            ''', (report_name, var_name))
+            result = cursor.fetchone()
+            logging.debug(f"fetch_gt_image result for {var_name}: {result}")
+            if result:
+                gt_image, anchor_name = result
+                return gt_image, anchor_name if anchor_name else var_name  # Fallback to var_name if anchor_name is None
+            return None, None
+        except Exception as e:
+            logging.error(f"Error fetching gt_image for {var_name}: {str(e)}")
+            raise
 
-        # Handle age_days
-        df['age_days'] = df['age_days'].astype(float).round(2)
 
-        logging.debug(f"Processed DataFrame head:\n{df.head().to_string()}")
-        logging.debug(f"Fetched variable status for report '{report_name}' with {len(df)} rows")
-        return df
-    except Exception as e:
-        logging.error(f"Error fetching variable status for report '{report_name}': {str(e)}")
-        raise
-    finally:
-        con.close()
+def get_variable_status(report_name, db_path):
+    _flush_pending_variables(db_path)
+    with connection(db_path) as con:
+        try:
+            # Query all relevant columns including module_name, except gt_image (BLOB)
+            df = pd.read_sql_query('''
+                SELECT var_name, module_name, value,anchor_name, created_at,
+                       julianday('now') - julianday(created_at) as age_days
+                FROM report_variables
+                WHERE report_name = ?
+            ''', con, params=(report_name,))
+
+            # Debug: Log the raw DataFrame
+            logging.debug(f"Raw DataFrame dtypes:\n{df.dtypes}")
+            logging.debug(f"Raw DataFrame head:\n{df.head().to_string()}")
+
+            # Ensure all columns are string-safe
+            # Handle var_name
+            df['var_name'] = df['var_name'].astype(str)
+
+            # Handle module_name
+            df['module_name'] = df['module_name'].astype(str)
+
+            # Handle value column: decode JSON and convert to string for display
+            def safe_json_load(x):
+                try:
+                    return json.loads(x) if x else None
+                except json.JSONDecodeError as e:
+                    logging.warning(f"Failed to decode JSON in value column: {x[:100]}... Error: {str(e)}")
+                    return "Invalid JSON"
+
+            def safe_str(x):
+                try:
+                    if isinstance(x, (dict, list)):
+                        return str(x)[:100] + "..."
+                    return str(x) if x is not None else "N/A"
+                except Exception as e:
+                    logging.warning(f"Failed to convert to string: {x}. Error: {str(e)}")
+                    return "Unrepresentable Data"
+
+            df['value'] = df['value'].apply(safe_json_load)
+            df['value'] = df['value'].apply(safe_str)
+
+            # Handle created_at
+            df['created_at'] = df['created_at'].astype(str)
+
+            # Handle age_days
+            df['age_days'] = df['age_days'].astype(float).round(2)
+
+            logging.debug(f"Processed DataFrame head:\n{df.head().to_string()}")
+            logging.debug(f"Fetched variable status for report '{report_name}' with {len(df)} rows")
+            return df
+        except Exception as e:
+            logging.error(f"Error fetching variable status for report '{report_name}': {str(e)}")
+            raise
 
 # === workflow step: derived date computation ===
 def compute_cutoff_related_dates(cutoff_date: date) -> dict:
@@ -1400,7 +1754,7 @@ def get_existing_rule_for_report(report, filename, db_path="database/reporting.d
     • If sheet_rules has a report_name column → use it.
     • Otherwise fall back to any rule that matches the filename only.
     """
-    with sqlite3.connect(db_path) as con:
+    with connection(db_path) as con:
         # 1. detect columns
         cols = [c[1] for c in con.execute("PRAGMA table_info(sheet_rules)")]
 
@@ -1426,36 +1780,47 @@ def get_existing_rule_for_report(report, filename, db_path="database/reporting.d
         return row if row else (None, None)
 
 
-def fetch_latest_table_data(conn: sqlite3.Connection, table_alias: str, cutoff: pd.Timestamp) -> pd.DataFrame:
+def fetch_latest_table_data(conn: sqlite3.Connection, table_alias: str, cutoff: pd.Timestamp,
+                            typed: bool = False) -> pd.DataFrame:
+    """
+    Rows of the upload closest to ``cutoff`` that has data (see ingestion/snapshot_store.py).
+    With ``typed`` the upload's recorded column types are applied (dates parsed …).
+    During a report run the frame is read once and shared through the run cache.
+    The upload_id served is recorded as an input of the running module.
+    """
+    with profiler.span(table_alias, "fetch", typed=typed):
+        return _cached_table_data(conn, table_alias, cutoff, typed)
+
+
+def _cached_table_data(conn: sqlite3.Connection, table_alias: str, cutoff: pd.Timestamp,
+                       typed: bool) -> pd.DataFrame:
+    from ingestion.snapshot_store import resolve_snapshot_upload_id
+
+    cache = current_run_cache(conn.execute("PRAGMA database_list").fetchone()[2])
+    if cache is not None:
+        upload_id = cache.value(table_alias, cutoff, "upload_id",
+                                lambda: resolve_snapshot_upload_id(conn, table_alias, cutoff))
+    else:
+        upload_id = resolve_snapshot_upload_id(conn, table_alias, cutoff)
+    record_input(ALIAS_INPUT, table_alias, upload_id)
+
+    if cache is not None:
+        return cache.frame(table_alias, cutoff, "typed" if typed else "raw",
+                           build=lambda: _fetch_latest_table_data(conn, table_alias, cutoff, upload_id, typed))
+    return _fetch_latest_table_data(conn, table_alias, cutoff, upload_id, typed)
+
+
+def _fetch_latest_table_data(conn: sqlite3.Connection, table_alias: str, cutoff: pd.Timestamp,
+                             upload_id, typed: bool = False) -> pd.DataFrame:
+    from ingestion.snapshot_store import read_snapshot
+
     cutoff_str = cutoff.isoformat()
     logging.debug(f"Fetching latest data for table_alias: {table_alias}, cutoff: {cutoff_str}")
-    
-    # Fetch all upload logs ordered by closeness to cutoff
-    query = """
-        SELECT uploaded_at, id
-        FROM upload_log
-        WHERE table_alias = ?
-        ORDER BY ABS(strftime('%s', uploaded_at) - strftime('%s', ?))
-    """
-    results = conn.execute(query, (table_alias, cutoff_str)).fetchall()
-    logging.debug(f"Upload log query results for {table_alias}: {results}")
 
-    if not results:
-        logging.warning(f"No uploads found for table alias '{table_alias}' near cutoff {cutoff_str}")
+    if upload_id is None:
+        logging.warning(f"No uploads with data found for table alias '{table_alias}' near cutoff {cutoff_str}")
         return pd.DataFrame()
 
-    # Iterate through upload_ids until we find one with data
-    for uploaded_at, upload_id in results:
-        logging.debug(f"Checking upload_id: {upload_id}, uploaded_at: {uploaded_at}")
-        df = pd.read_sql_query(
-            f"SELECT * FROM {table_alias} WHERE upload_id = ?",
-            conn,
-            params=(upload_id,)
-        )
-        if not df.empty:
-            logging.debug(f"Fetched {len(df)} rows from {table_alias} with upload_id {upload_id}")
-            return df
-        logging.debug(f"No data found for upload_id {upload_id} in {table_alias}")
-
-    logging.warning(f"No data found for any upload_id for table alias '{table_alias}'")
-    return pd.DataFrame()
\ No newline at end of file
+    df = read_snapshot(conn, table_alias, upload_id, typed=typed)
+    logging.debug(f"Fetched {len(df)} rows from {table_alias} with upload_id {upload_id}")
+    return df
@@ -0,0 +1,54 @@
+# ingestion/input_tracker.py
+"""
+Records which inputs a module actually read while it ran.
+
+``fetch_latest_table_data`` reports the upload_id it served for each alias,
+``load_report_params`` a digest of the parameters it returned. The
+scheduler wraps every module run in ``track_inputs()`` and turns what was
+recorded into the module's input fingerprint (see
+reporting/quarterly_report/fingerprints.py).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict
+
+_ACTIVE = threading.local()
+
+ALIAS = "alias"
+PARAMS = "params"
+
+
+def digest(value: Any) -> str:
+    """Stable short hash of any JSON-serialisable value."""
+    payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class InputRecorder:
+    def __init__(self):
+        self.inputs: Dict[str, Any] = {}
+
+    def add(self, kind: str, name: str, value: Any) -> None:
+        self.inputs[f"{kind}:{name}"] = value
+
+
+@contextmanager
+def track_inputs():
+    """Collect the inputs read in this thread until the block exits."""
+    recorder = InputRecorder()
+    previous = getattr(_ACTIVE, "recorder", None)
+    _ACTIVE.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _ACTIVE.recorder = previous
+
+
+def record_input(kind: str, name: str, value: Any) -> None:
+    recorder = getattr(_ACTIVE, "recorder", None)
+    if recorder is not None:
+        recorder.add(kind, name, value)
@@ -0,0 +1,283 @@
+# ingestion/profiler.py
+"""
+Run-level timing spans for report runs (``span``, ``profiled``, ``record``),
+written to ``run_metrics`` by ``flush`` when a module finishes. The mode
+comes from ``REPORT_PROFILE`` or ``run_report(profile=…)``: ``off``,
+``summary`` (run / module spans plus per-category totals) or ``detailed``.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+from ingestion.sqlite_pool import connection
+
+logger = logging.getLogger(__name__)
+
+MODE_OFF = "off"
+MODE_SUMMARY = "summary"
+MODE_DETAILED = "detailed"
+MODES = (MODE_OFF, MODE_SUMMARY, MODE_DETAILED)
+# categories: run, module, fetch, transform, render, write, llm
+SUMMARY_CATEGORIES = ("run", "module")     # kept as individual spans in summary mode
+
+KIND_SPAN = "span"
+KIND_TOTAL = "total"
+
+DEFAULT_MODE = os.environ.get("REPORT_PROFILE", MODE_OFF).lower()
+
+_NULL_SPAN = nullcontext()
+
+# process-wide state: one run (and, in a worker, one module) at a time
+_MODE = DEFAULT_MODE
+_RUN_ID: Optional[str] = None
+_REPORT: Optional[str] = None
+_MODULE: Optional[str] = None
+_SPANS: List[tuple] = []
+_TOTALS: Dict[Tuple[Optional[str], str], List[float]] = {}   # (module, category) → [calls, seconds]
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+
+
+def _check_mode(mode: Optional[str]) -> str:
+    mode = (mode or MODE_OFF).lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown profile mode {mode!r}, expected one of {MODES}")
+    return mode
+
+
+def enabled() -> bool:
+    return _MODE != MODE_OFF
+
+
+def start_run(report_name: str, mode: Optional[str] = None) -> Optional[str]:
+    """Begin profiling a run in this process; returns its run id (None when off)."""
+    global _MODE, _RUN_ID, _REPORT
+    _MODE = _check_mode(mode or DEFAULT_MODE)
+    if _MODE == MODE_OFF:
+        _RUN_ID = None
+        return None
+    _RUN_ID = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    _REPORT = report_name
+    _reset()
+    return _RUN_ID
+
+
+def attach_run(run_id: Optional[str], report_name: str, mode: str) -> None:
+    """Join a run started in another process (scheduler workers)."""
+    global _MODE, _RUN_ID, _REPORT
+    _MODE = _check_mode(mode) if run_id else MODE_OFF
+    _RUN_ID, _REPORT = run_id, report_name
+    _reset()
+
+
+def current_run() -> Tuple[Optional[str], str]:
+    """(run id, mode) to hand to worker processes."""
+    return _RUN_ID, _MODE
+
+
+def _reset() -> None:
+    with _LOCK:
+        _SPANS.clear()
+        _TOTALS.clear()
+
+
+# ──────────────────────────────────────────────────────────────
+# PEAK RSS
+# ──────────────────────────────────────────────────────────────
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None if it cannot be read)."""
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:         # Windows
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+# ──────────────────────────────────────────────────────────────
+# SPANS
+# ──────────────────────────────────────────────────────────────
+class _Span:
+    __slots__ = ("name", "category", "attrs", "keep", "started", "t0")
+
+    def __init__(self, name: str, category: str, attrs: Dict[str, Any], keep: bool):
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.keep = keep            # stored individually (else only counted in the totals)
+
+    def __enter__(self):
+        stack = getattr(_LOCAL, "stack", None)
+        if stack is None:
+            stack = _LOCAL.stack = []
+        stack.append(self)
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.t0
+        stack = _LOCAL.stack
+        stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        _add(self.name, self.category, self.started, duration, self.attrs, self.keep, depth=len(stack))
+        return False
+
+
+def _add(name, category, started, duration, attrs, keep, depth=0, rss=None) -> None:
+    module = _MODULE
+    with _LOCK:
+        if category not in SUMMARY_CATEGORIES:
+            total = _TOTALS.setdefault((module, category), [0, 0.0])
+            total[0] += 1
+            total[1] += duration
+        if keep:
+            _SPANS.append((module, name, category, KIND_SPAN, started, duration, 1, rss, depth,
+                           os.getpid(), threading.current_thread().name,
+                           json.dumps(attrs, default=str) if attrs else None))
+
+
+def _keep(category: str) -> bool:
+    return _MODE == MODE_DETAILED or category in SUMMARY_CATEGORIES
+
+
+def span(name: str, category: str, **attrs):
+    """Time the enclosed block as ``name`` (a shared no-op when profiling is off)."""
+    if _MODE == MODE_OFF:
+        return _NULL_SPAN
+    return _Span(str(name), category, attrs, _keep(category))
+
+
+def profiled(name: Optional[str] = None, category: str = "transform"):
+    """Decorator form of ``span``; the function name is used when ``name`` is omitted."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _MODE == MODE_OFF:
+                return fn(*args, **kwargs)
+            with _Span(label, category, {}, _keep(category)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record(name: str, category: str, started: float, duration: float, **attrs) -> None:
+    """Add a step timed outside a ``span`` block (``started`` is wall-clock)."""
+    if _MODE != MODE_OFF:
+        _add(str(name), category, started, duration, attrs, _keep(category))
+
+
+@contextmanager
+def module_span(module_name: str):
+    """Module run span; the spans recorded meanwhile in this process belong to ``module_name``."""
+    global _MODULE
+    if _MODE == MODE_OFF:
+        yield
+        return
+    previous, _MODULE = _MODULE, module_name
+    started, t0 = time.time(), time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _add(module_name, "module", started, time.perf_counter() - t0,
+             {"error": error} if error else {}, keep=True, rss=peak_rss_mb())
+        _MODULE = previous
+
+
+# ──────────────────────────────────────────────────────────────
+# PERSISTENCE
+# ──────────────────────────────────────────────────────────────
+def _ensure_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS run_metrics (
+            run_id      TEXT,
+            report_name TEXT,
+            module_name TEXT,
+            span_name   TEXT,
+            category    TEXT,
+            kind        TEXT,
+            started_at  REAL,
+            duration_s  REAL,
+            calls       INTEGER,
+            peak_rss_mb REAL,
+            depth       INTEGER,
+            pid         INTEGER,
+            thread      TEXT,
+            attrs       TEXT,
+            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_run_metrics_run ON run_metrics (run_id)")
+
+
+def flush(db_path) -> int:
+    """Write the spans and totals recorded so far in this process; returns the row count."""
+    if _MODE == MODE_OFF or _RUN_ID is None:
+        return 0
+    with _LOCK:
+        spans = list(_SPANS)
+        totals = dict(_TOTALS)
+        _SPANS.clear()
+        _TOTALS.clear()
+    rows = [(_RUN_ID, _REPORT, *s) for s in spans]
+    rows += [
+        (_RUN_ID, _REPORT, module, category, category, KIND_TOTAL, None, seconds, int(calls),
+         None, None, os.getpid(), None, None)
+        for (module, category), (calls, seconds) in totals.items()
+    ]
+    if not rows:
+        return 0
+    try:
+        with connection(db_path) as conn:
+            _ensure_table(conn)
+            conn.executemany(
+                "INSERT INTO run_metrics (run_id, report_name, module_name, span_name, category, kind, "
+                "started_at, duration_s, calls, peak_rss_mb, depth, pid, thread, attrs) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+    except sqlite3.Error as e:
+        logger.warning(f"Could not store run metrics: {e}")
+        return 0
+    return len(rows)
+
+
+def load_run_metrics(db_path, run_id: Optional[str] = None, report_name: Optional[str] = None):
+    """The ``run_metrics`` rows of ``run_id`` (default: the latest run, of ``report_name`` if given)."""
+    import pandas as pd
+
+    with connection(db_path) as conn:
+        _ensure_table(conn)
+        if run_id is None:
+            where, params = ("WHERE report_name = ?", (report_name,)) if report_name else ("", ())
+            row = conn.execute(
+                f"SELECT run_id FROM run_metrics {where} ORDER BY created_at DESC, rowid DESC LIMIT 1", params
+            ).fetchone()
+            if row is None:
+                return pd.DataFrame()
+            run_id = row[0]
+        return pd.read_sql_query("SELECT * FROM run_metrics WHERE run_id = ? ORDER BY started_at",
+                                 conn, params=(run_id,))
@@ -0,0 +1,213 @@
+# ingestion/render_cache.py
+"""
+Content-hash cache for rendered table / chart PNGs, kept in a sidecar SQLite
+file next to the report database and evicted least-recently-used beyond
+``MAX_CACHE_BYTES``. The key hashes the GT table's HTML or the Altair spec
+plus the render options.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from ingestion.sqlite_pool import open_connection
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = "render_cache.db"
+MAX_CACHE_BYTES = int(os.environ.get("RENDER_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+_STATS: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+_STATS_LOCK = threading.Lock()
+_SCHEMA_READY: set = set()     # cache files whose tables exist (created once per process)
+
+# great_tables gives every table a random id unless one is set explicitly
+_GT_ID_RE = re.compile(r'<div id="([A-Za-z0-9_-]+)"')
+
+
+def cache_path_for(db_path) -> Path:
+    """Sidecar cache file, stored next to the report database."""
+    return Path(db_path).resolve().parent / CACHE_FILENAME
+
+
+def _create_schema(con: sqlite3.Connection) -> None:
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS render_cache (
+            cache_key  TEXT PRIMARY KEY,
+            kind       TEXT,
+            png        BLOB NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used  REAL NOT NULL,
+            hits       INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_render_cache_last_used ON render_cache(last_used)")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS render_cache_stats (
+            stat  TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+
+
+@contextmanager
+def _connect(cache_path) -> Iterator[sqlite3.Connection]:
+    """A connection to the cache file: committed on success, always closed."""
+    con = open_connection(cache_path)
+    try:
+        key = str(cache_path)
+        if key not in _SCHEMA_READY:
+            _create_schema(con)
+            _SCHEMA_READY.add(key)
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+# ──────────────────────────────────────────────────────────────
+# KEYS
+# ──────────────────────────────────────────────────────────────
+def _digest(kind: str, payload: str, options: Dict[str, Any]) -> str:
+    h = hashlib.sha256()
+    h.update(kind.encode())
+    h.update(b"\0")
+    h.update(payload.encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def gt_cache_key(gt_table, **options) -> str:
+    """Key for a great_tables.GT rendered with ``options`` (size, save mode …)."""
+    html = gt_table.as_raw_html()
+    m = _GT_ID_RE.search(html)
+    if m:
+        html = html.replace(m.group(1), "gt_table")
+    return _digest("gt", html, options)
+
+
+def chart_cache_key(chart, **options) -> str:
+    """Key for an Altair chart rendered with ``options`` (scale, ppi …)."""
+    spec = json.dumps(chart.to_dict(), sort_keys=True, default=str)
+    return _digest("altair", spec, options)
+
+
+# ──────────────────────────────────────────────────────────────
+# GET / PUT
+# ──────────────────────────────────────────────────────────────
+def _bump(con: sqlite3.Connection, stat: str, n: int = 1) -> None:
+    with _STATS_LOCK:
+        _STATS[stat] += n
+    con.execute(
+        "INSERT INTO render_cache_stats (stat, value) VALUES (?, ?) "
+        "ON CONFLICT(stat) DO UPDATE SET value = value + excluded.value",
+        (stat, n),
+    )
+
+
+def get_png(db_path, cache_key: str) -> bytes | None:
+    """Cached PNG bytes for ``cache_key``, or None (counted as a miss)."""
+    try:
+        with _connect(cache_path_for(db_path)) as con:
+            row = con.execute("SELECT png FROM render_cache WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row is None:
+                _bump(con, "misses")
+                return None
+            con.execute(
+                "UPDATE render_cache SET last_used = ?, hits = hits + 1 WHERE cache_key = ?",
+                (time.time(), cache_key),
+            )
+            _bump(con, "hits")
+            return row[0]
+    except sqlite3.Error as e:
+        logger.warning(f"Render cache lookup failed: {e}")
+        return None
+
+
+def put_png(db_path, cache_key: str, png: bytes, kind: str) -> None:
+    """Store PNG bytes and evict least-recently-used entries beyond the size budget."""
+    try:
+        with _connect(cache_path_for(db_path)) as con:
+            now = time.time()
+            con.execute(
+                """
+                INSERT INTO render_cache (cache_key, kind, png, size_bytes, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    png = excluded.png, size_bytes = excluded.size_bytes, last_used = excluded.last_used
+                """,
+                (cache_key, kind, sqlite3.Binary(png), len(png), now, now),
+            )
+            _evict(con)
+    except sqlite3.Error as e:
+        logger.warning(f"Render cache store failed: {e}")
+
+
+def _evict(con: sqlite3.Connection) -> None:
+    total = con.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM render_cache").fetchone()[0]
+    if total <= MAX_CACHE_BYTES:
+        return
+    evicted = 0
+    for key, size in con.execute("SELECT cache_key, size_bytes FROM render_cache ORDER BY last_used ASC").fetchall():
+        if total <= MAX_CACHE_BYTES:
+            break
+        con.execute("DELETE FROM render_cache WHERE cache_key = ?", (key,))
+        total -= size
+        evicted += 1
+    if evicted:
+        _bump(con, "evictions", evicted)
+        logger.info(f"Render cache: evicted {evicted} entries, {total} bytes kept")
+
+
+def cached_render(db_path, cache_key: str, out_path, kind: str, render) -> str:
+    """
+    Write the PNG for ``cache_key`` to ``out_path``.
+    On a miss ``render()`` is called; it must produce the file and return its path.
+    """
+    out_path = Path(out_path)
+    png = get_png(db_path, cache_key)
+    if png is not None:
+        out_path.parent.mkdir(exist_ok=True)
+        out_path.write_bytes(png)
+        logger.debug(f"Render cache hit for {out_path.name}")
+        return str(out_path)
+
+    path = render()
+    if path and Path(path).exists():
+        put_png(db_path, cache_key, Path(path).read_bytes(), kind)
+    return path
+
+
+# ──────────────────────────────────────────────────────────────
+# STATS
+# ──────────────────────────────────────────────────────────────
+def render_cache_stats(db_path=None) -> Dict[str, int]:
+    """This process' hit/miss counters, plus persisted totals and size when ``db_path`` is given."""
+    with _STATS_LOCK:
+        stats = dict(_STATS)
+    if db_path is not None:
+        with _connect(cache_path_for(db_path)) as con:
+            for stat, value in con.execute("SELECT stat, value FROM render_cache_stats"):
+                stats[f"total_{stat}"] = value
+            entries, size = con.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM render_cache"
+            ).fetchone()
+            stats.update(entries=entries, size_bytes=size)
+    return stats
+
+
+def clear_render_cache(db_path) -> None:
+    with _connect(cache_path_for(db_path)) as con:
+        con.execute("DELETE FROM render_cache")
+        con.execute("DELETE FROM render_cache_stats")
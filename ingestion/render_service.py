@@ -0,0 +1,207 @@
+# ingestion/render_service.py
+"""
+Warm headless-Chrome pool for great_tables → PNG rendering: each table's
+HTML is loaded into an already-open page and captured, clipped to the
+table, in a single screenshot.
+"""
+from __future__ import annotations
+
+import atexit
+import base64
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.environ.get("GT_BROWSER_POOL_SIZE", 2))
+DEFAULT_WINDOW = (2000, 1200)   # wide enough that tables lay out at natural width
+RENDER_TIMEOUT = 30             # seconds to wait for the render-complete signal
+DEVICE_SCALE = 2.0              # same sharpness as GT.save's zoom
+CHECKOUT_POLL_S = 1.0           # a waiting caller re-checks for room left by a discarded driver
+
+_HTML_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8">
+<style>body {{ margin: 0; padding: 0; background: white; }}</style>
+</head><body>{body}</body></html>"""
+
+# Resolves once web fonts are loaded and two frames have been painted
+_WAIT_FOR_RENDER_JS = """
+const done = arguments[arguments.length - 1];
+const fonts = document.fonts ? document.fonts.ready : Promise.resolve();
+fonts.then(() => requestAnimationFrame(() => requestAnimationFrame(() => done(true))));
+"""
+
+_BOUNDING_BOX_JS = """
+const el = document.querySelector(arguments[0]);
+if (!el) { return null; }
+const r = el.getBoundingClientRect();
+return {x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height};
+"""
+
+
+# ──────────────────────────────────────────────────────────────
+# BROWSER POOL
+# ──────────────────────────────────────────────────────────────
+def _new_driver():
+    from selenium import webdriver
+
+    opts = webdriver.ChromeOptions()
+    for arg in ("--headless=new", "--disable-gpu", "--no-sandbox",
+                "--disable-dev-shm-usage", "--hide-scrollbars",
+                f"--window-size={DEFAULT_WINDOW[0]},{DEFAULT_WINDOW[1]}"):
+        opts.add_argument(arg)
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        from selenium.webdriver.chrome.service import Service
+        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
+    except Exception as e:
+        logger.debug(f"ChromeDriverManager unavailable ({e}), using Selenium Manager")
+        driver = webdriver.Chrome(options=opts)
+    driver.set_script_timeout(RENDER_TIMEOUT)
+    driver.get("about:blank")
+    return driver
+
+
+class BrowserPool:
+    """Fixed-size pool of headless Chrome drivers, created lazily on first use."""
+
+    def __init__(self, size: int = POOL_SIZE):
+        self.size = max(1, size)
+        self._idle: "queue.Queue" = queue.Queue()
+        self._all: list = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        driver = self._checkout()
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = not self._is_alive(driver)
+            raise
+        finally:
+            if broken:
+                self._discard(driver)
+            else:
+                self._idle.put(driver)
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        while True:
+            with self._lock:
+                if len(self._all) < self.size:
+                    driver = _new_driver()
+                    self._all.append(driver)
+                    logger.info(f"Started headless Chrome {len(self._all)}/{self.size}")
+                    return driver
+            # pool full: wait for a driver back, or for a broken one to be discarded
+            try:
+                return self._idle.get(timeout=CHECKOUT_POLL_S)
+            except queue.Empty:
+                continue
+
+    @staticmethod
+    def _is_alive(driver) -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._all:
+                self._all.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            drivers, self._all = self._all, []
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+_POOL: BrowserPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = BrowserPool()
+        return _POOL
+
+
+def shutdown_browser_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(shutdown_browser_pool)
+
+
+# ──────────────────────────────────────────────────────────────
+# RENDERING
+# ──────────────────────────────────────────────────────────────
+def render_html_png(html: str, width: int | None = None, height: int | None = None,
+                    selector: str = "table", expand: int = 5) -> bytes:
+    """Render an HTML fragment and return PNG bytes clipped to ``selector`` (+ ``expand`` px)."""
+    width = width or DEFAULT_WINDOW[0]
+    height = height or DEFAULT_WINDOW[1]
+
+    with get_browser_pool().acquire() as driver:
+        driver.set_window_size(width, height)
+        driver.execute_script(
+            "document.open(); document.write(arguments[0]); document.close();",
+            _HTML_PAGE.format(body=html),
+        )
+        driver.execute_async_script(_WAIT_FOR_RENDER_JS)
+
+        box = driver.execute_script(_BOUNDING_BOX_JS, selector)
+        if not box or box["width"] == 0:
+            raise RuntimeError(f"Nothing to capture for selector '{selector}'")
+
+        clip = {
+            "x": max(0.0, box["x"] - expand),
+            "y": max(0.0, box["y"] - expand),
+            "width": box["width"] + 2 * expand,
+            "height": box["height"] + 2 * expand,
+            "scale": DEVICE_SCALE,
+        }
+        shot = driver.execute_cdp_cmd(
+            "Page.captureScreenshot",
+            {"format": "png", "clip": clip, "captureBeyondViewport": True},
+        )
+    return base64.b64decode(shot["data"])
+
+
+def render_gt_table(gt_table, file_path, var_name: str,
+                    width: int | None = None, height: int | None = None, expand: int = 5) -> str:
+    """Render a great_tables.GT to ``file_path`` through the warm pool; returns the path."""
+    file_path = Path(file_path)
+    file_path.parent.mkdir(exist_ok=True)
+
+    png = render_html_png(gt_table.as_raw_html(), width=width, height=height, expand=expand)
+    file_path.write_bytes(png)
+    logger.info(f"✅ Rendered GT table {var_name} ({len(png)} bytes)")
+    return str(file_path)
@@ -5,6 +5,7 @@ import sqlite3
 from datetime import datetime, date
 import pandas as pd
 from ingestion.db_utils import get_expected_tables
+from ingestion.sqlite_pool import connection
 
 
 def check_report_readiness(
@@ -25,7 +26,7 @@ def check_report_readiness(
 
     expected = get_expected_tables(report_name, db_path)
 
-    with sqlite3.connect(db_path) as conn:
+    with connection(db_path) as conn:
         uploaded_df = pd.read_sql_query(
             """
             SELECT table_alias, MAX(uploaded_at) AS last_uploaded
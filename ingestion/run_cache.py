@@ -0,0 +1,120 @@
+# ingestion/run_cache.py
+"""
+Run-scoped cache for loaded and derived data. While active (the scheduler
+activates the RenderContext's RunCache around each module run),
+``fetch_latest_table_data`` and ``load_report_params`` read through it, and
+modules add derived entries with ``frame`` / ``value``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from ingestion import profiler
+
+logger = logging.getLogger(__name__)
+
+_ACTIVE = threading.local()
+_LOADS = ("raw", "typed", "upload_id")   # filled by fetch_latest_table_data, already timed there
+
+
+def _cow_enabled() -> bool:
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return getattr(pd.options.mode, "copy_on_write", False) is True
+
+
+def _read_only(value: Any) -> Any:
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=not _cow_enabled())
+    if isinstance(value, pd.Series):
+        return value.copy(deep=not _cow_enabled())
+    if isinstance(value, dict):
+        return MappingProxyType(value)
+    return value
+
+
+def _cutoff_key(cutoff) -> Optional[str]:
+    return None if cutoff is None else pd.Timestamp(cutoff).isoformat()
+
+
+class RunCache:
+    """
+    Data shared by the modules of one report run (of one worker process in a
+    parallel run), keyed by (alias, cutoff, transform). Callers get read-only
+    views: copy-on-write or deep copies of frames, mapping proxies of dicts.
+    """
+
+    def __init__(self):
+        self._store: Dict[Tuple, Any] = {}
+        self._lock = threading.RLock()
+        self.db_file: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    # ── core ────────────────────────────────────────────────
+    def _get_or_build(self, key: Tuple, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._store:
+                self.hits += 1
+                return self._store[key]
+            self.misses += 1
+            if key[3] in _LOADS:
+                value = build()
+            else:       # a derived entry: timed as a transformation
+                with profiler.span(f"{key[1]}:{key[3]}", "transform"):
+                    value = build()
+            self._store[key] = value
+            logger.debug(f"RunCache: stored {key}")
+            return value
+
+    def frame(self, alias: str, cutoff, transform: str = "raw",
+              build: Optional[Callable[[], pd.DataFrame]] = None) -> pd.DataFrame:
+        """Read-only view of the (alias, cutoff, transform) frame, built on first use."""
+        key = ("frame", alias, _cutoff_key(cutoff), transform)
+        if build is None:
+            raise KeyError(f"No cached frame for {key[1:]} and no builder given")
+        return _read_only(self._get_or_build(key, build))
+
+    def value(self, alias: str, cutoff, transform: str, build: Callable[[], Any]) -> Any:
+        """Read-only view of any derived value (maps, scalars …) for (alias, cutoff, transform)."""
+        return _read_only(self._get_or_build(("value", alias, _cutoff_key(cutoff), transform), build))
+
+    def invalidate(self, alias: Optional[Hashable] = None) -> None:
+        """Drop every entry of ``alias`` (all entries when None)."""
+        with self._lock:
+            if alias is None:
+                self._store.clear()
+            else:
+                for key in [k for k in self._store if k[1] == alias]:
+                    del self._store[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._store), "hits": self.hits, "misses": self.misses}
+
+    # ── activation ─────────────────────────────────────────
+    @contextmanager
+    def activate(self, db_path):
+        """Make this cache the current one for ``db_path`` in this thread."""
+        self.db_file = str(Path(db_path).resolve())
+        previous = getattr(_ACTIVE, "cache", None)
+        _ACTIVE.cache = self
+        try:
+            yield self
+        finally:
+            _ACTIVE.cache = previous
+            logger.debug(f"RunCache stats: {self.stats()}")
+
+
+def current_run_cache(db_path) -> Optional[RunCache]:
+    """The active cache if it belongs to ``db_path``, else None."""
+    cache = getattr(_ACTIVE, "cache", None)
+    if cache is None or not db_path:
+        return None
+    return cache if cache.db_file == str(Path(db_path).resolve()) else None
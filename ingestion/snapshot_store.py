@@ -0,0 +1,343 @@
+# ingestion/snapshot_store.py
+"""
+Snapshot storage for uploaded tables. Every upload appends its rows, tagged
+with ``upload_id``, to the alias table; readers get the upload closest to
+the cutoff (from a Parquet copy next to the database when pyarrow is
+available), and snapshots older than the retention window are purged.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sqlite3
+import json
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIRNAME = "snapshots"
+DEFAULT_RETENTION_DAYS = int(os.environ.get("SNAPSHOT_RETENTION_DAYS", 730))
+KEEP_LATEST = 2          # never purge the newest uploads of an alias, whatever their age
+APPEND_CHUNKSIZE = 10_000
+USE_PARQUET = os.environ.get("SNAPSHOT_PARQUET", "1") != "0"
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_indexed: set = set()   # (database file, alias) pairs already checked in this process
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _db_file(conn: sqlite3.Connection) -> str:
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+# ──────────────────────────────────────────────────────────────
+# INDEXES
+# ──────────────────────────────────────────────────────────────
+def ensure_snapshot_index(conn: sqlite3.Connection, table_alias: str, force: bool = False) -> bool:
+    """
+    Index ``upload_id`` on an alias table. ``to_sql(if_exists="replace")``
+    drops indexes with the table, so upload paths call this with ``force``.
+    Returns False when the table does not exist or has no upload_id column.
+    """
+    key = (_db_file(conn), table_alias)
+    if key in _indexed and not force:
+        return True
+
+    cols = [r[1] for r in conn.execute(f"PRAGMA table_info({_quote(table_alias)})")]
+    if "upload_id" not in cols:
+        return False
+
+    index_name = f"idx_{table_alias}_upload_id" if _IDENTIFIER_RE.match(table_alias) else None
+    if index_name:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(index_name)} ON {_quote(table_alias)} (upload_id)")
+        conn.commit()
+    _indexed.add(key)
+    return True
+
+
+def _ensure_schema_table(conn: sqlite3.Connection) -> None:
+    # Column list of every upload: alias tables grow to the union of all
+    # versions' columns, readers only get back the ones their upload had.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS snapshot_columns (
+            upload_id   INTEGER PRIMARY KEY,
+            table_alias TEXT,
+            columns     TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshot_columns_alias ON snapshot_columns (table_alias)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS snapshot_schema (
+            upload_id   INTEGER,
+            table_alias TEXT,
+            column_name TEXT,
+            sql_type    TEXT,
+            PRIMARY KEY (upload_id, column_name)
+        )
+    """)
+
+
+def dtype_sql_type(dtype) -> str:
+    """SQLite column type ``to_sql`` would declare for a pandas dtype."""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+def record_snapshot(conn: sqlite3.Connection, table_alias: str, upload_id: int,
+                    columns: List[str], types: Optional[Dict[str, str]] = None) -> None:
+    """Store the column list (and column types) of one upload. Does not commit."""
+    _ensure_schema_table(conn)
+    conn.execute(
+        "INSERT OR REPLACE INTO snapshot_columns (upload_id, table_alias, columns) VALUES (?, ?, ?)",
+        (upload_id, table_alias, json.dumps([str(c) for c in columns])),
+    )
+    if types:
+        conn.execute("DELETE FROM snapshot_schema WHERE upload_id = ?", (upload_id,))
+        conn.executemany(
+            "INSERT INTO snapshot_schema (upload_id, table_alias, column_name, sql_type) VALUES (?, ?, ?, ?)",
+            [(upload_id, table_alias, str(c), t) for c, t in types.items()],
+        )
+
+
+# ──────────────────────────────────────────────────────────────
+# WRITE
+# ──────────────────────────────────────────────────────────────
+def append_snapshot(conn: sqlite3.Connection, table_alias: str, df: pd.DataFrame, upload_id: int,
+                    retention_days: Optional[int] = None) -> int:
+    """
+    Append one upload (``df`` already carries ``upload_id``) to its alias table,
+    widening the table for new columns, then purge versions past retention.
+    Returns the number of rows written.
+    """
+    if "upload_id" not in df.columns:
+        df = df.assign(upload_id=upload_id)
+
+    existing = [r[1] for r in conn.execute(f"PRAGMA table_info({_quote(table_alias)})")]
+    if existing:
+        known = {c.lower() for c in existing}
+        for col in df.columns:
+            if str(col).lower() not in known:
+                conn.execute(f"ALTER TABLE {_quote(table_alias)} ADD COLUMN {_quote(str(col))}")
+                known.add(str(col).lower())
+
+    df.to_sql(table_alias, conn, if_exists="append", index=False, chunksize=APPEND_CHUNKSIZE)
+
+    record_snapshot(conn, table_alias, upload_id, list(df.columns),
+                    {str(c): dtype_sql_type(t) for c, t in df.dtypes.items()})
+    ensure_snapshot_index(conn, table_alias, force=True)
+    purge_expired_snapshots(conn, table_alias, retention_days)
+    conn.commit()
+    logger.info(f"Appended {len(df)} rows to {table_alias} (upload_id {upload_id})")
+    return len(df)
+
+
+def purge_expired_snapshots(conn: sqlite3.Connection, table_alias: str,
+                            retention_days: Optional[int] = None) -> List[int]:
+    """
+    Delete alias rows of uploads older than the retention window (newest
+    ``KEEP_LATEST`` always kept). Only snapshots still recorded in
+    ``snapshot_columns`` are candidates – a purge removes that row – so the
+    cost follows the live snapshots, not the whole upload history.
+    """
+    retention_days = DEFAULT_RETENTION_DAYS if retention_days is None else int(retention_days)
+    horizon = (datetime.now() - timedelta(days=retention_days)).isoformat()
+
+    _ensure_schema_table(conn)
+    expired = [r[0] for r in conn.execute(
+        """
+        SELECT u.id
+        FROM snapshot_columns s
+        JOIN upload_log u ON u.id = s.upload_id
+        WHERE s.table_alias = ? AND u.uploaded_at < ?
+          AND u.id NOT IN (
+              SELECT id FROM upload_log WHERE table_alias = ?
+              ORDER BY uploaded_at DESC LIMIT ?
+          )
+        """,
+        (table_alias, horizon, table_alias, KEEP_LATEST),
+    )]
+    if not expired:
+        return []
+
+    for upload_id in expired:
+        drop_snapshot_files(conn, table_alias, upload_id)
+        conn.execute(f"DELETE FROM {_quote(table_alias)} WHERE upload_id = ?", (upload_id,))
+        conn.execute("DELETE FROM snapshot_columns WHERE upload_id = ?", (upload_id,))
+        conn.execute("DELETE FROM snapshot_schema WHERE upload_id = ?", (upload_id,))
+    logger.info(f"Purged {len(expired)} expired snapshot(s) of {table_alias}")
+    return expired
+
+
+def list_snapshots(conn: sqlite3.Connection, table_alias: str) -> pd.DataFrame:
+    """Uploads of an alias that still have rows, newest first."""
+    if not ensure_snapshot_index(conn, table_alias):
+        return pd.DataFrame(columns=["upload_id", "uploaded_at", "filename", "rows"])
+    return pd.read_sql_query(
+        f"""
+        SELECT u.id AS upload_id, u.uploaded_at, u.filename, u.rows
+        FROM upload_log u
+        WHERE u.table_alias = ?
+          AND EXISTS (SELECT 1 FROM {_quote(table_alias)} t WHERE t.upload_id = u.id)
+        ORDER BY u.uploaded_at DESC
+        """,
+        conn,
+        params=(table_alias,),
+    )
+
+
+# ──────────────────────────────────────────────────────────────
+# RESOLUTION
+# ──────────────────────────────────────────────────────────────
+def resolve_snapshot_upload_id(conn: sqlite3.Connection, table_alias: str, cutoff: pd.Timestamp) -> Optional[int]:
+    """
+    id of the upload closest to ``cutoff`` (before or after) that has rows in
+    the alias table. Two index seeks on upload_log, one EXISTS probe each.
+    """
+    if not ensure_snapshot_index(conn, table_alias):
+        return None
+
+    cutoff_str = cutoff.isoformat()
+    has_rows = f"EXISTS (SELECT 1 FROM {_quote(table_alias)} t WHERE t.upload_id = u.id)"
+    query = f"""
+        SELECT id FROM (
+            SELECT * FROM (
+                SELECT u.id, u.uploaded_at FROM upload_log u
+                WHERE u.table_alias = ? AND u.uploaded_at <= ? AND {has_rows}
+                ORDER BY u.uploaded_at DESC LIMIT 1
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT u.id, u.uploaded_at FROM upload_log u
+                WHERE u.table_alias = ? AND u.uploaded_at > ? AND {has_rows}
+                ORDER BY u.uploaded_at ASC LIMIT 1
+            )
+        )
+        ORDER BY ABS(julianday(uploaded_at) - julianday(?))
+        LIMIT 1
+    """
+    row = conn.execute(query, (table_alias, cutoff_str, table_alias, cutoff_str, cutoff_str)).fetchone()
+    return row[0] if row else None
+
+
+# ──────────────────────────────────────────────────────────────
+# READ
+# ──────────────────────────────────────────────────────────────
+def _parquet_path(conn: sqlite3.Connection, table_alias: str, upload_id: int) -> Optional[Path]:
+    db_file = _db_file(conn)
+    if not db_file:   # in-memory database
+        return None
+    # upload_log ids can be reused after deletes, the upload timestamp makes the name unique
+    row = conn.execute("SELECT uploaded_at FROM upload_log WHERE id = ?", (upload_id,)).fetchone()
+    stamp = re.sub(r"[^0-9]", "", str(row[0])) if row and row[0] else "0"
+    return Path(db_file).parent / SNAPSHOT_DIRNAME / table_alias / f"{upload_id}_{stamp}.parquet"
+
+
+def read_snapshot(conn: sqlite3.Connection, table_alias: str, upload_id: int,
+                  typed: bool = False) -> pd.DataFrame:
+    """
+    Rows of one upload, from the Parquet copy if present, else from SQLite.
+    With ``typed`` the recorded schema is applied (TIMESTAMP → datetime64 …).
+    """
+    df = _read_snapshot(conn, table_alias, upload_id)
+    return apply_snapshot_schema(df, snapshot_schema(conn, upload_id)) if typed else df
+
+
+def _read_snapshot(conn: sqlite3.Connection, table_alias: str, upload_id: int) -> pd.DataFrame:
+    pq_path = _parquet_path(conn, table_alias, upload_id) if USE_PARQUET else None
+
+    if pq_path is not None and pq_path.exists():
+        try:
+            import pyarrow.parquet as pq
+            return pq.read_table(pq_path, memory_map=True).to_pandas()
+        except Exception as e:
+            # drop the unreadable copy so the SQLite read below rebuilds it
+            logger.warning(f"Could not read snapshot {pq_path}, rebuilding from SQLite: {e}")
+            try:
+                pq_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    columns = _snapshot_columns(conn, upload_id)
+    select = ", ".join(f"{_quote(c)} AS {_quote(c)}" for c in columns) if columns else "*"
+    df = pd.read_sql_query(
+        f"SELECT {select} FROM {_quote(table_alias)} WHERE upload_id = ?",
+        conn,
+        params=(upload_id,),
+    )
+
+    if pq_path is not None and not df.empty:
+        _write_parquet(df, pq_path)
+    return df
+
+
+def _snapshot_columns(conn: sqlite3.Connection, upload_id: int) -> Optional[List[str]]:
+    try:
+        row = conn.execute("SELECT columns FROM snapshot_columns WHERE upload_id = ?", (upload_id,)).fetchone()
+    except sqlite3.OperationalError:   # no append-only upload yet
+        return None
+    return json.loads(row[0]) if row else None
+
+
+def snapshot_schema(conn: sqlite3.Connection, upload_id: int) -> Dict[str, str]:
+    """column → SQLite type recorded for one upload (empty for uploads made before types were kept)."""
+    try:
+        rows = conn.execute(
+            "SELECT column_name, sql_type FROM snapshot_schema WHERE upload_id = ?", (upload_id,)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return dict(rows)
+
+
+def apply_snapshot_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """Convert the columns of a snapshot frame to their recorded types."""
+    converted = {}
+    for col, sql_type in schema.items():
+        if col not in df.columns:
+            continue
+        if sql_type == "TIMESTAMP" and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            converted[col] = pd.to_datetime(df[col], errors="coerce", format="ISO8601")
+        elif sql_type in ("INTEGER", "REAL") and not pd.api.types.is_numeric_dtype(df[col]):
+            converted[col] = pd.to_numeric(df[col], errors="coerce")
+    return df.assign(**converted) if converted else df
+
+
+def _write_parquet(df: pd.DataFrame, pq_path: Path) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return
+    # one temp file per writer: parallel workers may cache the same snapshot at once
+    tmp = pq_path.with_name(f"{pq_path.stem}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        pq_path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+        os.replace(tmp, pq_path)
+    except Exception as e:
+        # Mixed-type object columns etc. – SQLite stays the source of truth
+        logger.debug(f"Snapshot {pq_path.name} not kept as Parquet: {e}")
+        try:
+            tmp.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def drop_snapshot_files(conn: sqlite3.Connection, table_alias: str, upload_id: int) -> None:
+    pq_path = _parquet_path(conn, table_alias, upload_id)
+    if pq_path is not None and pq_path.exists():
+        pq_path.unlink()
@@ -0,0 +1,142 @@
+# ingestion/sqlite_pool.py
+"""
+Tuned, reused SQLite connections (WAL, ``synchronous=NORMAL``, larger page
+cache and mmap, statement cache). ``connection(db_path)`` is a ``with``
+block on this thread's pooled connection; ``open_connection(db_path)``
+returns a new tuned connection that the caller closes.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+# e.g. DELETE for a database on a network share, where WAL's shared memory file does not work
+JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL").upper()
+CACHE_MB = int(os.environ.get("SQLITE_CACHE_MB", 64))
+MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", 256))
+BUSY_TIMEOUT_S = float(os.environ.get("SQLITE_BUSY_TIMEOUT_S", 30))
+STATEMENT_CACHE = 256
+
+_LOCAL = threading.local()
+_JOURNAL_SET: set = set()          # databases whose journal mode was set by this process
+_JOURNAL_LOCK = threading.Lock()
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A connection owned by the pool: ``close()`` is a no-op (see
+    ``close_thread_connections``) and ``commit()`` inside a nested block
+    is left to the outermost one.
+    """
+
+    depth = 0   # open ``connection`` blocks on this connection
+
+    def commit(self) -> None:
+        if self.depth <= 1:
+            super().commit()
+
+    def close(self) -> None:
+        pass
+
+    def _close(self) -> None:
+        sqlite3.Connection.close(self)
+
+
+def _key(db_path) -> str:
+    return os.path.abspath(str(db_path))
+
+
+def _tune(conn: sqlite3.Connection, db_path) -> None:
+    key = _key(db_path)
+    if key not in _JOURNAL_SET:
+        with _JOURNAL_LOCK:
+            if key not in _JOURNAL_SET:
+                # persistent on the file: once per database and process is enough
+                mode = conn.execute(f"PRAGMA journal_mode={JOURNAL_MODE}").fetchone()[0]
+                if mode.upper() != JOURNAL_MODE:
+                    logger.warning(f"{db_path}: journal_mode {JOURNAL_MODE} not available, using {mode}")
+                _JOURNAL_SET.add(key)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_MB * 1024}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_MB * 1024 * 1024}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def open_connection(db_path, factory=sqlite3.Connection, **kwargs) -> sqlite3.Connection:
+    """A new tuned connection to ``db_path``; the caller closes it."""
+    kwargs.setdefault("timeout", BUSY_TIMEOUT_S)
+    kwargs.setdefault("cached_statements", STATEMENT_CACHE)
+    conn = sqlite3.connect(db_path, factory=factory, **kwargs)
+    try:
+        _tune(conn, db_path)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+
+def _pool() -> Dict[str, PooledConnection]:
+    pool = getattr(_LOCAL, "pool", None)
+    if pool is None:
+        pool = _LOCAL.pool = {}
+    return pool
+
+
+@contextmanager
+def connection(db_path, row_factory=None) -> Iterator[sqlite3.Connection]:
+    """
+    This thread's connection to ``db_path``. Nested blocks share it and the
+    outermost one commits on exit (a ``commit()`` inside is deferred) or
+    rolls back on an exception; a nested block that raises rolls back to a
+    savepoint taken where it started. ``row_factory`` applies within the block.
+    """
+    pool = _pool()
+    key = _key(db_path)
+    conn = pool.get(key)
+    if conn is None:
+        conn = pool[key] = open_connection(db_path, factory=PooledConnection)
+    outermost = conn.depth == 0
+    # nested inside an open transaction: mark where this block starts; with
+    # no transaction open yet, everything this block writes is its own
+    savepoint = f"pool_block_{conn.depth}" if not outermost and conn.in_transaction else None
+    if savepoint:
+        conn.execute(f"SAVEPOINT {savepoint}")
+    previous_factory = None if outermost else conn.row_factory
+    conn.row_factory = row_factory if row_factory is not None else previous_factory
+    conn.depth += 1
+    try:
+        yield conn
+        if outermost and conn.in_transaction:
+            conn.commit()
+        elif savepoint and conn.in_transaction:
+            conn.execute(f"RELEASE {savepoint}")
+    except BaseException:
+        if savepoint and conn.in_transaction:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+        elif conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.depth -= 1
+        conn.row_factory = previous_factory
+
+
+def close_thread_connections() -> None:
+    """Close this thread's pooled connections (open blocks keep theirs)."""
+    pool = _pool()
+    for key, conn in list(pool.items()):
+        if conn.depth == 0:
+            conn._close()
+            del pool[key]
+
+
+def pooled_connections() -> Dict[str, int]:
+    """Database → open block depth of this thread's pooled connections (diagnostics)."""
+    return {key: conn.depth for key, conn in _pool().items()}
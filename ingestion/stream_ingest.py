@@ -0,0 +1,380 @@
+# ingestion/stream_ingest.py
+"""
+Streaming upload engine: spreadsheets are read row by row (openpyxl
+``read_only`` / csv), the sheet and transform rules applied as rows stream
+in, and rows written to the alias table in batches, with per-column types
+inferred along the way. Values are stored as ``pd.read_excel`` +
+``to_sql`` stored them, so snapshots written either way read back alike.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ingestion.db_utils import bump_generation
+from ingestion.snapshot_store import (
+    _quote,
+    ensure_snapshot_index,
+    purge_expired_snapshots,
+    record_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH_ROWS = int(os.environ.get("STREAM_BATCH_ROWS", 5_000))
+SCHEMA_SAMPLE_ROWS = 1_000    # rows that decide the declared type of a new column
+EXCEL_STREAMABLE = {".xlsx", ".xlsm"}
+
+# pandas' default NA strings, so CSV cells map to NULL exactly as read_csv did
+CSV_NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None",
+    "n/a", "nan", "null",
+}
+
+INTEGER, REAL, TIMESTAMP, TEXT = "INTEGER", "REAL", "TIMESTAMP", "TEXT"
+
+
+@dataclass
+class StreamResult:
+    rows: int
+    columns: List[str]
+    types: Dict[str, str] = field(default_factory=dict)
+
+
+# ──────────────────────────────────────────────────────────────
+# READERS
+# ──────────────────────────────────────────────────────────────
+def _unique_header(raw: Sequence[Any]) -> List[str]:
+    """Header names as pandas builds them: blanks → 'Unnamed: i', repeats → 'name.1' …"""
+    cells = list(raw)
+    while cells and (cells[-1] is None or cells[-1] == ""):
+        cells.pop()
+
+    header, seen = [], {}
+    for i, cell in enumerate(cells):
+        name = f"Unnamed: {i}" if cell is None or cell == "" else str(cell)
+        base, n = name, seen.get(name, 0)
+        while name in seen:
+            n += 1
+            name = f"{base}.{n}"
+        seen[base] = n
+        seen[name] = 0
+        header.append(name)
+    return header
+
+
+def _drop_trailing_blank_rows(rows: Iterable[Tuple]) -> Iterator[Tuple]:
+    """Blank rows are kept between data rows but not at the end, like read_excel."""
+    blanks: List[Tuple] = []
+    for row in rows:
+        if all(v is None or v == "" for v in row):
+            blanks.append(row)
+            continue
+        if blanks:
+            yield from blanks
+            blanks = []
+        yield row
+
+
+def _excel_cell(value: Any) -> Any:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return int(value)
+    if isinstance(value, str) and value == "":
+        return None
+    return value
+
+
+def _csv_kind(value: str) -> Optional[str]:
+    if value in CSV_NA_VALUES:
+        return None
+    try:
+        int(value)
+        return INTEGER
+    except ValueError:
+        pass
+    try:
+        float(value)
+        return REAL
+    except ValueError:
+        return TEXT
+
+
+def _csv_converter(kind: Optional[str]):
+    # one type per column, as read_csv infers it: a column with any text
+    # cell keeps every cell as text ("00123" stays "00123")
+    cast = {INTEGER: int, REAL: float}.get(kind)
+
+    def convert(value: str) -> Any:
+        if value in CSV_NA_VALUES:
+            return None
+        return cast(value) if cast else value
+    return convert
+
+
+def _iter_excel(source, sheet, start_row: int) -> Tuple[List[str], Iterator[Tuple]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(source, read_only=True, data_only=True)
+    ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+    rows = islice(ws.iter_rows(min_row=1, values_only=True), start_row, None)
+    header = _unique_header(next(rows, ()))
+
+    def _rows():
+        try:
+            for row in _drop_trailing_blank_rows(rows):
+                yield tuple(_excel_cell(v) for v in row)
+        finally:
+            wb.close()
+    return header, _rows()
+
+
+def _iter_xls(source, sheet, start_row: int) -> Tuple[List[str], Iterator[Tuple]]:
+    # xlrd has no streaming mode: legacy .xls is read whole, then fed row by row
+    import pandas as pd
+
+    df = pd.read_excel(source, sheet_name=sheet if sheet is not None else 0, skiprows=start_row).astype(object)
+    header = [str(c) for c in df.columns]
+    rows = (tuple(_excel_cell(None if v is pd.NaT else v) for v in row)
+            for row in df.itertuples(index=False, name=None))
+    return header, rows
+
+
+def _csv_rows(source, start_row: int, encoding: str) -> Iterator[List[str]]:
+    """Raw CSV rows from ``start_row`` on (header first); the file is closed when exhausted."""
+    if isinstance(source, (str, os.PathLike)):
+        handle = open(source, newline="", encoding=encoding)
+    else:
+        source.seek(0)
+        handle = io.TextIOWrapper(source, encoding=encoding, newline="")
+    try:
+        yield from islice(csv.reader(handle), start_row, None)
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            handle.close()
+        else:
+            handle.detach()   # leave the caller's buffer open
+
+
+def _iter_csv(source, start_row: int, encoding: str = "utf-8") -> Tuple[List[str], Iterator[Tuple]]:
+    # Two passes over the file: the first infers one type per column
+    # (like read_csv), the second converts with it. Only the column
+    # kinds are held in memory between them.
+    if not isinstance(source, (str, os.PathLike)) and not (hasattr(source, "seekable") and source.seekable()):
+        source = io.BytesIO(source.read())
+
+    scan = _csv_rows(source, start_row, encoding)
+    header = _unique_header(next(scan, ()))
+    kinds: List[Optional[str]] = []
+    for row in scan:
+        if len(row) > len(kinds):
+            kinds.extend([None] * (len(row) - len(kinds)))
+        for i, value in enumerate(row):
+            kinds[i] = merge_kinds(kinds[i], _csv_kind(value))
+    converters = [_csv_converter(k) for k in kinds]
+
+    def _rows():
+        reader = _csv_rows(source, start_row, encoding)
+        next(reader, None)   # header
+        for row in reader:
+            if not row:
+                continue
+            yield tuple(convert(v) for convert, v in zip(converters, row))
+    return header, _rows()
+
+
+def iter_source_rows(source, extension: str, sheet: Optional[str] = None,
+                     start_row: int = 0) -> Tuple[List[str], Iterator[Tuple]]:
+    """``(header, rows)`` of a sheet / CSV, header taken at ``start_row`` (pandas ``skiprows``)."""
+    extension = extension.lower()
+    if extension in EXCEL_STREAMABLE:
+        return _iter_excel(source, sheet, start_row)
+    if extension == ".xls":
+        return _iter_xls(source, sheet, start_row)
+    if extension == ".csv":
+        return _iter_csv(source, start_row)
+    raise ValueError(f"Unsupported file format: {extension}")
+
+
+# ──────────────────────────────────────────────────────────────
+# RULES
+# ──────────────────────────────────────────────────────────────
+def column_plan(header: Sequence[str], rules: Optional[List[Dict]]) -> List[Tuple[int, str]]:
+    """
+    ``(source position, output name)`` of every column to keep.
+    No rules → every column, unchanged. Rules for columns the file
+    does not have are ignored, as in the DataFrame upload path.
+    """
+    if not rules:
+        return list(enumerate(header))
+    position = {name: i for i, name in enumerate(header)}
+    return [
+        (position[r["original_column"]], r.get("renamed_column") or r["original_column"])
+        for r in rules
+        if r.get("included") and r["original_column"] in position
+    ]
+
+
+# ──────────────────────────────────────────────────────────────
+# TYPES
+# ──────────────────────────────────────────────────────────────
+def _kind(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, (bool, int)):
+        return INTEGER
+    if isinstance(value, (float, Decimal)):
+        return REAL
+    if isinstance(value, (datetime, date, time)):
+        return TIMESTAMP
+    return TEXT
+
+
+def merge_kinds(current: Optional[str], new: Optional[str]) -> Optional[str]:
+    if current is None or current == new:
+        return new if current is None else current
+    if new is None:
+        return current
+    if {current, new} == {INTEGER, REAL}:
+        return REAL
+    return TEXT
+
+
+def _db_value(value: Any) -> Any:
+    # same text forms as the sqlite3 / pandas adapters used by to_sql
+    if isinstance(value, datetime):
+        return value.isoformat(" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.strftime("%H:%M:%S.%f")
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+# ──────────────────────────────────────────────────────────────
+# WRITE
+# ──────────────────────────────────────────────────────────────
+def _prepare_table(conn, table_alias: str, types: Dict[str, str]) -> None:
+    """Create the alias table with typed columns, or add the columns it lacks."""
+    existing = [r[1] for r in conn.execute(f"PRAGMA table_info({_quote(table_alias)})")]
+    if not existing:
+        cols = ", ".join(f"{_quote(c)} {t}" for c, t in types.items())
+        conn.execute(f"CREATE TABLE {_quote(table_alias)} ({cols})")
+        return
+    known = {c.lower() for c in existing}
+    for col, sql_type in types.items():
+        if col.lower() not in known:
+            conn.execute(f"ALTER TABLE {_quote(table_alias)} ADD COLUMN {_quote(col)} {sql_type}")
+            known.add(col.lower())
+
+
+def stream_snapshot(
+    conn,
+    table_alias: str,
+    source,
+    extension: str,
+    upload_id: int,
+    sheet: Optional[str] = None,
+    start_row: int = 0,
+    rules: Optional[List[Dict]] = None,
+    extra_columns: Optional[Dict[str, Any]] = None,
+    retention_days: Optional[int] = None,
+    batch_rows: int = STREAM_BATCH_ROWS,
+) -> StreamResult:
+    """
+    Stream one uploaded file into its alias table as snapshot ``upload_id``.
+
+    ``extra_columns`` (e.g. ``uploaded_at``) are constant values added to
+    every row; ``upload_id`` is always added. Rows, column list, inferred
+    types and the upload_log row/column counts are committed together, or
+    not at all (the upload_log entry is then removed). Returns what was written.
+    """
+    try:
+        result = _stream_rows(conn, table_alias, source, extension, upload_id, sheet,
+                              start_row, rules, extra_columns, batch_rows)
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute("DELETE FROM upload_log WHERE id = ?", (upload_id,))
+        bump_generation(conn, "upload_log")
+        conn.commit()
+        raise
+
+    ensure_snapshot_index(conn, table_alias, force=True)
+    purge_expired_snapshots(conn, table_alias, retention_days)
+    conn.commit()
+    logger.info(f"Streamed {result.rows} rows into {table_alias} (upload_id {upload_id})")
+    return result
+
+
+def _stream_rows(conn, table_alias, source, extension, upload_id, sheet,
+                 start_row, rules, extra_columns, batch_rows) -> StreamResult:
+    header, rows = iter_source_rows(source, extension, sheet, start_row)
+    plan = column_plan(header, rules)
+    if not plan:
+        raise ValueError("No columns selected for upload after applying transformation rules.")
+
+    extras = {"upload_id": upload_id, **(extra_columns or {})}
+    names = [name for _, name in plan] + [c for c in extras if c not in {n for _, n in plan}]
+    extra_values = tuple(_db_value(extras[c]) for c in names[len(plan):])
+    positions = [pos for pos, _ in plan]
+
+    kinds: List[Optional[str]] = [None] * len(plan)
+
+    def _project(row: Tuple) -> Tuple:
+        out = []
+        for i, pos in enumerate(positions):
+            value = row[pos] if pos < len(row) else None
+            kinds[i] = merge_kinds(kinds[i], _kind(value))
+            out.append(_db_value(value))
+        return tuple(out) + extra_values
+
+    projected = (_project(row) for row in rows)
+    sample = list(islice(projected, SCHEMA_SAMPLE_ROWS))
+    if not sample:
+        raise ValueError("Upload resulted in empty data after applying start row.")
+
+    declared = {name: kinds[i] or TEXT for i, name in enumerate(names[:len(plan)])}
+    declared.update({c: _kind(extras[c]) or TEXT for c in names[len(plan):]})
+
+    placeholders = ", ".join("?" for _ in names)
+    insert_sql = (f"INSERT INTO {_quote(table_alias)} ({', '.join(_quote(c) for c in names)}) "
+                  f"VALUES ({placeholders})")
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN")
+    _prepare_table(conn, table_alias, declared)
+
+    written = 0
+    stream = chain(sample, projected)
+    while True:
+        batch = list(islice(stream, batch_rows))
+        if not batch:
+            break
+        conn.executemany(insert_sql, batch)
+        written += len(batch)
+        logger.debug(f"{table_alias}: {written} rows streamed")
+
+    types = {name: kinds[i] or TEXT for i, name in enumerate(names[:len(plan)])}
+    types.update({c: declared[c] for c in names[len(plan):]})
+    record_snapshot(conn, table_alias, upload_id, names, types)
+    conn.execute("UPDATE upload_log SET rows = ?, cols = ? WHERE id = ?", (written, len(plan), upload_id))
+    bump_generation(conn, "upload_log")
+    conn.commit()
+    return StreamResult(rows=written, columns=names, types=types)
@@ -0,0 +1,380 @@
+# reporting/jobs.py
+"""
+Background report runs. ``submit_job`` queues a run in ``report_jobs`` and
+starts a worker (``python -m reporting.jobs --db PATH``) that runs the
+queued jobs of a database one at a time, writing every module start and
+result to ``report_job_events``; the UI polls ``job_status``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from datetime import date
+from importlib import import_module
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from ingestion.sqlite_pool import connection
+from reporting.quarterly_report.scheduler import OK_STATUSES, STATUS_CANCELLED
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_INTERRUPTED = "interrupted"
+FINAL_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED, JOB_INTERRUPTED)
+RESUMABLE_STATES = (JOB_FAILED, JOB_CANCELLED, JOB_INTERRUPTED)
+
+EVENT_STARTED = "started"
+EVENT_FINISHED = "finished"
+
+HEARTBEAT_S = float(os.environ.get("REPORT_JOB_HEARTBEAT_S", 5))
+# a running job without a heartbeat for this long (worker killed …) is marked interrupted
+STALE_AFTER_S = float(os.environ.get("REPORT_JOB_STALE_AFTER_S", 60))
+POLL_S = 2.0          # seconds between claim attempts of a waiting worker
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+# ──────────────────────────────────────────────────────────────
+# STORAGE
+# ──────────────────────────────────────────────────────────────
+def _ensure_tables(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS report_jobs (
+            job_id           TEXT PRIMARY KEY,
+            report_name      TEXT,
+            module_path      TEXT,
+            params           TEXT,
+            status           TEXT,
+            modules_total    INTEGER,
+            modules_done     INTEGER DEFAULT 0,
+            current_module   TEXT,
+            run_id           TEXT,
+            error            TEXT,
+            resumed_from     TEXT,
+            cancel_requested INTEGER DEFAULT 0,
+            worker_pid       INTEGER,
+            submitted_at     REAL,
+            started_at       REAL,
+            finished_at      REAL,
+            heartbeat_at     REAL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS report_job_events (
+            job_id      TEXT,
+            module_key  TEXT,
+            module_name TEXT,
+            event       TEXT,
+            status      TEXT,
+            message     TEXT,
+            at          REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_status ON report_jobs (status, submitted_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_report_job_events_job ON report_job_events (job_id)")
+
+
+@contextmanager
+def _connect(db_path) -> Iterator[sqlite3.Connection]:
+    with connection(db_path, row_factory=sqlite3.Row) as conn:
+        _ensure_tables(conn)
+        yield conn
+
+
+def _update(db_path, job_id: str, **fields) -> None:
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    with _connect(db_path) as conn:
+        conn.execute(f"UPDATE report_jobs SET {cols} WHERE job_id = ?", (*fields.values(), job_id))
+
+
+def _add_event(db_path, job_id: str, module_key: Optional[str], module_name: str, event: str,
+               status: Optional[str] = None, message: Optional[str] = None) -> None:
+    with _connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO report_job_events (job_id, module_key, module_name, event, status, message, at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, module_key, module_name, event, status, message, time.time()),
+        )
+        if event == EVENT_STARTED:
+            conn.execute("UPDATE report_jobs SET current_module = ? WHERE job_id = ?", (module_name, job_id))
+        else:
+            conn.execute("UPDATE report_jobs SET modules_done = modules_done + 1 WHERE job_id = ?", (job_id,))
+
+
+def _expire_stale(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "UPDATE report_jobs SET status = ?, finished_at = ?, current_module = NULL, "
+        "error = 'Worker stopped responding' WHERE status = ? AND heartbeat_at < ?",
+        (JOB_INTERRUPTED, time.time(), JOB_RUNNING, time.time() - STALE_AFTER_S),
+    )
+
+
+# ──────────────────────────────────────────────────────────────
+# API (Streamlit side)
+# ──────────────────────────────────────────────────────────────
+def submit_job(db_path, report_name: str, module_path: str, modules: Sequence[str], cutoff_date: date,
+               tolerance: int, incremental: bool = False, profile: Optional[str] = None,
+               max_workers: Optional[int] = None, resumed_from: Optional[str] = None,
+               start_worker: bool = True) -> str:
+    """Queue a run of ``modules`` (registry keys, in run order) and make sure a worker picks it up."""
+    job_id = uuid.uuid4().hex[:12]
+    params = {
+        "modules": list(modules),
+        "cutoff_date": cutoff_date.isoformat(),
+        "tolerance": tolerance,
+        "incremental": bool(incremental),
+        "profile": profile,
+        "max_workers": max_workers,
+    }
+    with _connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO report_jobs (job_id, report_name, module_path, params, status, modules_total, "
+            "resumed_from, submitted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, report_name, module_path, json.dumps(params), JOB_QUEUED, len(params["modules"]),
+             resumed_from, time.time()),
+        )
+    logger.info(f"Job {job_id} queued: {report_name} ({len(params['modules'])} modules)")
+    if start_worker:
+        launch_worker(db_path)
+    return job_id
+
+
+def launch_worker(db_path) -> int:
+    """Start a detached worker process draining the queue of ``db_path``; returns its pid."""
+    db_path = str(Path(db_path).resolve())
+    log_path = Path(db_path).with_suffix(".jobs.log")
+    kwargs: Dict[str, Any] = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True   # survives Streamlit reruns and restarts
+    with open(log_path, "a", encoding="utf-8") as log:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "reporting.jobs", "--db", db_path],
+            cwd=os.getcwd(),
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")]))},
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            **kwargs,
+        )
+    logger.info(f"Job worker started (pid {proc.pid}), log in {log_path}")
+    return proc.pid
+
+
+def request_cancel(db_path, job_id: str) -> Optional[str]:
+    """Cancel ``job_id``: a queued job is cancelled at once, a running one at the next heartbeat."""
+    with _connect(db_path) as conn:
+        conn.execute(
+            "UPDATE report_jobs SET status = ?, finished_at = ? WHERE job_id = ? AND status = ?",
+            (JOB_CANCELLED, time.time(), job_id, JOB_QUEUED),
+        )
+        conn.execute("UPDATE report_jobs SET cancel_requested = 1 WHERE job_id = ? AND status = ?",
+                     (job_id, JOB_RUNNING))
+        row = conn.execute("SELECT status FROM report_jobs WHERE job_id = ?", (job_id,)).fetchone()
+    return row["status"] if row else None
+
+
+def completed_modules(db_path, job_id: str) -> List[str]:
+    """Registry keys of the modules ``job_id`` ran successfully or reused."""
+    with _connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT module_key, status FROM report_job_events WHERE job_id = ? AND event = ?",
+            (job_id, EVENT_FINISHED),
+        ).fetchall()
+    return [r["module_key"] for r in rows if r["status"] in OK_STATUSES]
+
+
+def resume_job(db_path, job_id: str, start_worker: bool = True) -> Optional[str]:
+    """Queue the modules of a failed / cancelled / interrupted job that did not complete; None if none are left."""
+    job = get_job(db_path, job_id)
+    if job is None or job["status"] not in RESUMABLE_STATES:
+        raise ValueError(f"Job {job_id} cannot be resumed (status: {job and job['status']})")
+    done = set(completed_modules(db_path, job_id))
+    params = job["params"]
+    remaining = [m for m in params["modules"] if m not in done]
+    if not remaining:
+        return None
+    return submit_job(
+        db_path, job["report_name"], job["module_path"], remaining,
+        date.fromisoformat(params["cutoff_date"]), params["tolerance"],
+        incremental=params["incremental"], profile=params["profile"], max_workers=params["max_workers"],
+        resumed_from=job_id, start_worker=start_worker,
+    )
+
+
+def get_job(db_path, job_id: str) -> Optional[Dict[str, Any]]:
+    with _connect(db_path) as conn:
+        _expire_stale(conn)
+        row = conn.execute("SELECT * FROM report_jobs WHERE job_id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job["params"] = json.loads(job["params"] or "{}")
+    return job
+
+
+def job_status(db_path, job_id: str) -> Optional[Dict[str, Any]]:
+    """``get_job`` plus ``events`` (oldest first) and ``progress`` (0–1), for the status view."""
+    job = get_job(db_path, job_id)
+    if job is None:
+        return None
+    with _connect(db_path) as conn:
+        job["events"] = [dict(r) for r in conn.execute(
+            "SELECT module_key, module_name, event, status, message, at FROM report_job_events "
+            "WHERE job_id = ? ORDER BY at, rowid", (job_id,)
+        )]
+    job["progress"] = job["modules_done"] / job["modules_total"] if job["modules_total"] else 1.0
+    return job
+
+
+def list_jobs(db_path, report_name: Optional[str] = None, limit: int = 20):
+    """The latest jobs (of ``report_name`` if given) as a DataFrame."""
+    import pandas as pd
+
+    where, params = ("WHERE report_name = ?", (report_name,)) if report_name else ("", ())
+    with _connect(db_path) as conn:
+        _expire_stale(conn)
+        df = pd.read_sql_query(
+            f"SELECT job_id, report_name, status, modules_done, modules_total, current_module, "
+            f"resumed_from, submitted_at, started_at, finished_at, error FROM report_jobs {where} "
+            f"ORDER BY submitted_at DESC LIMIT ?", conn, params=(*params, limit),
+        )
+    return df
+
+
+# ──────────────────────────────────────────────────────────────
+# WORKER
+# ──────────────────────────────────────────────────────────────
+def claim_next(db_path, worker_pid: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Mark the oldest queued job running and return it; None while another job is live or the queue is empty."""
+    with _connect(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        _expire_stale(conn)
+        live = conn.execute("SELECT 1 FROM report_jobs WHERE status = ? LIMIT 1", (JOB_RUNNING,)).fetchone()
+        row = None if live else conn.execute(
+            "SELECT job_id FROM report_jobs WHERE status = ? ORDER BY submitted_at LIMIT 1", (JOB_QUEUED,)
+        ).fetchone()
+        if row is not None:
+            now = time.time()
+            conn.execute(
+                "UPDATE report_jobs SET status = ?, started_at = ?, heartbeat_at = ?, worker_pid = ? "
+                "WHERE job_id = ?",
+                (JOB_RUNNING, now, now, worker_pid or os.getpid(), row["job_id"]),
+            )
+        conn.commit()
+    return get_job(db_path, row["job_id"]) if row is not None else None
+
+
+def _has_queued(db_path) -> bool:
+    with _connect(db_path) as conn:
+        row = conn.execute("SELECT 1 FROM report_jobs WHERE status = ? LIMIT 1", (JOB_QUEUED,)).fetchone()
+    return row is not None
+
+
+def _heartbeat(db_path, job_id: str, cancel: threading.Event, stop: threading.Event) -> None:
+    while not stop.wait(HEARTBEAT_S):
+        try:
+            with _connect(db_path) as conn:
+                conn.execute("UPDATE report_jobs SET heartbeat_at = ? WHERE job_id = ?", (time.time(), job_id))
+                row = conn.execute("SELECT cancel_requested FROM report_jobs WHERE job_id = ?",
+                                   (job_id,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Job {job_id}: heartbeat failed: {e}")
+            continue
+        if row and row["cancel_requested"] and not cancel.is_set():
+            logger.info(f"Job {job_id}: cancel requested")
+            cancel.set()
+
+
+def run_job(db_path, job: Dict[str, Any]) -> str:
+    """Run a claimed job to the end; returns its final status."""
+    job_id, params = job["job_id"], job["params"]
+    cancel, stop = threading.Event(), threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(db_path, job_id, cancel, stop),
+                            name=f"job-{job_id}-heartbeat", daemon=True)
+    beat.start()
+    try:
+        mod = import_module(job["module_path"])
+        registry = getattr(mod, "MODULES", {})
+        modules = {k: registry[k] for k in params["modules"] if k in registry}
+        keys = {cls.__name__: k for k, cls in modules.items()}
+
+        def on_start(name):
+            _add_event(db_path, job_id, keys.get(name), name, EVENT_STARTED)
+
+        def on_result(result):
+            name, state, msg = result
+            _add_event(db_path, job_id, keys.get(name), name, EVENT_FINISHED, state, msg)
+
+        logger.info(f"Job {job_id}: running {', '.join(modules)}")
+        ctx, results = mod.run_report(
+            cutoff_date=date.fromisoformat(params["cutoff_date"]),
+            tolerance=params["tolerance"],
+            db_path=db_path,
+            selected_modules=modules,
+            max_workers=params.get("max_workers"),
+            incremental=params.get("incremental", False),
+            profile=params.get("profile"),
+            on_result=on_result,
+            on_start=on_start,
+            cancel=cancel.is_set,
+        )
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed")
+        status, fields = JOB_FAILED, {"error": f"{e}\n{traceback.format_exc()}"}
+    else:
+        if any(state == STATUS_CANCELLED for _, state, _ in results):
+            status = JOB_CANCELLED
+        elif all(state in OK_STATUSES for _, state, _ in results):
+            status = JOB_SUCCEEDED
+        else:
+            status = JOB_FAILED
+        fields = {"run_id": getattr(ctx, "run_id", None)}
+    finally:
+        stop.set()
+        beat.join()
+    _update(db_path, job_id, status=status, finished_at=time.time(), current_module=None, **fields)
+    logger.info(f"Job {job_id}: {status}")
+    return status
+
+
+def work(db_path, poll_s: float = POLL_S) -> int:
+    """Run queued jobs until the queue is empty; returns the number of jobs run."""
+    ran = 0
+    while True:
+        job = claim_next(db_path)
+        if job is not None:
+            run_job(db_path, job)
+            ran += 1
+        elif _has_queued(db_path):
+            time.sleep(poll_s)   # another worker's job is live
+        else:
+            return ran
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run queued report jobs.")
+    parser.add_argument("--db", required=True, help="path of the reporting database")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(name)s %(levelname)s %(message)s")
+    ran = work(args.db)
+    logger.info(f"Worker done, {ran} job(s) run")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,12 @@
 
 # In reporting/quarterly_report/__init__.py##
-from .runner import run_report
-from .modules_registry import MODULES  # Import MODULES from the new file
\ No newline at end of file
+# run_report and MODULES resolve on first access, so importing a submodule
+# (scheduler, modules_registry, a builder) does not start the runner and Streamlit.
+def __getattr__(name):
+    if name == "run_report":
+        from .runner import run_report
+        return run_report
+    if name == "MODULES":
+        from .modules_registry import MODULES
+        return MODULES
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,185 @@
+# reporting/quarterly_report/fingerprints.py
+"""
+Input fingerprints for incremental report runs: the uploads, parameters,
+code version, cutoff and upstream fingerprints a module's last successful
+run depended on, plus the variables it wrote. A module whose fingerprint
+still matches, with all those variables present, is not run again.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+from datetime import datetime
+from types import ModuleType
+from typing import Dict, Iterable, Optional, Type
+
+import pandas as pd
+
+from ingestion.input_tracker import ALIAS, PARAMS, digest
+from ingestion.sqlite_pool import connection
+from reporting.quarterly_report.utils import BaseModule
+
+logger = logging.getLogger(__name__)
+
+CODE_PACKAGES = ("reporting.", "ingestion.")
+
+
+def _ensure_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS module_fingerprints (
+            report_name  TEXT,
+            module_name  TEXT,
+            fingerprint  TEXT,
+            inputs       TEXT,
+            code_version TEXT,
+            cutoff       TEXT,
+            updated_at   TEXT,
+            outputs      TEXT,
+            PRIMARY KEY (report_name, module_name)
+        )
+    """)
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(module_fingerprints)")}
+    if "outputs" not in cols:   # tables created before outputs were recorded
+        conn.execute("ALTER TABLE module_fingerprints ADD COLUMN outputs TEXT")
+
+
+# ──────────────────────────────────────────────────────────────
+# FINGERPRINT
+# ──────────────────────────────────────────────────────────────
+def module_code_version(mod_cls: Type[BaseModule]) -> str:
+    """
+    ``code_version`` when the module sets one, otherwise a hash of its source
+    file and of the repo modules it imports names from (its builders).
+    """
+    if mod_cls.code_version:
+        return str(mod_cls.code_version)
+
+    module = sys.modules.get(mod_cls.__module__)
+    files = {getattr(module, "__file__", None)}
+    for obj in vars(module).values() if module else ():
+        name = obj.__name__ if isinstance(obj, ModuleType) else getattr(obj, "__module__", None)
+        if isinstance(name, str) and name.startswith(CODE_PACKAGES):
+            files.add(getattr(sys.modules.get(name), "__file__", None))
+
+    h = hashlib.sha256()
+    for path in sorted(f for f in files if f):
+        try:
+            with open(path, "rb") as fh:
+                h.update(fh.read())
+        except OSError:
+            h.update(path.encode())
+    return h.hexdigest()[:16]
+
+
+def _fingerprint(report_name, mod_cls, cutoff, tolerance, inputs: Dict, upstream: Dict) -> str:
+    return digest({
+        "report": report_name,
+        "module": mod_cls.__name__,
+        "code": module_code_version(mod_cls),
+        "cutoff": pd.Timestamp(cutoff).isoformat(),
+        "tolerance": tolerance,
+        "inputs": inputs,
+        "upstream": upstream,
+    })
+
+
+def _upstream_fingerprints(conn, report_name, upstream: Iterable[str]) -> Dict[str, Optional[str]]:
+    names = sorted(set(upstream))
+    stored = dict(conn.execute(
+        f"SELECT module_name, fingerprint FROM module_fingerprints "
+        f"WHERE report_name = ? AND module_name IN ({','.join('?' * len(names))})",
+        (report_name, *names),
+    ).fetchall()) if names else {}
+    return {n: stored.get(n) for n in names}
+
+
+def _current_inputs(conn, db_path, recorded: Dict, cutoff) -> Dict:
+    """Re-resolve the recorded inputs against the database as it is now."""
+    from ingestion.db_utils import _load_report_params
+    from ingestion.snapshot_store import resolve_snapshot_upload_id
+
+    current = {}
+    for key in recorded:
+        kind, name = key.split(":", 1)
+        if kind == ALIAS:
+            current[key] = resolve_snapshot_upload_id(conn, name, pd.Timestamp(cutoff))
+        elif kind == PARAMS:
+            current[key] = digest(_load_report_params(name, db_path))
+        else:
+            current[key] = None   # unknown input kind → never matches
+    return current
+
+
+# ──────────────────────────────────────────────────────────────
+# STORE / CHECK
+# ──────────────────────────────────────────────────────────────
+def save_fingerprint(db_path, report_name, mod_cls, cutoff, tolerance,
+                     inputs: Dict, upstream: Iterable[str] = (), outputs: Iterable[str] = ()) -> str:
+    """
+    Store the fingerprint of a successful module run (``inputs`` from
+    ``track_inputs``, ``outputs`` the report_variables it wrote, plus its
+    declared ``writes_vars``).
+    """
+    outputs = sorted(set(outputs) | set(mod_cls.writes_vars))
+    with connection(db_path) as conn:
+        _ensure_table(conn)
+        fp = _fingerprint(report_name, mod_cls, cutoff, tolerance, inputs,
+                          _upstream_fingerprints(conn, report_name, upstream))
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO module_fingerprints
+                (report_name, module_name, fingerprint, inputs, code_version, cutoff, updated_at, outputs)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (report_name, mod_cls.__name__, fp, json.dumps(inputs, default=str),
+             module_code_version(mod_cls), pd.Timestamp(cutoff).isoformat(), datetime.now().isoformat(),
+             json.dumps(outputs)),
+        )
+    return fp
+
+
+def clear_fingerprint(db_path, report_name, mod_cls) -> None:
+    """Forget a module's fingerprint (before it re-runs, so a failed run is never reused)."""
+    with connection(db_path) as conn:
+        _ensure_table(conn)
+        conn.execute("DELETE FROM module_fingerprints WHERE report_name = ? AND module_name = ?",
+                     (report_name, mod_cls.__name__))
+
+
+def is_unchanged(db_path, report_name, mod_cls, cutoff, tolerance, upstream: Iterable[str] = ()) -> bool:
+    """
+    True when the module's inputs, code and upstream are those of its last
+    successful run and every variable it wrote is still stored (matched by
+    var name, since builders file rows under various module names).
+    """
+    with connection(db_path) as conn:
+        _ensure_table(conn)
+        row = conn.execute(
+            "SELECT fingerprint, inputs, outputs FROM module_fingerprints "
+            "WHERE report_name = ? AND module_name = ?",
+            (report_name, mod_cls.__name__),
+        ).fetchone()
+        if row is None or not row[2]:
+            return False
+        stored_fp, recorded, outputs = row[0], json.loads(row[1]), json.loads(row[2])
+        if not outputs:
+            return False
+
+        present = conn.execute(
+            "SELECT COUNT(*) FROM report_variables "
+            "WHERE report_name = ? AND var_name IN (SELECT value FROM json_each(?))",
+            (report_name, json.dumps(outputs)),
+        ).fetchone()[0]
+        if present < len(outputs):
+            logger.debug(f"{mod_cls.__name__}: {len(outputs) - present} of its outputs are missing")
+            return False
+
+        current = _fingerprint(report_name, mod_cls, cutoff, tolerance,
+                               _current_inputs(conn, db_path, recorded, cutoff),
+                               _upstream_fingerprints(conn, report_name, upstream))
+    if current != stored_fp:
+        logger.debug(f"{mod_cls.__name__}: inputs changed")
+    return current == stored_fp
@@ -18,6 +18,7 @@ AMENDMENTS_ALIAS = "amendments"
 class AmendmentModule(BaseModule):
     name        = "Amendment"          # shows up in UI
     description = "Amendment execution tables & charts"
+    reads_aliases = (AMENDMENTS_ALIAS,)
 
 
     def run(self, ctx: RenderContext) -> RenderContext:
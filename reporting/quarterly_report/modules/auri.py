@@ -17,6 +17,7 @@ AURI_ALIAS = "audit_result_implementation"
 class AuriModule(BaseModule):
     name        = "Auri"          # shows up in UI
     description = "Auri tables"
+    reads_aliases = (AURI_ALIAS, "c0_ro_yearly_overview")
 
 
     def run(self, ctx: RenderContext) -> RenderContext:
@@ -24,6 +24,8 @@ class DebugError(Exception):
 class BudgetModule(BaseModule):
     name = "Budget"
     description = "Budget execution tables & charts"
+    reads_aliases = ("c0_budgetary_execution_details", "c0_commitments_summa")
+    writes_vars = ("table_1a", "table_1b", "table_1c", "table_2a_H2020", "table_2a_HE", "overview_budget_table")
 
     def run(self, ctx: RenderContext, cutoff=None, db_path=None, report_name=None) -> RenderContext:
         logging.debug("Starting BudgetModule.run")
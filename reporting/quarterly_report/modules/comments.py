@@ -4,6 +4,7 @@ from reporting.quarterly_report.utils import RenderContext, BaseModule
 import logging
 import datetime
 import json
+import os
 import sqlite3
 from pathlib import Path
 from typing import Dict, List, Any, Optional
@@ -18,7 +19,8 @@ from reporting.quarterly_report.report_utils.enhanced_report_generator import (
     TemplateSectionMatrix
 )
 from ingestion.db_utils import (
-    fetch_vars_for_report,
+    ReportVariables,
+    report_variables,
     load_report_params,
     insert_variable
 )
@@ -32,6 +34,8 @@ from langgraph.graph import StateGraph
 from langchain_core.tools import tool
 import io
 from reporting.quarterly_report.report_utils.llm_loader import get_fallback_llm
+from reporting.quarterly_report.report_utils import llm_client
+from reporting.quarterly_report.report_utils.generation_cache import GenerationCache
 
 logging.basicConfig(level=logging.DEBUG)
 
@@ -92,11 +96,17 @@ class CommentsConfig:
     API_ENDPOINT = "http://localhost:11434/api/generate"
     API_TIMEOUT = 300
 
+    # ⚡ Concurrency: sections generated at once, and model calls in flight per endpoint
+    SECTION_WORKERS = int(os.environ.get("COMMENTS_SECTION_WORKERS", 4))
+    ENDPOINT_CONCURRENCY = {API_ENDPOINT: int(os.environ.get("LLM_CONCURRENCY", 2))}
+
     # Quality Enhancement Settings
     QUALITY_SETTINGS = {
         'min_response_length': 50,
         'max_retries': 2,
         'retry_temperature_increment': 0.1,
+        'stream_generation': os.environ.get('LLM_STREAM_GENERATION', '1') != '0',
+        'stream_check_chars': 80,   # re-check a streamed response every ~80 new chars
      }
 
     # Section-specific temperature overrides for balancing creativity and factuality
@@ -170,6 +180,7 @@ class CommentsModule(BaseModule):
 
     name="Comments"
     description="AI GENERATED COMMENTS"
+    reads_vars=("*",)  # commentary is built from every other module's output
 
 
     def _extract_and_contextualize_intro_kpis(self, report_vars: Dict[str, Any], quarter_period: str) -> Dict[str, Any]:
@@ -939,7 +950,12 @@ class CommentsModule(BaseModule):
                 model=CommentsConfig.DEFAULT_MODEL
             model_config=CommentsConfig.AVAILABLE_MODELS[model]
             print(f"🤖 Model configured: {model_config['name']} (temp: {temperature})")
-            generator=EnhancedReportGenerator()
+            force_regenerate=bool(report_params.get('ai_force_regenerate', False))
+            generator=EnhancedReportGenerator(
+                generation_cache=GenerationCache.for_database(db_path, force=force_regenerate)
+            )
+            if generator.generation_cache.force:
+                print("🔁 Force regenerate: cached commentary is ignored for this run")
             print("✅ AI components initialized successfully")
 
             # 2. FINANCIAL DATA LOADING AND PRE-PROCESSING
@@ -950,22 +966,22 @@ class CommentsModule(BaseModule):
                 raise ValueError("Missing required report parameters: current_year or quarter_period")
 
             print(f"📅 Report period: {quarter_period} {current_year}")
-            report_vars=fetch_vars_for_report(report, str(db_path))
-            
-            # Create the comprehensive financial data dictionary
-            financial_data = self._map_financial_data(report_vars)
-            
-            # ✅ ARCHITECTURE FIX: Pre-process KPIs here and add them to the dictionary
-            # This ensures the generator receives everything it needs.
-            # intro_summary_kpis = self._generate_structured_intro_summary(report_vars=report_vars, financial_data=financial_data,quarter_period=quarter_period, current_year=current_year)
-            intro_summary_kpis = self._extract_and_contextualize_intro_kpis(report_vars=report_vars,quarter_period=quarter_period)
-            financial_data['intro_summary_kpis'] = intro_summary_kpis
+            # Lazy view: only the variables the mapping / KPI extraction ask for are read and decoded
+            with report_variables(report, str(db_path)) as report_vars:
+                # Create the comprehensive financial data dictionary
+                financial_data = self._map_financial_data(report_vars)
 
+                # ✅ ARCHITECTURE FIX: Pre-process KPIs here and add them to the dictionary
+                # This ensures the generator receives everything it needs.
+                # intro_summary_kpis = self._generate_structured_intro_summary(report_vars=report_vars, financial_data=financial_data,quarter_period=quarter_period, current_year=current_year)
+                intro_summary_kpis = self._extract_and_contextualize_intro_kpis(report_vars=report_vars,quarter_period=quarter_period)
+                financial_data['intro_summary_kpis'] = intro_summary_kpis
 
-            if not financial_data:
-                raise ValueError("No financial data tables available for generation.")
 
-            print(f"✅ Loaded {len(report_vars)} variables and mapped {len(financial_data)} data tables.")
+                if not financial_data:
+                    raise ValueError("No financial data tables available for generation.")
+
+                print(f"✅ Loaded {len(report_vars)} variables and mapped {len(financial_data)} data tables.")
             detected_acronyms=self._detect_acronyms_in_data(financial_data)
             acronym_context=self.create_acronym_context_for_ai(detected_acronyms)
             print(f"📝 Detected {len(detected_acronyms)} acronyms for AI context.")
@@ -982,9 +998,7 @@ class CommentsModule(BaseModule):
         sections_to_generate = CommentsConfig.SINGLE_SECTIONS
         mapping_matrix = TemplateSectionMatrix.get_complete_mapping_matrix()
 
-        for i, section_key in enumerate(sections_to_generate, 1):
-            print(f"\n{'='*60}\n📝 [{i}/{len(sections_to_generate)}] SECTION: {section_key}\n{'='*60}")
-            
+        for section_key in sections_to_generate:
             section_config = mapping_matrix.get(section_key)
             if not section_config:
                raise ValueError(f"Section configuration for '{section_key}' is missing from the mapping matrix.")
@@ -993,19 +1007,35 @@ class CommentsModule(BaseModule):
             if not output_conf or 'variable_name' not in output_conf:
                 raise ValueError(f"Could not find 'variable_name' in output_configuration for section '{section_key}'. Full config: {section_config}")
 
+        for endpoint, limit in CommentsConfig.ENDPOINT_CONCURRENCY.items():
+            llm_client.ENDPOINT_CONCURRENCY.setdefault(endpoint, limit)
+
+        def generate(section_key):
+            print(f"📝 Generating section: {section_key}")
+            # Use the centralized generator, which handles all section types internally
+            return generator.generate_section_commentary(
+                section_key=section_key,
+                quarter_period=quarter_period,
+                current_year=current_year,
+                financial_data=financial_data,
+                model=model,
+                temperature=CommentsConfig.SECTION_TEMPERATURE_OVERRIDES.get(section_key, temperature),
+                acronym_context=acronym_context,
+                cutoff_date=cutoff,
+                verbose=True
+            )
+
+        # Sections are generated concurrently (model calls bounded per endpoint),
+        # then saved here, in section order, on this thread's variable batch
+        outputs = llm_client.run_ordered(generate, sections_to_generate, max_workers=CommentsConfig.SECTION_WORKERS)
+
+        for i, (section_key, commentary_output) in enumerate(zip(sections_to_generate, outputs), 1):
+            print(f"\n{'='*60}\n📝 [{i}/{len(sections_to_generate)}] SECTION: {section_key}\n{'='*60}")
+            section_config = mapping_matrix.get(section_key)
+
             try:
-                # Use the centralized generator, which handles all section types internally
-                commentary_output = generator.generate_section_commentary(
-                    section_key=section_key,
-                    quarter_period=quarter_period,
-                    current_year=current_year,
-                    financial_data=financial_data,
-                    model=model,
-                    temperature=CommentsConfig.SECTION_TEMPERATURE_OVERRIDES.get(section_key, temperature),
-                    acronym_context=acronym_context,
-                    cutoff_date=cutoff,
-                    verbose=True
-                )
+                if isinstance(commentary_output, Exception):
+                    raise commentary_output
 
                 if commentary_output:
                     # Check if the output is for a special "looping" section
@@ -1046,9 +1076,12 @@ class CommentsModule(BaseModule):
                 error_msg = f"An unexpected error occurred while generating section '{section_key}': {str(e)}"
                 module_errors.append(error_msg)
                 print(f"❌ {error_msg}")
-                traceback.print_exc() # Print full traceback for better debugging
+                traceback.print_exception(type(e), e, e.__traceback__) # Print full traceback for better debugging
                 stats['failed'] += 1
 
+        cache_stats = generator.generation_cache.stats
+        print(f"♻️ Generation cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['stored']} stored")
         self._print_completion_summary(stats, module_errors, module_warnings, model_config, temperature)
         return ctx
 
@@ -1107,75 +1140,79 @@ class CommentsModule(BaseModule):
         print("="*60)
 
 
-    def _map_financial_data(self, report_vars: Dict[str, Any]) -> Dict[str, Any]:
+    def _map_financial_data(self, report_vars: ReportVariables) -> Dict[str, Any]:
         """
         ✅ FIXED: Map report variables to a comprehensive financial data structure.
         This mapping is critical and now aligns with the `primary_data` and `secondary_data`
         requirements in the TemplateSectionMatrix.
         """
-        financial_data = {
+        # financial_data key → report variable anchor
+        anchors = {
             # Core budget and commitment tables
-            'summary_budget': report_vars.get('overview_budget_table'),
-            'commitments': report_vars.get('table_1a'),
-            'pay_credits_H2020': report_vars.get('table_2a_H2020'),
-            'pay_credits_HEU': report_vars.get('table_2a_HE'),
+            'summary_budget': 'overview_budget_table',
+            'commitments': 'table_1a',
+            'pay_credits_H2020': 'table_2a_H2020',
+            'pay_credits_HEU': 'table_2a_HE',
 
             # Granting and call completion
-            'grants_signature_activity': report_vars.get('table_3_signatures'),
-            'grants_commitment_activity': report_vars.get('table_3b_commitments'),
-            'completion_previous_year_calls': report_vars.get('table_1c'),
-            'current_year_global_commitment_activity': report_vars.get('table_1c'), # Re-used as per original
-            'TTG': report_vars.get('table_ttg'),
-            'TTS': report_vars.get('table_tts'),
+            'grants_signature_activity': 'table_3_signatures',
+            'grants_commitment_activity': 'table_3b_commitments',
+            'completion_previous_year_calls': 'table_1c',
+            'current_year_global_commitment_activity': 'table_1c', # Re-used as per original
+            'TTG': 'table_ttg',
+            'TTS': 'table_tts',
 
             # FDI (Final Date for Implementation)
-            'grants_exceeding_fdi': report_vars.get('table_3c'),
+            'grants_exceeding_fdi': 'table_3c',
 
             # Time-to-Pay (TTP) - Essential for intro_summary and ttp_performance
-            'TTP_Overview': report_vars.get('TTP_performance_summary_table'),
-            'H2020_TTP_FP': report_vars.get('H2020_FP_ttp_chart'),
-            'H2020_TTP_IP': report_vars.get('H2020_IP_ttp_chart'),
-            'HEU_TTP_FP': report_vars.get('HEU_FP_ttp_chart'),
-            'HEU_TTP_IP': report_vars.get('HEU_IP_ttp_chart'),
-            'HEU_TTP_PF': report_vars.get('HEU_PF_ttp_chart'),
-            'HEU_TTP_EXPERTS': report_vars.get('HEU_EXPERTS_ttp_chart'),
+            'TTP_Overview': 'TTP_performance_summary_table',
+            'H2020_TTP_FP': 'H2020_FP_ttp_chart',
+            'H2020_TTP_IP': 'H2020_IP_ttp_chart',
+            'HEU_TTP_FP': 'HEU_FP_ttp_chart',
+            'HEU_TTP_IP': 'HEU_IP_ttp_chart',
+            'HEU_TTP_PF': 'HEU_PF_ttp_chart',
+            'HEU_TTP_EXPERTS': 'HEU_EXPERTS_ttp_chart',
 
             # Amendments - Essential for intro_summary
-            'amend_kpis': report_vars.get('tbl_tta_summary_metrics'),
-            'amendment_activity_H2020': report_vars.get('H2020_overview'),
-            'amendment_activity_HEU': report_vars.get('HORIZON_overview'),
-            'amendment_TTA_H2020': report_vars.get('H2020_tta'),
-            'amendment_TTA_HEU': report_vars.get('HORIZON_tta'),
-            'amendment_cases_H2020': report_vars.get('H2020_cases'),
-            'amendment_cases_HEU': report_vars.get('HORIZON_cases'),
+            'amend_kpis': 'tbl_tta_summary_metrics',
+            'amendment_activity_H2020': 'H2020_overview',
+            'amendment_activity_HEU': 'HORIZON_overview',
+            'amendment_TTA_H2020': 'H2020_tta',
+            'amendment_TTA_HEU': 'HORIZON_tta',
+            'amendment_cases_H2020': 'H2020_cases',
+            'amendment_cases_HEU': 'HORIZON_cases',
 
             # Audits and Recovery - Essential for intro_summary
-            'auri_overview': report_vars.get('auri_overview'),
-            'recovery_activity': report_vars.get('recovery_activity'),
-            'external_audits_activity': report_vars.get('external_audits'),
+            'auri_overview': 'auri_overview',
+            'recovery_activity': 'recovery_activity',
+            'external_audits_activity': 'external_audits',
 
             # Detailed Payment and Analysis Tables
-            'H2020_All_Payments': report_vars.get('H2020_All_Payments'),
-            'HEU_All_Payments': report_vars.get('HEU_All_Payments'),
-            'H2020_Final_Payments': report_vars.get('H2020_Final_Payments'),
-            'H2020_Interim_Payments':report_vars.get('H2020_Interim_Payments'),
-            'HEU_Pre_Financing': report_vars.get('HEU_Pre_Financing'),
-            'HEU_Interim_Payments':report_vars.get('HEU_Interim_Payments'),
-            'HEU_Final_Payments': report_vars.get('HEU_Final_Payments'),
-            'HEU_Experts and Support': report_vars.get('HEU_Experts and Support'),
-            'H2020_payments_analysis_ALL': report_vars.get('H2020_all_paym_analysis_table'),
-            'HEU_payments_analysis_ALL': report_vars.get('HEU_all_paym_analysis_table'),
-            'H2020_payments_analysis_ADG': report_vars.get('H2020_ADG_paym_analysis_table'),
-            'H2020_payments_analysis_COG': report_vars.get('H2020_COG_paym_analysis_table'),
-            'H2020_payments_analysis_STG': report_vars.get('H2020_STG_paym_analysis_table'),
-            'H2020_payments_analysis_SYG': report_vars.get('H2020_SYG_paym_analysis_table'),
-            'HEU_payments_analysis_ADG': report_vars.get('HEU_ADG_paym_analysis_table'),
-            'HEU_payments_analysis_COG': report_vars.get('HEU_COG_paym_analysis_table'),
-            'HEU_payments_analysis_STG': report_vars.get('HEU_STG_paym_analysis_table'),
-            'HEU_payments_analysis_SYG': report_vars.get('HEU_SYG_paym_analysis_table'),
-            'HEU_payments_analysis_POC': report_vars.get('HEU_POC_paym_analysis_table'),
-            'HEU_payments_analysis_EXPERTS': report_vars.get('HEU_EXPERTS_paym_analysis_table'),
+            'H2020_All_Payments': 'H2020_All_Payments',
+            'HEU_All_Payments': 'HEU_All_Payments',
+            'H2020_Final_Payments': 'H2020_Final_Payments',
+            'H2020_Interim_Payments':'H2020_Interim_Payments',
+            'HEU_Pre_Financing': 'HEU_Pre_Financing',
+            'HEU_Interim_Payments':'HEU_Interim_Payments',
+            'HEU_Final_Payments': 'HEU_Final_Payments',
+            'HEU_Experts and Support': 'HEU_Experts and Support',
+            'H2020_payments_analysis_ALL': 'H2020_all_paym_analysis_table',
+            'HEU_payments_analysis_ALL': 'HEU_all_paym_analysis_table',
+            'H2020_payments_analysis_ADG': 'H2020_ADG_paym_analysis_table',
+            'H2020_payments_analysis_COG': 'H2020_COG_paym_analysis_table',
+            'H2020_payments_analysis_STG': 'H2020_STG_paym_analysis_table',
+            'H2020_payments_analysis_SYG': 'H2020_SYG_paym_analysis_table',
+            'HEU_payments_analysis_ADG': 'HEU_ADG_paym_analysis_table',
+            'HEU_payments_analysis_COG': 'HEU_COG_paym_analysis_table',
+            'HEU_payments_analysis_STG': 'HEU_STG_paym_analysis_table',
+            'HEU_payments_analysis_SYG': 'HEU_SYG_paym_analysis_table',
+            'HEU_payments_analysis_POC': 'HEU_POC_paym_analysis_table',
+            'HEU_payments_analysis_EXPERTS': 'HEU_EXPERTS_paym_analysis_table',
         }
+        # one query for every anchor instead of one per .get()
+        report_vars.prefetch(*anchors.values())
+        financial_data = {key: report_vars.get(anchor) for key, anchor in anchors.items()}
         # Filter out None values to prevent errors downstream
         return {k: v for k, v in financial_data.items() if v is not None}
 
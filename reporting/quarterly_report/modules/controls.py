@@ -185,6 +185,7 @@ def format_due_date_table(df, table_colors=None, program='HEU', call='STG', tabl
 class ControlsModule(BaseModule):
     name        = "Controls"          # shows up in UI
     description = "Reinfoced Monitoring Table"
+    reads_aliases = (R_MONITORING,)
 
     def run(self, ctx: RenderContext) -> RenderContext:
         conn = ctx.db.conn
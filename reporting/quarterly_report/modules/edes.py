@@ -142,6 +142,7 @@ def format_edes_table(df, cutoff, table_colors):
 class EdesModule(BaseModule):
     name        = "Edes"          # shows up in UI
     description = "Edes flags by call type"
+    reads_aliases = (EDES_ALIAS,)
 
     def run(self, ctx: RenderContext) -> RenderContext:
         conn = ctx.db.conn
@@ -66,6 +66,7 @@ class GrantsModule(BaseModule):
 
     name = "Granting"
     description = "Granting statistics / KPI / GAP state"
+    reads_aliases = (CALL_OVERVIEW_ALIAS, BUDGET_FOLLOWUP_ALIAS, PO_SUMMA_ALIAS, ETHICS_ALIAS)
 
     def run(self, ctx: RenderContext) -> RenderContext:
         log = logging.getLogger(self.name)
@@ -77,7 +78,7 @@ class GrantsModule(BaseModule):
         # Load report parameters
         report_params = load_report_params(report_name=report, db_path=db_path)
         table_colors = report_params.get("TABLE_COLORS", {})
-        df_summa = fetch_latest_table_data(conn, PO_SUMMA_ALIAS, cutoff)
+        df_summa = fetch_latest_table_data(conn, PO_SUMMA_ALIAS, cutoff, typed=True)
 
         # Determine scope months dynamically
         scope_months = months_in_scope(cutoff)
@@ -20,6 +20,7 @@ CALLS_ALIAS = 'call_overview'
 class InvoicesModule(BaseModule):
     name = "Invoices"  # shows up in UI
     description = "Invoice Registration Statistics and Analysis"
+    reads_aliases = (INVOICES_ALIAS, CALLS_ALIAS)
 
     def run(self, ctx: RenderContext) -> RenderContext:
         log = logging.getLogger(self.name)
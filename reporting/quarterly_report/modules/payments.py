@@ -13,8 +13,17 @@ from reporting.quarterly_report.report_utils.payments_m_builder import (quarterl
                                                                         generate_ttp_tables,
                                                                         generate_ttp_charts,
                                                                         annex_tables_ttp_eff,
-                                                                        paym_charts_summary_tables
+                                                                        paym_charts_summary_tables,
+                                                                        payment_facts,
                                                                         )
+from reporting.quarterly_report.report_utils.call_types import (
+    CALLS_TYPES_LIST,
+    apply_po_fallback,
+    extract_project_numbers,
+    grant_call_types,
+    po_call_types,
+    resolve_call_types,
+)
 from typing import List, Tuple,Union
 import numpy as np
 import re
@@ -26,7 +35,6 @@ CALLS_ALIAS = 'call_overview'
 PAYMENTS_TIMES_ALIAS = 'payments_summa_time'
 PO_ALIAS = 'c0_po_summa'
 FORECAST_ALIAS = 'forecast'
-CALLS_TYPES_LIST = ['STG', 'ADG', 'POC', 'COG', 'SYG', 'StG', 'CoG', 'AdG', 'SyG', 'PoC', 'CSA']
 
 
 # ──────────────────────────────────────────────────────────────
@@ -86,182 +94,6 @@ def months_in_scope(cutoff: pd.Timestamp) -> list[str]:
 
     return months
 
-def determine_po_category(row):
-
-    instrument = str(row.get('Instrument', '')).strip()
-    topic = str(row.get('Topic', '')).strip()
-
-    try:
-        if topic and any(call_type in topic for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in topic).upper()
-            return category
-        elif instrument and any(call_type in instrument for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in instrument).upper()
-            return category
-        return ''
-    except Exception as e:
-        raise
-
-def determine_po_category_po_list(row):
-
-    summa = str(row.get('PO Purchase Order Item Desc', '')).strip()
-    abac = str(row.get('PO ABAC SAP Reference', '')).strip()
-
-    try:
-        if summa and any(call_type in summa for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in summa).upper()
-            return category
-        elif abac and any(call_type in abac for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in abac).upper()
-            return category
-        return ''
-    except Exception as e:
-        raise
-
-def extract_project_number(row):
-    """
-    Extract project number from 'Inv Text' if 'v_check_payment_type' contains RP patterns,
-    otherwise return original 'v_check_payment_type' value
-    """
-    payment_type = row['v_check_payment_type']
-    inv_text = row['Inv Text']
-    
-    # Handle NaN values
-    if pd.isna(payment_type):
-        return payment_type
-    
-    # Convert to string to handle any data type
-    payment_type_str = str(payment_type)
-    
-    # Check if the payment_type contains RP patterns:
-    # - Original pattern: RP + number + = + FP/IP (e.g., RP4=FP, RP2=IP)
-    # - New pattern: RP + number + - + FP/IP (e.g., RP4-FP, RP2-IP)
-    rp_patterns = [
-        r'RP\d+=(?:FP|IP)',  # Original pattern: RP4=FP, RP2=IP, etc.
-        r'RP\d+-(?:FP|IP)'   # New pattern: RP4-FP, RP2-IP, etc.
-    ]
-    
-    # Check if any of the RP patterns match
-    has_rp_pattern = any(re.search(pattern, payment_type_str) for pattern in rp_patterns)
-    
-    if has_rp_pattern:
-        # Extract the numerical part from Inv Text column
-        if pd.notna(inv_text):
-            inv_text_str = str(inv_text).strip()
-            # Extract leading digits from Inv Text
-            number_match = re.match(r'^(\d+)', inv_text_str)
-            if number_match:
-                return number_match.group(1)
-        
-        # If no number found in Inv Text, return original payment_type
-        return payment_type
-    
-    # Return original v_check_payment_type if no RP pattern found
-    return payment_type
-
-
-def map_project_to_call_type(project_num, mapping_dict):
-    # If it's a numeric string, try to convert and lookup
-    try:
-        # Try to convert to int for lookup
-        numeric_key = int(project_num)
-        if numeric_key in mapping_dict:
-            return mapping_dict[numeric_key]
-    except (ValueError, TypeError):
-        # If conversion fails, it's a non-numeric string like 'EXPERTS'
-        pass
-    
-    # Return original value if no match found
-    return project_num
-
-def map_call_type_with_experts(row, grant_map):
-    """
-    Map call_type based on project_number and Inv Parking Person Id
-    """
-    project_num = row['project_number']
-    contract_type = row['v_payment_type']
-    
-    # First, try to map using grant_map (convert project_num to int if possible)
-    try:
-        numeric_key = int(project_num)
-        if numeric_key in grant_map:
-            return grant_map[numeric_key]
-    except (ValueError, TypeError):
-        pass
-    
-    # If project_number is 'EXPERTS', keep it as 'EXPERTS'
-    if str(project_num).upper() == 'EXPERTS' or str(contract_type).upper() == 'EXPERTS':
-        return 'EXPERTS'
-    
-    # Return original project_number if no conditions are met
-    return project_num
-
-# def map_payment_type(row):
-#     if row['v_payment_type'] == 'Other' and row['Pay Workflow Last AOS Person Id'] == 'WALASOU':
-#         return 'EXPERTS'
-#     return row['v_payment_type']
-
-def map_payment_type(row):
-    if row['v_payment_type'] == 'Other':
-        return 'EXPERTS'
-    return row['v_payment_type']
-
-# Instead, handle conversion in the mapping function
-def safe_map_project_to_call_type(project_num, mapping_dict):
-    """
-    Maps project number to call type, handles all data type issues internally
-    """
-    try:
-        # Handle NaN values
-        if pd.isna(project_num):
-            return None
-            
-        # Convert whatever format to integer for lookup
-        if isinstance(project_num, str):
-            # Handle strings like '4500053782.0'
-            if project_num.endswith('.0'):
-                numeric_key = int(project_num[:-2])
-            else:
-                numeric_key = int(float(project_num))
-        else:
-            # Handle numeric values (float/int)
-            numeric_key = int(float(project_num))
-            
-        # Lookup in mapping dictionary
-        if numeric_key in mapping_dict:
-            result = mapping_dict[numeric_key]
-            if pd.notna(result) and result != '':
-                return result
-                
-    except (ValueError, TypeError, OverflowError):
-        # Any conversion error, return None
-        pass
-    
-    return None
-
-
-# Option 1: Pass po_map as parameter (RECOMMENDED)
-def apply_conditional_mapping(row, po_mapping_dict):
-    """
-    Fixed version that receives po_mapping as parameter instead of using global
-    """
-    current_call_type = row['call_type']
-    po_key = row['PO Purchase Order Key']
-    
-    should_map = (
-        pd.isna(current_call_type) or 
-        current_call_type == '' or 
-        current_call_type not in CALLS_TYPES_LIST or 
-        current_call_type in ['EXPERTS', 'CSA']
-    )
-    
-    if should_map:
-        mapped_value = safe_map_project_to_call_type(po_key, po_mapping_dict)
-        return mapped_value if mapped_value is not None else current_call_type
-    else:
-        return current_call_type
-
-
 
 # ──────────────────────────────────────────────────────────────
 # MAIN CLASS
@@ -270,6 +102,8 @@ def apply_conditional_mapping(row, po_mapping_dict):
 class PaymentsModule(BaseModule):
     name = "Payments"           # shows up in UI
     description = "Payments Statistics, Tables and Charts"
+    reads_aliases = (PAYMENTS_ALIAS, PAYMENTS_TIMES_ALIAS, CALLS_ALIAS, PO_ALIAS, FORECAST_ALIAS)
+    reads_vars = ("table_2a_HE", "table_2a_H2020")  # written by BudgetModule
 
     def run(self, ctx: RenderContext) -> RenderContext:
         log = logging.getLogger(self.name)
@@ -296,11 +130,10 @@ class PaymentsModule(BaseModule):
             
             print("📂 Loading data...")
             
-            df_paym = fetch_latest_table_data(conn, PAYMENTS_ALIAS, cutoff)
-            df_paym_times = fetch_latest_table_data(conn, PAYMENTS_TIMES_ALIAS, cutoff)
-            df_calls = fetch_latest_table_data(conn, CALLS_ALIAS, cutoff)
-            df_po = fetch_latest_table_data(conn, PO_ALIAS, cutoff)
-            df_forecast = fetch_latest_table_data(conn, FORECAST_ALIAS, cutoff)
+            # typed: dates and numbers come back parsed from the upload's recorded schema
+            df_paym = fetch_latest_table_data(conn, PAYMENTS_ALIAS, cutoff, typed=True)
+            df_paym_times = fetch_latest_table_data(conn, PAYMENTS_TIMES_ALIAS, cutoff, typed=True)
+            df_forecast = fetch_latest_table_data(conn, FORECAST_ALIAS, cutoff, typed=True)
             
             if df_paym is None or df_paym.empty:
                 error_msg = "Critical error: df_paym is empty or None"
@@ -324,7 +157,7 @@ class PaymentsModule(BaseModule):
             print("🔄 Starting data transformation...")
 
             # Apply payment type mapping
-            df_paym['v_payment_type'] = df_paym.apply(map_payment_type, axis=1)
+            df_paym['v_payment_type'] = df_paym['v_payment_type'].mask(df_paym['v_payment_type'] == 'Other', 'EXPERTS')
 
             # Now it's safe to drop rows still marked as 'Other' (should be 0)
             df_paym = df_paym[df_paym['v_payment_type'] != 'Other']
@@ -337,7 +170,7 @@ class PaymentsModule(BaseModule):
            
             df_paym = df_paym[df_paym['Pay Payment Key'].notnull()]
 
-            df_paym['project_number'] = df_paym.apply(extract_project_number, axis=1)
+            df_paym['project_number'] = extract_project_numbers(df_paym)
 
             # ──────────────────────────────────────────────────────────────
             # NORMALIZE GF Pay Payment Keys USING PF REFERENCE
@@ -362,12 +195,14 @@ class PaymentsModule(BaseModule):
             pf_key_map = pf_reference_map.set_index('v_payment_reference_key')['Pay Payment Key'].to_dict()
 
             # 2. Replace GF Pay Payment Key if there's a matching PF
-            def replace_gf_key(row):
-                if row['v_payment_type'] == 'GF':
-                    ref_key = row['v_payment_reference_key']
-                    if pd.notna(ref_key) and ref_key in pf_key_map:
-                        return pf_key_map[ref_key]  # Replace with PF's key
-                return row['Pay Payment Key']  # Keep original
+            def replace_gf_key(df):
+                ref_key = df['v_payment_reference_key']
+                is_match = (
+                    (df['v_payment_type'] == 'GF')
+                    & ref_key.notna()
+                    & ref_key.isin(list(pf_key_map))
+                )
+                return df['Pay Payment Key'].mask(is_match, ref_key.map(pf_key_map))  # Replace with PF's key
             
             # ──────────────────────────────────────────────────────────────
             # FINAL TRANSFORMATION: Change GF to PF
@@ -384,32 +219,26 @@ class PaymentsModule(BaseModule):
             print("✅ Converted all 'GF' payment types to 'PF'.")
 
             # 3. Apply the replacement
-            df_paym['Pay Payment Key'] = df_paym.apply(replace_gf_key, axis=1)
+            # NOTE: runs after the GF → PF conversion above, so like the former
+            # row-wise version it currently matches no rows (see is_legacy_gf).
+            df_paym['Pay Payment Key'] = replace_gf_key(df_paym)
 
-            # Create call type mappings
-            df_calls['CALL_TYPE'] = df_calls.apply(determine_po_category, axis=1)
-            grant_map = df_calls.set_index('Grant Number')['CALL_TYPE'].to_dict()
-
-            # PO ORDERS MAP
-            df_po['CALL_TYPE'] = df_po.apply(determine_po_category_po_list, axis=1)
-            po_map = df_po[
-                df_po['CALL_TYPE'].notna() & (df_po['CALL_TYPE'].str.strip() != '')
-            ].set_index('PO Purchase Order Key')['CALL_TYPE'].to_dict()
+            # Call type lookups (built once per snapshot, memoised by upload_id)
+            grant_map = grant_call_types(conn, cutoff, CALLS_ALIAS)
+            po_map = po_call_types(conn, cutoff, PO_ALIAS)
 
             # Apply the mapping from grant number and project number
-            df_paym['call_type'] = df_paym['project_number'].apply(
-                lambda x: map_project_to_call_type(x, grant_map)
-            )
-            df_paym['call_type'] = df_paym.apply(
-                lambda row: map_call_type_with_experts(row, grant_map), axis=1
+            df_paym['call_type'] = resolve_call_types(
+                df_paym['project_number'], grant_map,
+                experts=df_paym['v_payment_type'].astype(str).str.upper().eq('EXPERTS'),
             )
 
             # Clean and normalize call_type
             df_paym['call_type'] = df_paym['call_type'].astype(str).str.strip().replace(['nan', ''], np.nan)
 
             # Apply conditional PO mapping fallback
-            df_paym['call_type'] = df_paym.apply(
-                lambda row: apply_conditional_mapping(row, po_map), axis=1
+            df_paym['call_type'] = apply_po_fallback(
+                df_paym['call_type'], df_paym['PO Purchase Order Key'], po_map
             )
 
             # ✅ Ensure call_type is EXPERTS where v_payment_type is EXPERTS
@@ -426,11 +255,13 @@ class PaymentsModule(BaseModule):
                 df_paym['PO Purchase Order Key'], errors='coerce'
             ).astype('Int64')
 
-            df_paym['Pay Document Date (dd/mm/yyyy)'] = pd.to_datetime(
-                df_paym['Pay Document Date (dd/mm/yyyy)'],
-                format='%Y-%m-%d %H:%M:%S',
-                errors='coerce'
-            )
+            # already datetime64 when typed; uploads without a recorded schema are parsed here
+            if not pd.api.types.is_datetime64_any_dtype(df_paym['Pay Document Date (dd/mm/yyyy)']):
+                df_paym['Pay Document Date (dd/mm/yyyy)'] = pd.to_datetime(
+                    df_paym['Pay Document Date (dd/mm/yyyy)'],
+                    format='%Y-%m-%d %H:%M:%S',
+                    errors='coerce'
+                )
 
             # Filter by date scope
             quarter_dates = get_scope_start_end(cutoff=cutoff)
@@ -557,6 +388,16 @@ class PaymentsModule(BaseModule):
             module_errors.append(error_msg)
             print(f"❌ {error_msg}")
 
+        # In-scope, deduplicated and typed payments, shared (read-only) by every
+        # builder below instead of each re-filtering df_paym per table
+        facts = None
+        try:
+            facts = payment_facts(df_paym, cutoff)
+            print(f"✅ Payments fact table: {facts}")
+        except Exception as e:
+            module_warnings.append(f"Payments fact table not built, builders prepare their own data: {e}")
+            print(f"⚠️ Payments fact table not built: {e}")
+
         # ══════════════════════════════════════════════════════════════════
         # 4. QUARTERLY TABLES GENERATION
         # ══════════════════════════════════════════════════════════════════
@@ -566,6 +407,7 @@ class PaymentsModule(BaseModule):
         try:
             success, message, results = quarterly_tables_generation_main(
                 df_paym=df_paym,
+                facts=facts,
                 cutoff=cutoff,
                 report=report,
                 db_path=db_path,
@@ -601,6 +443,7 @@ class PaymentsModule(BaseModule):
         try:
             success, message, results = generate_ttp_summary_overview(
                 df_paym=df_paym,
+                facts=facts,
                 cutoff=cutoff,
                 db_path=db_path,
                 report=report,
@@ -635,6 +478,7 @@ class PaymentsModule(BaseModule):
         try:
             success, message, results = generate_ttp_tables(
                 df_paym=df_paym,
+                facts=facts,
                 cutoff=cutoff,
                 db_path=db_path,
                 report=report,
@@ -684,7 +528,8 @@ class PaymentsModule(BaseModule):
                 report=report,
                 table_colors=table_colors,
                 report_params=report_params,
-                quarterly_tables=quarterly_tables
+                quarterly_tables=quarterly_tables,
+                facts=facts,
             )
             
             # Extract charts regardless of success level
@@ -749,6 +594,7 @@ class PaymentsModule(BaseModule):
         try:
             success, message, results = annex_tables_ttp_eff(
                 df_paym=df_paym,
+                facts=facts,
                 cutoff=cutoff,
                 db_path=db_path,
                 report=report,
@@ -831,7 +677,8 @@ class PaymentsModule(BaseModule):
                 report=report,
                 table_colors=table_colors,
                 report_params=report_params,
-                df_forecast=df_forecast  # Note: parameter order corrected
+                df_forecast=df_forecast,  # Note: parameter order corrected
+                facts=facts,
             )
 
             # Extract results
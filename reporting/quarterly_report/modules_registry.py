@@ -1,25 +1,20 @@
-from reporting.quarterly_report.modules.budget import BudgetModule
-from reporting.quarterly_report.modules.granting import GrantsModule
-from reporting.quarterly_report.modules.recoveries import RevenueModule
-from reporting.quarterly_report.modules.auri import AuriModule
-from reporting.quarterly_report.modules.controls import ControlsModule
-from reporting.quarterly_report.modules.edes import EdesModule
-from reporting.quarterly_report.modules.gf import GFModule
-from reporting.quarterly_report.modules.invoices import InvoicesModule
-from reporting.quarterly_report.modules.comments import CommentsModule
-from reporting.quarterly_report.modules.payments import PaymentsModule
-from reporting.quarterly_report.modules.amendments import AmendmentModule
+# Modules are imported on first use (see LazyModuleRegistry): listing the
+# keys for a picker must not load every builder, great_tables, Selenium and
+# the LangChain stack behind Comments.
+from reporting.quarterly_report.utils import LazyModuleRegistry
 
-MODULES = {
-    "Budget": BudgetModule,
-    "Grants": GrantsModule,
-    "Revenue": RevenueModule,
-    "Auri": AuriModule,
-    "Controls": ControlsModule,
-    "Edes": EdesModule,
-    "GF": GFModule,
-    "Invoices": InvoicesModule,
-    "Comments": CommentsModule,
-    "Payments": PaymentsModule,
-    "Amendments": AmendmentModule
-}
\ No newline at end of file
+_PKG = "reporting.quarterly_report.modules"
+
+MODULES = LazyModuleRegistry({
+    "Budget": f"{_PKG}.budget:BudgetModule",
+    "Grants": f"{_PKG}.granting:GrantsModule",
+    "Revenue": f"{_PKG}.recoveries:RevenueModule",
+    "Auri": f"{_PKG}.auri:AuriModule",
+    "Controls": f"{_PKG}.controls:ControlsModule",
+    "Edes": f"{_PKG}.edes:EdesModule",
+    "GF": f"{_PKG}.gf:GFModule",
+    "Invoices": f"{_PKG}.invoices:InvoicesModule",
+    "Comments": f"{_PKG}.comments:CommentsModule",
+    "Payments": f"{_PKG}.payments:PaymentsModule",
+    "Amendments": f"{_PKG}.amendments:AmendmentModule",
+})
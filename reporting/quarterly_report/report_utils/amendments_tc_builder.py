@@ -12,6 +12,8 @@ from ingestion.db_utils import (
     load_report_params,
 )
 from reporting.quarterly_report.utils import RenderContext
+from reporting.quarterly_report.report_utils.call_types import classify_call_type
+from reporting.quarterly_report.report_utils.rolling import ytd_rolling_mean, group_curve
 from great_tables import GT, loc, style, html
 import altair as alt
 from typing import List, Tuple , Union, Dict, Any
@@ -44,8 +46,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Amendments")
 
-CALLS_TYPES_LIST = ['STG', 'ADG', 'POC', 'COG', 'SYG', 'StG', 'CoG', 'AdG', 'SyG', 'PoC', 'CSA']
-
 
 
 # Helper functions (copied from original script)
@@ -128,21 +128,6 @@ def update_start_date(row, amd_report_date):
         raise
     return row
 
-def determine_po_category(row):
-    instrument = str(row.get('INSTRUMENT', '')).strip()
-    topic = str(row.get('TOPIC', '')).strip()
-    try:
-        if topic and any(call_type in topic for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in topic).upper()
-            return category
-        elif instrument and any(call_type in instrument for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in instrument).upper()
-            return category
-        return ''
-    except Exception as e:
-        raise
-
-
 def chart_machine_tta(df: pd.DataFrame, prog: str, rolling_tta: pd.DataFrame) -> Image:
     logger.info(f"Rendering of {prog} TTA chart started ")
     """
@@ -408,23 +393,31 @@ def generate_amendment_pivot(
     except Exception as e:
         raise e
 
-def rolling_tta(df: pd.DataFrame, programme: str, months_scope: list[int], epoch_year: int) -> pd.DataFrame:
-
+def rolling_tta_all(df: pd.DataFrame, programmes: List[str], months_scope: list[int], epoch_year: int) -> pd.DataFrame:
+    """Year-to-date mean TTA of signed amendments, every programme in one pass (FRAMEWORK, Month, TTA)."""
     try:
         df_filtered = df[
-            (df['FRAMEWORK'] == programme) &
+            (df['FRAMEWORK'].isin(programmes)) &
             (df['EndYear'] == epoch_year) &
             (df['STATUS'] == 'SIGNED_CR') &
             (~df['TTA'].isna())
         ]
-      
-        results = []
-        for month in months_scope:
-            df_subset = df_filtered[df_filtered['EndMonth'] <= month]
-            mean_val = df_subset['TTA'].mean()
-            results.append({'Month': month, 'TTA': mean_val})
-        result_df = pd.DataFrame(results)
-        return result_df
+        return ytd_rolling_mean(
+            df_filtered,
+            group_cols=['FRAMEWORK'],
+            month_col='EndMonth',
+            value_col='TTA',
+            months=months_scope,
+            groups=[(programme,) for programme in programmes],
+        )
+    except Exception as e:
+        raise e
+
+def rolling_tta(df: pd.DataFrame, programme: str, months_scope: list[int], epoch_year: int) -> pd.DataFrame:
+
+    try:
+        rolling = rolling_tta_all(df, [programme], months_scope, epoch_year)
+        return group_curve(rolling, ['FRAMEWORK'], (programme,), 'TTA')
     except Exception as e:
         raise e
 
@@ -545,7 +538,7 @@ def generate_amendments_report(
         SUB_TOTAL_BACKGROUND = table_colors.get("subtotal_background_color", "#E6E6FA")
 
         df_amd = fetch_latest_table_data(conn, alias, cutoff)
-        df_amd['CALL_TYPE'] = df_amd.apply(determine_po_category, axis=1)
+        df_amd['CALL_TYPE'] = classify_call_type(df_amd, 'TOPIC', 'INSTRUMENT')
         df_amd = df_amd[df_amd['AMENDMENT\nTYPE'] == 'CONSORTIUM_REQUESTED'].copy()
         df_amd = df_amd[df_amd['CALL_TYPE'] != 'CSA'].copy()
         df_amd = df_amd.apply(lambda row: update_start_date(row, amd_report_date), axis=1)
@@ -687,7 +680,9 @@ def generate_amendments_report(
             logger.error(f"Failed to save tbl_tta_summary_metrics : {str(e)}")
 
         results = {}
-        for programme in ['H2020', 'HORIZON']:
+        programmes = ['H2020', 'HORIZON']
+        rolling_tta_by_programme = rolling_tta_all(df_amd, programmes, months_scope, epoch_year)
+        for programme in programmes:
             received_statuses = ['SIGNED_CR', 'ASSESSED_CR', 'OPENED_EXT_CR', 'OPENED_INT_CR', 'RECEIVED_CR', 'WITHDRAWN_CR', 'REJECTED_CR']
 
             amd_received = generate_amendment_pivot(df_amd, programme, received_statuses, 'Counter', 'sum', 'Received', months_scope, epoch_year, 'StartMonth', 'StartYear')
@@ -1009,7 +1004,7 @@ def generate_amendments_report(
                 )
                 )
             
-            rolling_tta_df = rolling_tta(df_amd, programme, months_scope, epoch_year)
+            rolling_tta_df = group_curve(rolling_tta_by_programme, ['FRAMEWORK'], (programme,), 'TTA')
     
             # Assuming chart_machine_tta returns an alt.Chart
             tta_chart_img = chart_machine_tta(pivot_tta, programme, rolling_tta_df)
@@ -0,0 +1,216 @@
+# reporting/quarterly_report/report_utils/call_types.py
+"""
+Column-wise call-type resolution shared by the payments, invoices and
+amendments code. The grant and PO lookups are built once per snapshot and
+memoised by upload_id.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ingestion.db_utils import fetch_latest_table_data
+
+logger = logging.getLogger(__name__)
+
+CALLS_ALIAS = 'call_overview'
+PO_ALIAS = 'c0_po_summa'
+CALLS_TYPES_LIST = ['STG', 'ADG', 'POC', 'COG', 'SYG', 'StG', 'CoG', 'AdG', 'SyG', 'PoC', 'CSA']
+EXPERTS_C0_PERSONS = ['KACZMUR', 'WALASOU']
+
+RP_PATTERN = re.compile(r'RP\d+[=-](?:FP|IP)')      # RP4=FP, RP2-IP, ...
+LEADING_DIGITS = re.compile(r'^(\d+)')
+INT_STRING = re.compile(r'^\s*[+-]?\d+\s*$')        # what int(str) accepts
+
+
+# ──────────────────────────────────────────────────────────────
+# CLASSIFICATION
+# ──────────────────────────────────────────────────────────────
+def call_type_from_text(text: pd.Series) -> pd.Series:
+    """First CALLS_TYPES_LIST entry contained in each value (upper-cased), '' if none."""
+    text = text.astype(str).str.strip()
+    conditions = [text.str.contains(ct, regex=False).to_numpy(dtype=bool) for ct in CALLS_TYPES_LIST]
+    choices = [ct.upper() for ct in CALLS_TYPES_LIST]
+    return pd.Series(np.select(conditions, choices, default=''), index=text.index, dtype=object)
+
+
+def classify_call_type(df: pd.DataFrame, primary: str, secondary: str) -> pd.Series:
+    """Call type from ``primary`` (e.g. Topic), else from ``secondary`` (e.g. Instrument)."""
+    empty = pd.Series('', index=df.index, dtype=object)
+    first = call_type_from_text(df[primary]) if primary in df.columns else empty
+    second = call_type_from_text(df[secondary]) if secondary in df.columns else empty
+    return first.where(first != '', second)
+
+
+def extract_project_numbers(df: pd.DataFrame) -> pd.Series:
+    """
+    Leading digits of 'Inv Text' where 'v_check_payment_type' holds an
+    RP…=FP/IP (or RP…-FP/IP) pattern, else 'v_check_payment_type' as is.
+    """
+    payment_type = df['v_check_payment_type']
+    inv_text = df['Inv Text']
+
+    has_rp = payment_type.notna() & payment_type.astype(str).str.contains(RP_PATTERN, na=False)
+    digits = (
+        inv_text.astype(str).str.strip()
+        .str.extract(LEADING_DIGITS, expand=False)
+        .where(inv_text.notna())
+    )
+    return payment_type.where(~(has_rp & digits.notna()), digits)
+
+
+# ──────────────────────────────────────────────────────────────
+# LOOKUP KEYS
+# ──────────────────────────────────────────────────────────────
+def int_lookup_keys(values: pd.Series) -> pd.Series:
+    """``int(x)`` as a dict lookup would use it; NaN wherever int(x) raises."""
+    obj = values.astype(object)
+    is_str = obj.map(type).eq(str)
+    str_vals = obj.where(is_str, '')
+    from_str = pd.to_numeric(str_vals.where(str_vals.str.match(INT_STRING)), errors='coerce')
+    from_num = pd.to_numeric(obj.where(~is_str), errors='coerce').astype(float)
+    keys = from_str.astype(float).where(is_str, np.trunc(from_num))
+    return keys.where(np.isfinite(keys))
+
+
+def safe_int_lookup_keys(values: pd.Series) -> pd.Series:
+    """``int(float(x))`` keys ('4500053782.0' → 4500053782); NaN on failure."""
+    num = pd.to_numeric(values.astype(object), errors='coerce').astype(float)
+    keys = np.trunc(num)
+    return keys.where(np.isfinite(keys))
+
+
+def lookup_table(mapping: dict) -> pd.Series:
+    """A {key: value} map as a Series indexed by the integral numeric keys an int lookup can hit."""
+    keys, vals = [], []
+    for k, v in mapping.items():
+        if isinstance(k, (int, float, np.integer, np.floating)) and np.isfinite(k) and float(k).is_integer():
+            keys.append(float(k))
+            vals.append(v)
+    return pd.Series(vals, index=pd.Index(keys, dtype=float), dtype=object)
+
+
+# ──────────────────────────────────────────────────────────────
+# MEMOISED LOOKUPS
+# ──────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class CallTypeLookup:
+    mapping: Dict           # key → call type, as in the source table (treat as read-only)
+    index: pd.Series        # integral keys → call type, for vectorised lookups
+    upload_id: Optional[int] = None
+
+
+_MEMO: Dict[Tuple, CallTypeLookup] = {}
+_MEMO_LOCK = threading.Lock()
+
+
+def _snapshot_key(conn: sqlite3.Connection, alias: str, cutoff) -> Optional[Tuple]:
+    from ingestion.snapshot_store import resolve_snapshot_upload_id
+    from ingestion.input_tracker import ALIAS, record_input
+
+    upload_id = resolve_snapshot_upload_id(conn, alias, pd.Timestamp(cutoff))
+    record_input(ALIAS, alias, upload_id)
+    if upload_id is None:
+        return None
+    # upload ids can be reused after deletes, the timestamp keeps the key unique
+    row = conn.execute("SELECT uploaded_at FROM upload_log WHERE id = ?", (upload_id,)).fetchone()
+    db_file = conn.execute("PRAGMA database_list").fetchone()[2]
+    return (db_file, alias, upload_id, row[0] if row else None)
+
+
+def _memoised(conn, alias, cutoff, kind, build: Callable[[pd.DataFrame], Dict],
+              df: Optional[pd.DataFrame]) -> CallTypeLookup:
+    key = _snapshot_key(conn, alias, cutoff)
+    memo_key = key + (kind,) if key else None
+    if memo_key is not None:
+        with _MEMO_LOCK:
+            hit = _MEMO.get(memo_key)
+        if hit is not None:
+            return hit
+
+    source = df if df is not None else fetch_latest_table_data(conn, alias, pd.Timestamp(cutoff))
+    mapping = build(source) if source is not None and not source.empty else {}
+    lookup = CallTypeLookup(mapping, lookup_table(mapping), key[2] if key else None)
+    if memo_key is not None:
+        with _MEMO_LOCK:
+            _MEMO[memo_key] = lookup
+        logger.debug(f"Built {kind} lookup for {alias} (upload_id {key[2]}, {len(mapping)} keys)")
+    return lookup
+
+
+def _grant_map(df_calls: pd.DataFrame) -> Dict:
+    call_type = classify_call_type(df_calls, 'Topic', 'Instrument')
+    return pd.Series(call_type.to_numpy(), index=df_calls['Grant Number']).to_dict()
+
+
+def _po_map(df_po: pd.DataFrame) -> Dict:
+    call_type = classify_call_type(df_po, 'PO Purchase Order Item Desc', 'PO ABAC SAP Reference')
+    keep = call_type.notna() & (call_type.str.strip() != '')
+    return pd.Series(call_type[keep].to_numpy(), index=df_po.loc[keep, 'PO Purchase Order Key']).to_dict()
+
+
+def grant_call_types(conn: sqlite3.Connection, cutoff, alias: str = CALLS_ALIAS,
+                     df_calls: Optional[pd.DataFrame] = None) -> CallTypeLookup:
+    """Grant Number → call type from the call_overview snapshot for ``cutoff``."""
+    return _memoised(conn, alias, cutoff, "grant", _grant_map, df_calls)
+
+
+def po_call_types(conn: sqlite3.Connection, cutoff, alias: str = PO_ALIAS,
+                  df_po: Optional[pd.DataFrame] = None) -> CallTypeLookup:
+    """PO Purchase Order Key → call type (classified rows only) from the PO snapshot."""
+    return _memoised(conn, alias, cutoff, "po", _po_map, df_po)
+
+
+def clear_call_type_memo() -> None:
+    with _MEMO_LOCK:
+        _MEMO.clear()
+
+
+# ──────────────────────────────────────────────────────────────
+# RESOLUTION
+# ──────────────────────────────────────────────────────────────
+def _index(lookup: Union[CallTypeLookup, dict]) -> pd.Series:
+    return lookup.index if isinstance(lookup, CallTypeLookup) else lookup_table(lookup)
+
+
+def resolve_call_types(project: pd.Series, grant: Union[CallTypeLookup, dict],
+                       experts: Optional[pd.Series] = None,
+                       experts_c0: Optional[pd.Series] = None) -> pd.Series:
+    """
+    Call type of each project number: the grant lookup when ``int(project)``
+    hits it, else 'EXPERTS' for 'EXPERTS' projects or ``experts`` rows, else
+    'EXPERTS_C0' for ``experts_c0`` rows, else the project number itself.
+    """
+    keys = int_lookup_keys(project)
+    grant_index = _index(grant)
+    found = keys.isin(grant_index.index)
+
+    is_experts = project.astype(str).str.upper().eq('EXPERTS')
+    if experts is not None:
+        is_experts |= experts
+
+    call_type = project.astype(object)
+    if experts_c0 is not None:
+        call_type = call_type.where(~experts_c0, 'EXPERTS_C0')
+    call_type = call_type.where(~is_experts, 'EXPERTS')
+    return keys.map(grant_index).where(found, call_type)
+
+
+def apply_po_fallback(call_type: pd.Series, po_keys: pd.Series, po: Union[CallTypeLookup, dict]) -> pd.Series:
+    """PO call type for rows without a standard call type (or EXPERTS / CSA), when the PO has one."""
+    should_map = (
+        call_type.isna()
+        | call_type.eq('')
+        | ~call_type.isin(CALLS_TYPES_LIST)
+        | call_type.isin(['EXPERTS', 'CSA'])
+    )
+    mapped = safe_int_lookup_keys(po_keys).map(_index(po))
+    usable = mapped.notna() & mapped.ne('')
+    return mapped.where(should_map & usable, call_type)
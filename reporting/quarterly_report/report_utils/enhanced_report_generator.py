@@ -88,15 +88,14 @@ from ingestion.db_utils import (
 )
 
 import io
-from langgraph.graph import StateGraph
 try:
     from langchain.tools import tool
 except ImportError:
     from langchain_core.tools import tool  # fallback
 
-from langchain_community.chat_models import ChatOllama
-from langchain_openai import ChatOpenAI
 from reporting.quarterly_report.report_utils.llm_loader import get_fallback_llm
+from reporting.quarterly_report.report_utils.llm_client import get_llm_client, run_ordered
+from reporting.quarterly_report.report_utils.generation_cache import GenerationCache
 
 from pprint import pprint
 
@@ -130,6 +129,9 @@ for standard, variants in CALL_TYPE_NORMALIZATION.items():
     for variant in variants:
         CALL_TYPE_VARIANTS[variant] = standard
 
+# Quality check length for the LangGraph payment summaries (no section config of their own)
+PAYMENT_SUMMARY_WORD_LIMIT = 400
+
 # 🛠️ CUSTOMIZATION POINT 4: Enhanced Program Configuration
 PROGRAM_MAPPING = {
     'HEU': {
@@ -168,13 +170,17 @@ class ReportTemplateLibrary:
     """Centralized template library with clear template identification"""
 
     @staticmethod
-    def get_template_definitions(quarter_period: str, current_year: str) -> Dict[str, str]:
+    def get_template_definitions(quarter_period: str, current_year: str, analysis_date: Any = None) -> Dict[str, str]:
         """
         Central repository of all report templates with clear naming
         Template Name Format: {section_type}_{focus}_template
+
+        ``analysis_date`` (the report cutoff) fills "Analysis Date": a date that
+        changes every day would make every prompt – and its generation cache
+        key – new on each re-run.
         """
 
-        current_date = datetime.datetime.now().strftime('%Y-%m-%d')
+        current_date = pd.Timestamp(analysis_date if analysis_date is not None else datetime.date.today()).strftime('%Y-%m-%d')
 
         return {
                             # ============================================================
@@ -1329,9 +1335,10 @@ mapping_matrix: Access to section configurations (the "how to generate")
 class EnhancedReportGenerator:
     """Enhanced report generator using the improved template management system"""
 
-    def __init__(self):
+    def __init__(self, generation_cache: Optional[GenerationCache] = None):
         self.template_library = ReportTemplateLibrary()
         self.mapping_matrix = TemplateSectionMatrix()
+        self.generation_cache = generation_cache  # accepted responses from earlier runs
 
     def generate_section_commentary(self, section_key: str, quarter_period: str, current_year: str, financial_data: Dict[str, Any], model: str, temperature: float, acronym_context: str, cutoff_date: Any, verbose: bool) -> Optional[str]:
         """
@@ -1396,7 +1403,7 @@ class EnhancedReportGenerator:
         CORRECTED: Generate commentary for a single section using conditional logic
         to handle different template structures and avoid errors.
         """
-        templates = self.template_library.get_template_definitions(quarter_period, current_year)
+        templates = self.template_library.get_template_definitions(quarter_period, current_year, cutoff_date)
         template_name = section_config.get('template_mapping', {}).get('template_name')
         template = templates.get(template_name)
         if not template:
@@ -1705,7 +1712,7 @@ class EnhancedReportGenerator:
         if verbose:
             print(f"🔄 Generating {program} payment overviews for {len(call_types)} call types")
 
-        for call_type in call_types:
+        def generate(call_type):
             if verbose:
                 print(f"   📝 Generating {program}-{call_type} overview...")
             try:
@@ -1720,7 +1727,7 @@ class EnhancedReportGenerator:
                 #     acronym_context=acronym_context,
                 #     verbose=False
                 # )
-                commentary = self._generate_structured_payment_summary(
+                return self._generate_structured_payment_summary(
                     program=program,
                     call_type=call_type,
                     quarter_period=quarter_period,
@@ -1729,17 +1736,21 @@ class EnhancedReportGenerator:
                     report_vars=report_vars,
                     verbose=verbose
                 )
-                if commentary:
-                    var_name = f"{section_key}_{call_type.lower()}"
-                    generated_texts[var_name] = commentary
-                    if verbose:
-                        print(f"   ✅ Generated {len(commentary.split())} words for {program}-{call_type}")
-                else:
-                    if verbose:
-                        print(f"   ❌ Failed to generate {program}-{call_type}")
             except Exception as e:
                 if verbose:
                     print(f"   ❌ Error generating {program}-{call_type}: {e}")
+                return None
+
+        # All call types at once (bounded by the endpoint limit); kept in call-type order
+        for call_type, commentary in zip(call_types, run_ordered(generate, call_types, max_workers=len(call_types))):
+            if commentary:
+                var_name = f"{section_key}_{call_type.lower()}"
+                generated_texts[var_name] = commentary
+                if verbose:
+                    print(f"   ✅ Generated {len(commentary.split())} words for {program}-{call_type}")
+            else:
+                if verbose:
+                    print(f"   ❌ Failed to generate {program}-{call_type}")
 
         # Return a summary string that includes all generated texts.
         # This allows the main module to save each piece individually.
@@ -1885,12 +1896,29 @@ class EnhancedReportGenerator:
             Output:
             """
             # llm = ChatOllama(model="qwen2.5:14b")
+            from reporting.quarterly_report.modules.comments import CommentsConfig
             llm = get_fallback_llm()
-            response = llm.invoke(prompt)
+            llm_model = str(getattr(llm, "model", None) or getattr(llm, "model_name", ""))
+            llm_temperature = getattr(llm, "temperature", None) or 0.0
+            cache_section = f"payment_summary_{program}_{call_type}"
+
+            cache = self.generation_cache
+            cached = cache.get(llm_model, llm_temperature, prompt, cache_section) if cache is not None else None
+            if cached:
+                logging.debug(f"[generate_summary] cached response for {program}-{call_type}")
+                return {"text": cached}
+
+            with get_llm_client(CommentsConfig.API_ENDPOINT).slot():
+                response = llm.invoke(prompt)
             logging.debug(f"[generate_summary] LLM response: {response}")
-            return {"text": response.content if hasattr(response, "content") else str(response)}
+            text = response.content if hasattr(response, "content") else str(response)
+            # only accepted answers are cached, as in _generate_with_retry
+            if cache is not None and self._validate_response_quality(text, cache_section, PAYMENT_SUMMARY_WORD_LIMIT):
+                cache.put(llm_model, llm_temperature, prompt, cache_section, text)
+            return {"text": text}
 
         # -- Assemble LangGraph --
+        from langgraph.graph import StateGraph
         g = StateGraph(dict)
         g.add_node("analyze_input", analyze_input)
         g.add_node("choose_sources", choose_sources)
@@ -1945,7 +1973,8 @@ class EnhancedReportGenerator:
             }
         }
 
-        for program in programs:
+        def summarise(program):
+            """(var_name, details) on success, else (None, failure tag)."""
             if verbose:
                 print(f"\n📝 Processing: {program} Program")
 
@@ -1974,38 +2003,39 @@ class EnhancedReportGenerator:
                         )
 
                         if program_commentary:
-                            var_name = f"payment_summary_{program.lower()}"
-                            results['generated_details'][var_name] = {
+                            if verbose:
+                                print(f"✅ Generated {program} summary: {len(program_commentary.split())} words")
+                            return f"payment_summary_{program.lower()}", {
                                 'commentary': program_commentary,
                                 'program': program,
                                 'section_name': f"{program} Payment Summary",
                                 'word_count': len(program_commentary.split()),
                                 'generated_at': datetime.datetime.now()
                             }
-                            results['statistics']['successful'] += 1
-                            results['statistics']['sections_generated'] += 1
+                        return None, f"{program}_generation_failed"
 
-                            if verbose:
-                                print(f"✅ Generated {program} summary: {len(program_commentary.split())} words")
-                        else:
-                            results['failed_generations'].append(f"{program}_generation_failed")
-                            results['statistics']['failed'] += 1
-
-                    else:
-                        if verbose:
-                            print(f"❌ {program} data empty")
-                        results['failed_generations'].append(f"{program}_no_records")
-                        results['statistics']['failed'] += 1
+                    if verbose:
+                        print(f"❌ {program} data empty")
+                    return None, f"{program}_no_records"
 
                 except Exception as e:
                     if verbose:
                         print(f"❌ Error processing {program}: {e}")
-                    results['failed_generations'].append(f"{program}_error")
-                    results['statistics']['failed'] += 1
+                    return None, f"{program}_error"
+
+            if verbose:
+                print(f"❌ {program} data not found")
+            return None, f"{program}_not_found"
+
+        # Programmes are generated concurrently, results recorded in programme order
+        for program, result in zip(programs, run_ordered(summarise, programs, max_workers=len(programs))):
+            var_name, outcome = (None, f"{program}_error") if isinstance(result, Exception) else result
+            if var_name:
+                results['generated_details'][var_name] = outcome
+                results['statistics']['successful'] += 1
+                results['statistics']['sections_generated'] += 1
             else:
-                if verbose:
-                    print(f"❌ {program} data not found")
-                results['failed_generations'].append(f"{program}_not_found")
+                results['failed_generations'].append(outcome)
                 results['statistics']['failed'] += 1
 
         if verbose:
@@ -2401,38 +2431,62 @@ class EnhancedReportGenerator:
         word_limit: int,
         max_retries: int = 2
     ) -> Optional[str]:
-        """Generate with retry logic for better quality"""
+        """
+        Generate with retry logic for better quality.
+        The first attempt runs alone; if it fails the check, the retries (each
+        at its own higher temperature) run in parallel and the lowest-temperature
+        valid answer wins – the same pick as trying them one by one.
+        An accepted answer for the same (model, temperature, prompt, section)
+        is served from the generation cache without calling the model.
+        """
         from reporting.quarterly_report.modules.comments import CommentsConfig
 
-        retry_count = 0
-        current_temperature = temperature
-
-        while retry_count <= max_retries:
-            if retry_count > 0:
-                current_temperature += CommentsConfig.QUALITY_SETTINGS['retry_temperature_increment']
+        cache = self.generation_cache
+        if cache is not None:
+            cached = cache.get(model, temperature, prompt, section_key)
+            if cached:
                 if verbose:
-                    print(f"   🔄 Retry {retry_count} with increased temperature: {current_temperature:.2f}")
+                    print(f"   ♻️ Using cached commentary for '{section_key}' (unchanged prompt).")
+                return cached
 
+        increment = CommentsConfig.QUALITY_SETTINGS['retry_temperature_increment']
+
+        def attempt(retry_count: int) -> Optional[str]:
+            current_temperature = temperature + retry_count * increment
+            if retry_count > 0 and verbose:
+                print(f"   🔄 Retry {retry_count} with increased temperature: {current_temperature:.2f}")
             response = self._generate_with_model(
                 prompt=prompt,
                 model=model,
                 temperature=current_temperature,
                 max_tokens=max_tokens,
-                verbose=verbose
+                verbose=verbose,
+                section_key=section_key,
+                word_limit=word_limit
             )
+            return response if self._validate_response_quality(response, section_key, word_limit) else None
 
-            is_valid = self._validate_response_quality(response, section_key, word_limit)
+        response = attempt(0)
+        if response:
+            if verbose:
+                print("   ✅ Quality check passed on attempt 1.")
+            if cache is not None:
+                cache.put(model, temperature, prompt, section_key, response)
+            return response
+        if verbose:
+            print("   ⚠️ Quality check failed for attempt 1.")
 
-            if is_valid:
+        retries = run_ordered(attempt, range(1, max_retries + 1), max_workers=max_retries)
+        for retry_count, response in enumerate(retries, 1):
+            if response and not isinstance(response, Exception):
                 if verbose:
                     print(f"   ✅ Quality check passed on attempt {retry_count + 1}.")
+                if cache is not None:
+                    cache.put(model, temperature, prompt, section_key, response)
                 return response
             elif verbose:
                 print(f"   ⚠️ Quality check failed for attempt {retry_count + 1}.")
 
-
-            retry_count += 1
-
         if verbose:
             print(f"   ❌ Failed to generate a quality response after {max_retries + 1} attempts.")
         return None
@@ -2481,9 +2535,68 @@ class EnhancedReportGenerator:
         return True
 
 
-    def _generate_with_model(self, prompt: str, model: str, temperature: float, max_tokens: int, verbose: bool) -> Optional[str]:
-        """Generate with executive quality enforcement and reasoning model support"""
+    def _early_abort_reason(self, partial: str, word_limit: int) -> Optional[str]:
+        """
+        Why a partial response can no longer pass ``_validate_response_quality``
+        (None while it still can). Only failures that more text cannot undo:
+        the length limit, and repetition that even all-new sentences filling
+        the remaining length could not dilute below 40%.
+        """
+        char_limit = word_limit * 8
+        if len(partial) <= char_limit * 0.5:     # too early to tell either way
+            return None
+
+        text = self._clean_generated_text(partial)
+        if len(text) > char_limit:
+            return f"length already {len(text)} chars, over the ~{int(char_limit)} chars limit"
+
+        sentences = text.split('.')
+        complete = sentences[:-1]                # the last piece is still being written
+        if len(complete) + 1 > 3:
+            unique = {s.strip().lower() for s in complete if len(s.strip()) > 10}
+            # each further unique sentence needs > 10 chars plus its full stop
+            room = 1 + (char_limit - len(text)) // 12
+            if len(unique) + room < (len(complete) + room) * 0.6:
+                return "repetitive sentences"
+        return None
+
+    def _stream_with_model(self, payload: Dict[str, Any], word_limit: int, verbose: bool) -> Optional[str]:
+        """Consume the NDJSON stream, stopping the generation as soon as it is bound to fail."""
+        from reporting.quarterly_report.modules.comments import CommentsConfig
+
+        parts: List[str] = []
+        received = 0
+        checked_at = 0
+        check_every = CommentsConfig.QUALITY_SETTINGS.get('stream_check_chars', 80)
+        stream = get_llm_client(CommentsConfig.API_ENDPOINT).stream(payload, timeout=240)
+        try:
+            for chunk in stream:
+                token = chunk.get('response', '')
+                if not token:
+                    continue
+                parts.append(token)
+                received += len(token)
+                if received - checked_at < check_every:
+                    continue
+                checked_at = received
+                reason = self._early_abort_reason(''.join(parts), word_limit)
+                if reason:
+                    if verbose:
+                        print(f"   ✂️ Stopped generation after {received} chars: {reason}.")
+                    return None
+        finally:
+            stream.close()              # drops the connection, Ollama stops generating
+        return self._clean_generated_text(''.join(parts).strip())
+
+    def _generate_with_model(self, prompt: str, model: str, temperature: float, max_tokens: int, verbose: bool,
+                             section_key: Optional[str] = None, word_limit: Optional[int] = None) -> Optional[str]:
+        """
+        Generate with executive quality enforcement and reasoning model support.
+        With a ``word_limit`` (and ``stream_generation`` on) the response is
+        streamed and abandoned early once it cannot pass the quality check.
+        """
         import requests
+        from reporting.quarterly_report.modules.comments import CommentsConfig
         try:
             payload = {
                 "model": model,
@@ -2501,7 +2614,11 @@ class EnhancedReportGenerator:
                 # Let's not print the whole prompt as it can be huge.
                 print(f"   🤖 Calling model {model} (Temp: {temperature:.2f}, Max Tokens: {max_tokens})...")
 
-            response = requests.post("http://localhost:11434/api/generate", json=payload, timeout=240)
+            if word_limit and CommentsConfig.QUALITY_SETTINGS.get('stream_generation', False):
+                return self._stream_with_model(payload, word_limit, verbose)
+
+            # Pooled keep-alive session, bounded number of calls in flight per endpoint
+            response = get_llm_client(CommentsConfig.API_ENDPOINT).post(payload, timeout=240)
 
             if response.status_code == 200:
                 result = response.json()
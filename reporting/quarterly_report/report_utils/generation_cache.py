@@ -0,0 +1,160 @@
+# reporting/quarterly_report/report_utils/generation_cache.py
+"""
+Persistent cache of accepted AI commentary, keyed by a SHA-256 of (model,
+temperature, prompt, section_key) and kept in a sidecar SQLite file next to
+the report database. ``force=True`` (``ai_force_regenerate`` /
+``AI_FORCE_REGENERATE``) skips lookups but still stores fresh answers.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from ingestion.sqlite_pool import open_connection
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILENAME = "generation_cache.db"
+TTL_DAYS = float(os.environ.get("AI_CACHE_TTL_DAYS", 30))
+MAX_CACHE_BYTES = int(os.environ.get("AI_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def _env_force() -> bool:
+    return os.environ.get("AI_FORCE_REGENERATE", "0").lower() in ("1", "true", "yes")
+
+
+def generation_key(model: str, temperature: float, prompt: str, section_key: str) -> str:
+    payload = json.dumps([model, round(float(temperature), 4), prompt, section_key], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """Accepted responses of one report database, keyed by ``generation_key``."""
+
+    def __init__(self, cache_path, force: bool = False, ttl_days: float = TTL_DAYS,
+                 max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_path = Path(cache_path)
+        self.force = force or _env_force()
+        self.ttl_seconds = ttl_days * 86400
+        self.max_bytes = max_bytes
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "stored": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    @classmethod
+    def for_database(cls, db_path, force: bool = False) -> "GenerationCache":
+        """Sidecar cache stored next to the report database."""
+        return cls(Path(db_path).resolve().parent / CACHE_FILENAME, force=force)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection to the cache file: committed on success, always closed."""
+        con = open_connection(self.cache_path)
+        try:
+            if not self._schema_ready:
+                self._create_schema(con)
+                self._schema_ready = True
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    @staticmethod
+    def _create_schema(con: sqlite3.Connection) -> None:
+        con.execute("""
+            CREATE TABLE IF NOT EXISTS generation_cache (
+                cache_key   TEXT PRIMARY KEY,
+                section_key TEXT,
+                model       TEXT,
+                response    TEXT NOT NULL,
+                size_bytes  INTEGER NOT NULL,
+                created_at  REAL NOT NULL,
+                last_used   REAL NOT NULL,
+                hits        INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        con.execute("CREATE INDEX IF NOT EXISTS idx_generation_cache_last_used ON generation_cache(last_used)")
+
+    def _bump(self, stat: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[stat] += n
+
+    # ── get / put ──────────────────────────────────────────
+    def get(self, model: str, temperature: float, prompt: str, section_key: str) -> Optional[str]:
+        """The stored response, unless forced, missing or older than the TTL."""
+        if self.force:
+            return None
+        key = generation_key(model, temperature, prompt, section_key)
+        try:
+            with self._connect() as con:
+                row = con.execute(
+                    "SELECT response, created_at FROM generation_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is None or time.time() - row[1] > self.ttl_seconds:
+                    self._bump("misses")
+                    return None
+                con.execute(
+                    "UPDATE generation_cache SET last_used = ?, hits = hits + 1 WHERE cache_key = ?",
+                    (time.time(), key),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Generation cache lookup failed: {e}")
+            return None
+        self._bump("hits")
+        logger.debug(f"Generation cache hit for {section_key}")
+        return row[0]
+
+    def put(self, model: str, temperature: float, prompt: str, section_key: str, response: str) -> None:
+        """Store an accepted response, then drop expired and least-recently-used entries."""
+        if not response:
+            return
+        key = generation_key(model, temperature, prompt, section_key)
+        now = time.time()
+        try:
+            with self._connect() as con:
+                con.execute(
+                    """
+                    INSERT INTO generation_cache
+                        (cache_key, section_key, model, response, size_bytes, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(cache_key) DO UPDATE SET
+                        response = excluded.response, size_bytes = excluded.size_bytes,
+                        created_at = excluded.created_at, last_used = excluded.last_used
+                    """,
+                    (key, section_key, model, response, len(response.encode("utf-8")), now, now),
+                )
+                self._evict(con, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Generation cache store failed: {e}")
+            return
+        self._bump("stored")
+
+    def _evict(self, con: sqlite3.Connection, now: float) -> None:
+        evicted = con.execute(
+            "DELETE FROM generation_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        total = con.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM generation_cache").fetchone()[0]
+        if total > self.max_bytes:
+            for key, size in con.execute(
+                "SELECT cache_key, size_bytes FROM generation_cache ORDER BY last_used ASC"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                con.execute("DELETE FROM generation_cache WHERE cache_key = ?", (key,))
+                total -= size
+                evicted += 1
+        if evicted:
+            self._bump("evictions", evicted)
+            logger.info(f"Generation cache: evicted {evicted} entries, {total} bytes kept")
+
+    def clear(self) -> None:
+        with self._connect() as con:
+            con.execute("DELETE FROM generation_cache")
@@ -316,9 +316,10 @@ def process_granting_data(
     BLUE = table_colors.get("BLUE", "#0000FF")
 
     # Load data
-    call_overview = fetch_latest_table_data(conn, CALL_OVERVIEW_ALIAS, cutoff)
-    budget_follow = fetch_latest_table_data(conn, BUDGET_FOLLOWUP_ALIAS, cutoff)
-    ethics_df = fetch_latest_table_data(conn, ETHICS_ALIAS, cutoff)
+    # typed: date columns arrive as datetime64, so _coerce_date_columns has nothing left to parse
+    call_overview = fetch_latest_table_data(conn, CALL_OVERVIEW_ALIAS, cutoff, typed=True)
+    budget_follow = fetch_latest_table_data(conn, BUDGET_FOLLOWUP_ALIAS, cutoff, typed=True)
+    ethics_df = fetch_latest_table_data(conn, ETHICS_ALIAS, cutoff, typed=True)
 
     for df, alias in [(call_overview, CALL_OVERVIEW_ALIAS),
                       (budget_follow, BUDGET_FOLLOWUP_ALIAS),
@@ -1114,11 +1115,12 @@ def build_po_exceeding_FDI_tb_3c(df_summa: pd.DataFrame, current_year: int, cuto
     ]
     
     # Ensure PO Final Date of Implementation is in datetime format after aggregation
-    aggregated_df['PO Final Date of Implementation'] = pd.to_datetime(
-        aggregated_df['PO Final Date of Implementation'], 
-        format='%Y-%m-%d %H:%M:%S',  # Match the format from the table
-        errors='coerce'
-    )
+    if not pd.api.types.is_datetime64_any_dtype(aggregated_df['PO Final Date of Implementation']):
+        aggregated_df['PO Final Date of Implementation'] = pd.to_datetime(
+            aggregated_df['PO Final Date of Implementation'], 
+            format='%Y-%m-%d %H:%M:%S',  # Match the format from the table
+            errors='coerce'
+        )
   
     # Filter to keep only rows where PO Final Date of Implementation <= cutoff
     aggregated_df = aggregated_df[
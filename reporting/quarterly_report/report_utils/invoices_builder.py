@@ -14,6 +14,12 @@ from ingestion.db_utils import (
     fetch_latest_table_data,
     insert_variable
 )
+from reporting.quarterly_report.report_utils.call_types import (
+    EXPERTS_C0_PERSONS,
+    extract_project_numbers,
+    grant_call_types,
+    resolve_call_types,
+)
 
 
 def get_scope_start_end(cutoff: pd.Timestamp) -> Tuple[pd.Timestamp, pd.Timestamp]:
@@ -43,90 +49,6 @@ def get_scope_start_end(cutoff: pd.Timestamp) -> Tuple[pd.Timestamp, pd.Timestam
     return pd.Timestamp(year=cutoff.year, month=1, day=1), quarter_end(cutoff)
 
 
-def determine_po_category(row):
-    """Determine purchase order category from instrument or topic"""
-    CALLS_TYPES_LIST = ['STG', 'ADG', 'POC', 'COG', 'SYG', 'StG', 'CoG', 'AdG', 'SyG', 'PoC', 'CSA']
-    
-    instrument = str(row.get('Instrument', '')).strip()
-    topic = str(row.get('Topic', '')).strip()
-    
-    try:
-        if topic and any(call_type in topic for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in topic).upper()
-            return category
-        elif instrument and any(call_type in instrument for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in instrument).upper()
-            return category
-        return ''
-    except Exception as e:
-        raise
-
-
-def extract_project_number(row):
-    """Extract project number from 'Inv Text' if 'v_check_payment_type' contains RP patterns"""
-    payment_type = row['v_check_payment_type']
-    inv_text = row['Inv Text']
-    
-    if pd.isna(payment_type):
-        return payment_type
-    
-    payment_type_str = str(payment_type)
-    
-    # Check for RP patterns
-    rp_patterns = [
-        r'RP\d+=(?:FP|IP)',  # Original pattern: RP4=FP, RP2=IP, etc.
-        r'RP\d+-(?:FP|IP)'   # New pattern: RP4-FP, RP2-IP, etc.
-    ]
-    
-    has_rp_pattern = any(re.search(pattern, payment_type_str) for pattern in rp_patterns)
-    
-    if has_rp_pattern:
-        if pd.notna(inv_text):
-            inv_text_str = str(inv_text).strip()
-            number_match = re.match(r'^(\d+)', inv_text_str)
-            if number_match:
-                return number_match.group(1)
-        return payment_type
-    
-    return payment_type
-
-
-def map_project_to_call_type(project_num, mapping_dict):
-    """Map project number to call type using grant mapping"""
-    try:
-        numeric_key = int(project_num)
-        if numeric_key in mapping_dict:
-            return mapping_dict[numeric_key]
-    except (ValueError, TypeError):
-        pass
-    return project_num
-
-
-def map_call_type_with_experts(row, grant_map):
-    """Map call_type based on project_number and Inv Parking Person Id"""
-    project_num = row['project_number']
-    parking_person_id = row['Inv Parking Person Id']
-    
-    # Try to map using grant_map
-    try:
-        numeric_key = int(project_num)
-        if numeric_key in grant_map:
-            return grant_map[numeric_key]
-    except (ValueError, TypeError):
-        pass
-    
-    # If project_number is 'EXPERTS', keep it as 'EXPERTS'
-    if str(project_num).upper() == 'EXPERTS':
-        return 'EXPERTS'
-    
-    # Check Inv Parking Person Id for EXPERTS_C0
-    if pd.notna(parking_person_id):
-        parking_person_str = str(parking_person_id).upper()
-        if parking_person_str in ['KACZMUR', 'WALASOU']:
-            return 'EXPERTS_C0'
-    
-    return project_num
-
 def create_registration_pivot_table(df, programme_name):
     """Create a pivot table for a specific programme (H2020 or HEU)"""
     prog_data = df[df['Programme'] == programme_name].copy()
@@ -370,14 +292,12 @@ def generate_invoices_report(
     
     try:
         # Fetch data
-        logger.info("Fetching invoice and calls data...")
-        df_inv = fetch_latest_table_data(conn, alias_inv, cutoff)
-        df_calls = fetch_latest_table_data(conn, alias_calls, cutoff)
+        logger.info("Fetching invoice data...")
+        df_inv = fetch_latest_table_data(conn, alias_inv, cutoff, typed=True)
         
-        # Process calls data
+        # Process calls data (lookup memoised by upload_id, shared with payments)
         logger.info("Processing calls data...")
-        df_calls['CALL_TYPE'] = df_calls.apply(determine_po_category, axis=1)
-        grant_map = df_calls.set_index('Grant Number')['CALL_TYPE'].to_dict()
+        grant_map = grant_call_types(conn, cutoff, alias_calls)
         
         # Process invoices data
         logger.info("Processing invoices data...")
@@ -389,7 +309,7 @@ def generate_invoices_report(
         df_inv = df_inv.drop_duplicates(subset=['Inv Supplier Invoice Key', 'Inv Reception Date (dd/mm/yyyy)'])
         
         # Extract project numbers
-        df_inv['project_number'] = df_inv.apply(extract_project_number, axis=1)
+        df_inv['project_number'] = extract_project_numbers(df_inv)
         
         # Map programmes
         df_inv['Programme'] = np.where(df_inv['Official Budget Line'] == '01 02 01 01', 'HEU',
@@ -397,22 +317,18 @@ def generate_invoices_report(
                                       df_inv['Official Budget Line']))
         
         # Map call types
-        df_inv['call_type'] = df_inv['project_number'].apply(lambda x: map_project_to_call_type(x, grant_map))
-        df_inv['call_type'] = df_inv.apply(lambda row: map_call_type_with_experts(row, grant_map), axis=1)
+        parking_person = df_inv['Inv Parking Person Id']
+        df_inv['call_type'] = resolve_call_types(
+            df_inv['project_number'], grant_map,
+            experts_c0=parking_person.notna() & parking_person.astype(str).str.upper().isin(EXPERTS_C0_PERSONS),
+        )
         
         # Convert dates
         logger.info("Processing dates and calculating time to invoice...")
-        df_inv['Inv Reception Date (dd/mm/yyyy)'] = pd.to_datetime(
-            df_inv['Inv Reception Date (dd/mm/yyyy)'], 
-            format='%Y-%m-%d %H:%M:%S',
-            errors='coerce'
-        )
-        
-        df_inv['Inv Creation Date (dd/mm/yyyy)'] = pd.to_datetime(
-            df_inv['Inv Creation Date (dd/mm/yyyy)'], 
-            format='%Y-%m-%d %H:%M:%S',
-            errors='coerce'
-        )
+        # typed read: parsed already unless the upload predates recorded schemas
+        for date_col in ['Inv Reception Date (dd/mm/yyyy)', 'Inv Creation Date (dd/mm/yyyy)']:
+            if not pd.api.types.is_datetime64_any_dtype(df_inv[date_col]):
+                df_inv[date_col] = pd.to_datetime(df_inv[date_col], format='%Y-%m-%d %H:%M:%S', errors='coerce')
         
         # Calculate time to invoice
         df_inv['Time_to_Invoice'] = (df_inv['Inv Creation Date (dd/mm/yyyy)'] - 
@@ -424,7 +340,7 @@ def generate_invoices_report(
         
 
         # Filter valid call types (standard + all EXPERTS variants)
-        valid_call_types = set(grant_map.values())
+        valid_call_types = set(grant_map.mapping.values())
         df_filtered = df_inv[
             df_inv['call_type'].apply(
                 lambda x: x in valid_call_types or (isinstance(x, str) and x.startswith('EXPERTS'))
@@ -0,0 +1,130 @@
+# reporting/quarterly_report/report_utils/llm_client.py
+"""
+Pooled access to the LLM endpoints: one keep-alive session per endpoint
+with a bounded number of calls in flight (``get_llm_client``), and
+``run_ordered`` to run calls on a thread pool with results in input order.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ingestion import profiler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINT = os.environ.get("OLLAMA_URL", "http://localhost:11434").rstrip("/") + "/api/generate"
+DEFAULT_CONCURRENCY = int(os.environ.get("LLM_CONCURRENCY", 2))
+DEFAULT_TIMEOUT = 240
+
+# endpoint URL → max calls in flight (overrides DEFAULT_CONCURRENCY)
+ENDPOINT_CONCURRENCY: Dict[str, int] = {}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class LLMClient:
+    """Keep-alive session and in-flight limit for one endpoint."""
+
+    def __init__(self, endpoint: str, concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT):
+        self.endpoint = endpoint
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the endpoint's in-flight slots (around calls made through LangChain etc.)."""
+        with self._slots:
+            yield
+
+    def post(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> requests.Response:
+        with self.slot(), profiler.span(payload.get("model", "llm"), "llm", endpoint=self.endpoint):
+            return self.session.post(self.endpoint, json=payload, timeout=timeout or self.timeout)
+
+    def stream(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        POST ``payload`` with ``"stream": True`` and yield each NDJSON chunk.
+        The slot is held until the stream ends or the generator is closed;
+        closing it drops the connection, which makes Ollama stop generating.
+        """
+        payload = {**payload, "stream": True}
+        with self.slot(), profiler.span(payload.get("model", "llm"), "llm", endpoint=self.endpoint, stream=True):
+            with self.session.post(self.endpoint, json=payload, timeout=timeout or self.timeout,
+                                   stream=True) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise RuntimeError(f"LLM stream error: {chunk['error']}")
+                    yield chunk
+                    if chunk.get("done"):
+                        return
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_CLIENTS: Dict[str, LLMClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def endpoint_concurrency(endpoint: str) -> int:
+    return ENDPOINT_CONCURRENCY.get(endpoint, DEFAULT_CONCURRENCY)
+
+
+def get_llm_client(endpoint: Optional[str] = None) -> LLMClient:
+    """The shared client of ``endpoint`` (created on first use)."""
+    endpoint = endpoint or DEFAULT_ENDPOINT
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(endpoint)
+        if client is None:
+            client = _CLIENTS[endpoint] = LLMClient(endpoint, endpoint_concurrency(endpoint))
+            logger.debug(f"LLM client for {endpoint} (max {client.concurrency} in flight)")
+        return client
+
+
+def close_llm_clients() -> None:
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        client.close()
+
+
+def run_ordered(fn: Callable[[T], R], items: Iterable[T], max_workers: Optional[int] = None) -> List[R]:
+    """
+    ``[fn(item) for item in items]`` on a thread pool; results in input order.
+    An exception raised by ``fn`` is returned in place of its result.
+    """
+    items = list(items)
+    if not items:
+        return []
+    workers = max(1, min(len(items), max_workers or DEFAULT_CONCURRENCY))
+    if workers == 1:
+        return [_call(fn, item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm") as pool:
+        futures = [pool.submit(fn, item) for item in items]
+        return [f.exception() or f.result() for f in futures]
+
+
+def _call(fn, item):
+    try:
+        return fn(item)
+    except Exception as e:
+        return e
@@ -1,22 +1,19 @@
 import requests
-from langchain_openai import ChatOpenAI
-from langchain_community.chat_models import ChatOllama
-
-# Optional: use try-import for Ollama
-try:
-    from langchain_community.chat_models import ChatOllama
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    ChatOllama = None
-    OLLAMA_AVAILABLE = False
 
 def get_fallback_llm(model_name="qwen2.5:14b", openai_model="gpt-4", temperature=0.4):
     """
     Return a chat model instance:
     - Tries Ollama (localhost:11434) if available
     - Falls back to OpenAI or other online provider
+    LangChain is imported here, on first use, not when the report modules load.
     """
-    if OLLAMA_AVAILABLE:
+    # Optional: use try-import for Ollama
+    try:
+        from langchain_community.chat_models import ChatOllama
+    except ImportError:
+        ChatOllama = None
+
+    if ChatOllama is not None:
         try:
             response = requests.get("http://localhost:11434", timeout=5)
             if response.status_code == 200:
@@ -24,4 +21,5 @@ def get_fallback_llm(model_name="qwen2.5:14b", openai_model="gpt-4", temperature
         except requests.RequestException:
             pass
     # Fallback to OpenAI
+    from langchain_openai import ChatOpenAI
     return ChatOpenAI(model=openai_model, temperature=temperature)
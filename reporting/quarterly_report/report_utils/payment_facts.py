@@ -0,0 +1,53 @@
+# reporting/quarterly_report/report_utils/payment_facts.py
+"""
+In-scope payments fact table, built once per Payments run and shared by the
+TTP builders of ``payments_m_builder``.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DATE_COL = 'Pay Document Date (dd/mm/yyyy)'
+KEY_COL = 'Pay Payment Key'
+TTP_COLS = ('v_TTP_NET', 'v_TTP_GROSS', 'v_payment_in_time')
+GROUP_COLS = ('Programme', 'v_payment_type')
+
+
+class PaymentFacts:
+    """
+    Payments dated up to ``scope_end``: ``rows`` with numeric TTP columns, and
+    ``payments``, one row per payment key with v_TTP_NET ≥ 0 plus its 'Month'.
+    Both are shared by every builder of the run, so treat them as read-only.
+    """
+
+    def __init__(self, df_paym: pd.DataFrame, scope_end: pd.Timestamp):
+        self.scope_end = scope_end
+        rows = df_paym
+        if not pd.api.types.is_datetime64_any_dtype(rows[DATE_COL]):
+            rows = rows.assign(**{DATE_COL: pd.to_datetime(rows[DATE_COL], errors='coerce')})
+        rows = rows[rows[DATE_COL] <= scope_end]
+        rows = rows.assign(**{c: pd.to_numeric(rows[c], errors='coerce') for c in TTP_COLS if c in rows.columns})
+        self.rows = rows
+
+        payments = rows.drop_duplicates(subset=[KEY_COL])
+        payments = payments[payments['v_TTP_NET'] >= 0]
+        self.payments = payments.assign(Month=payments[DATE_COL].dt.month.astype('int8'))
+        self._positions: Dict[Tuple, np.ndarray] = {
+            key: np.asarray(idx) for key, idx in self.payments.groupby(list(GROUP_COLS), sort=False, dropna=False).indices.items()
+        }
+
+    def slice(self, programme: Optional[str] = None, payment_type: Optional[str] = None) -> pd.DataFrame:
+        """``payments`` of ``programme`` and/or ``payment_type`` (None = any), in original row order."""
+        if programme is None and payment_type is None:
+            return self.payments
+        positions = [idx for (prog, pt), idx in self._positions.items()
+                     if programme in (None, prog) and payment_type in (None, pt)]
+        if not positions:
+            return self.payments.iloc[0:0]
+        return self.payments.iloc[np.sort(np.concatenate(positions))]
+
+    def __repr__(self) -> str:
+        return f"PaymentFacts({len(self.rows)} rows, {len(self.payments)} payments ≤ {self.scope_end:%Y-%m-%d})"
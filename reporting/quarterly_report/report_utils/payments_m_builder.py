@@ -12,7 +12,7 @@ import sqlite3
 import warnings
 from datetime import date, datetime
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 # ═══════════════════════════════════════════════════════════════════
 # THIRD-PARTY IMPORTS
@@ -33,7 +33,6 @@ import selenium.webdriver
 from ingestion.db_utils import (
     init_db,
     fetch_latest_table_data,
-    fetch_vars_for_report,
     get_alias_last_load,
     get_variable_status,
     load_report_params,
@@ -47,6 +46,9 @@ from reporting.quarterly_report.report_utils.granting_utils import (
     _ensure_timedelta_cols,
     _coerce_date_columns
 )
+from reporting.quarterly_report.report_utils.rolling import ytd_rolling_mean, group_curve
+from reporting.quarterly_report.report_utils.payment_facts import PaymentFacts
+from ingestion.artifact_store import load_frames
 
 # ═══════════════════════════════════════════════════════════════════
 # CONFIGURE WARNINGS AND SETTINGS
@@ -66,8 +68,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Payments")
 
-CALLS_TYPES_LIST = ['STG', 'ADG', 'POC', 'COG', 'SYG', 'StG', 'CoG', 'AdG', 'SyG', 'PoC', 'CSA']
-
 # ──────────────────────────────────────────────────────────────
 # HELPERS
 # ──────────────────────────────────────────────────────────────
@@ -129,193 +129,15 @@ def months_in_scope(cutoff: pd.Timestamp) -> list[str]:
 
     return months
 
-def determine_po_category(row):
-
-    instrument = str(row.get('Instrument', '')).strip()
-    topic = str(row.get('Topic', '')).strip()
-
-    try:
-        if topic and any(call_type in topic for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in topic).upper()
-            return category
-        elif instrument and any(call_type in instrument for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in instrument).upper()
-            return category
-        return ''
-    except Exception as e:
-        raise
-
-def determine_po_category_po_list(row):
-
-    summa = str(row.get('PO Purchase Order Item Desc', '')).strip()
-    abac = str(row.get('PO ABAC SAP Reference', '')).strip()
-
-    try:
-        if summa and any(call_type in summa for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in summa).upper()
-            return category
-        elif abac and any(call_type in abac for call_type in CALLS_TYPES_LIST):
-            category = next(call_type for call_type in CALLS_TYPES_LIST if call_type in abac).upper()
-            return category
-        return ''
-    except Exception as e:
-        raise
-
-def extract_project_number(row):
-    """
-    Extract project number from 'Inv Text' if 'v_check_payment_type' contains RP patterns,
-    otherwise return original 'v_check_payment_type' value
-    """
-    payment_type = row['v_check_payment_type']
-    inv_text = row['Inv Text']
-    
-    # Handle NaN values
-    if pd.isna(payment_type):
-        return payment_type
-    
-    # Convert to string to handle any data type
-    payment_type_str = str(payment_type)
-    
-    # Check if the payment_type contains RP patterns:
-    # - Original pattern: RP + number + = + FP/IP (e.g., RP4=FP, RP2=IP)
-    # - New pattern: RP + number + - + FP/IP (e.g., RP4-FP, RP2-IP)
-    rp_patterns = [
-        r'RP\d+=(?:FP|IP)',  # Original pattern: RP4=FP, RP2=IP, etc.
-        r'RP\d+-(?:FP|IP)'   # New pattern: RP4-FP, RP2-IP, etc.
-    ]
-    
-    # Check if any of the RP patterns match
-    has_rp_pattern = any(re.search(pattern, payment_type_str) for pattern in rp_patterns)
-    
-    if has_rp_pattern:
-        # Extract the numerical part from Inv Text column
-        if pd.notna(inv_text):
-            inv_text_str = str(inv_text).strip()
-            # Extract leading digits from Inv Text
-            number_match = re.match(r'^(\d+)', inv_text_str)
-            if number_match:
-                return number_match.group(1)
-        
-        # If no number found in Inv Text, return original payment_type
-        return payment_type
-    
-    # Return original v_check_payment_type if no RP pattern found
-    return payment_type
-
-
-def map_project_to_call_type(project_num, mapping_dict):
-    # If it's a numeric string, try to convert and lookup
-    try:
-        # Try to convert to int for lookup
-        numeric_key = int(project_num)
-        if numeric_key in mapping_dict:
-            return mapping_dict[numeric_key]
-    except (ValueError, TypeError):
-        # If conversion fails, it's a non-numeric string like 'EXPERTS'
-        pass
-    
-    # Return original value if no match found
-    return project_num
-
-def map_call_type_with_experts(row, grant_map):
-    """
-    Map call_type based on project_number and Inv Parking Person Id
-    """
-    project_num = row['project_number']
-    contract_type = row['v_payment_type']
-    
-    # First, try to map using grant_map (convert project_num to int if possible)
-    try:
-        numeric_key = int(project_num)
-        if numeric_key in grant_map:
-            return grant_map[numeric_key]
-    except (ValueError, TypeError):
-        pass
-    
-    # If project_number is 'EXPERTS', keep it as 'EXPERTS'
-    if str(project_num).upper() == 'EXPERTS' or str(contract_type).upper() == 'EXPERTS':
-        return 'EXPERTS'
-    
-    # Return original project_number if no conditions are met
-    return project_num
 
-def map_payment_type(row):
-    if row['v_payment_type'] == 'Other' and row['Pay Workflow Last AOS Person Id'] == 'WALASOU':
-        return 'EXPERTS'
-    return row['v_payment_type']
-
-# Instead, handle conversion in the mapping function
-def safe_map_project_to_call_type(project_num, mapping_dict):
-    """
-    Maps project number to call type, handles all data type issues internally
-    """
-    try:
-        # Handle NaN values
-        if pd.isna(project_num):
-            return None
-            
-        # Convert whatever format to integer for lookup
-        if isinstance(project_num, str):
-            # Handle strings like '4500053782.0'
-            if project_num.endswith('.0'):
-                numeric_key = int(project_num[:-2])
-            else:
-                numeric_key = int(float(project_num))
-        else:
-            # Handle numeric values (float/int)
-            numeric_key = int(float(project_num))
-            
-        # Lookup in mapping dictionary
-        if numeric_key in mapping_dict:
-            result = mapping_dict[numeric_key]
-            if pd.notna(result) and result != '':
-                return result
-                
-    except (ValueError, TypeError, OverflowError):
-        # Any conversion error, return None
-        pass
-    
-    return None
-
-# Apply mapping without converting the whole column
-def apply_conditional_mapping(row):
-    current_call_type = row['call_type']
-    po_key = row['PO Purchase Order Key']  # Use as-is, no conversion
-    
-    should_map = (
-        pd.isna(current_call_type) or 
-        current_call_type == '' or 
-        current_call_type not in CALLS_TYPES_LIST or 
-        current_call_type in ['EXPERTS', 'CSA']
-    )
-    
-    if should_map:
-        mapped_value = safe_map_project_to_call_type(po_key, po_map)
-        return mapped_value if mapped_value is not None else current_call_type
-    else:
-        return current_call_type
-    
-
-def calculate_current_ttp_metrics(df_paym, cutoff):
+def calculate_current_ttp_metrics(df_paym, cutoff, facts: Optional[PaymentFacts] = None):
     """
     Calculate current TTP metrics from df_paym data, filtering out negative v_TTP_NET
+    (on ``facts.payments`` when the run's fact table is given)
     """
 
     try:
-            # Filter data up to cutoff and deduplicate by Pay Payment Key
-            quarter_dates = get_scope_start_end(cutoff=cutoff)
-            last_valid_date = quarter_dates[1]
-
-            df_filtered = df_paym[
-                df_paym['Pay Document Date (dd/mm/yyyy)'] <= last_valid_date
-            ].copy()
-            df_unique = df_filtered.drop_duplicates(subset=['Pay Payment Key']).copy()
-            
-            # Convert to numeric and filter negative v_TTP_NET
-            df_unique['v_TTP_NET'] = pd.to_numeric(df_unique['v_TTP_NET'], errors='coerce')
-            df_unique['v_TTP_GROSS'] = pd.to_numeric(df_unique['v_TTP_GROSS'], errors='coerce')
-            df_unique['v_payment_in_time'] = pd.to_numeric(df_unique['v_payment_in_time'], errors='coerce')
-            df_unique = df_unique[df_unique['v_TTP_NET'] >= 0]
+            df_unique = payment_facts(df_paym, cutoff, facts).payments
             
             results = {}
             
@@ -418,10 +240,18 @@ def months_in_scope(cutoff: pd.Timestamp) -> list[str]:
     return months
 
 
+def payment_facts(df_paym, cutoff, facts: Optional[PaymentFacts] = None) -> PaymentFacts:
+    """The run's fact table when the caller built it, else the one of ``df_paym``."""
+    if facts is not None:
+        return facts
+    return PaymentFacts(df_paym, get_scope_start_end(pd.Timestamp(cutoff))[1])
+
+
 # ──────────────────────────────────────────────────────────────
 # PAYMENTS TABLES : 1. quarterly_tables_generation_main
 # ──────────────────────────────────────────────────────────────
-def quarterly_tables_generation_main(df_paym, cutoff, db_path, report, table_colors):
+def quarterly_tables_generation_main(df_paym, cutoff, db_path, report, table_colors,
+                                     facts: Optional[PaymentFacts] = None):
         
     """
     Main function to generate quarterly tables with comprehensive error handling
@@ -444,6 +274,10 @@ def quarterly_tables_generation_main(df_paym, cutoff, db_path, report, table_col
         if report is None:
             return False, "Report parameter is required", None
 
+        # in-scope rows shared with the other builders of the run (read-only)
+        if facts is not None:
+            df_paym = facts.rows
+
         
         def create_quarterly_payment_tables(df_paym, cutoff_date=None):
             """
@@ -1641,7 +1475,8 @@ def quarterly_tables_generation_main(df_paym, cutoff, db_path, report, table_col
 # ──────────────────────────────────────────────────────────────
 # PAYMENTS TABLES : 2. TTP SUMMARY And OverView TTP
 # ──────────────────────────────────────────────────────────────
-def generate_ttp_summary_overview (df_paym, cutoff, db_path, report, table_colors, report_params):
+def generate_ttp_summary_overview (df_paym, cutoff, db_path, report, table_colors, report_params,
+                                   facts: Optional[PaymentFacts] = None):
         
     try:
         # ═══════════════════════════════════════════════════════════════════
@@ -1664,18 +1499,18 @@ def generate_ttp_summary_overview (df_paym, cutoff, db_path, report, table_color
             return False, "Report parameters are required", None
 
         print("🚀 Starting TTP tables generation...")
+        facts = payment_facts(df_paym, cutoff, facts)
 
         # ═══════════════════════════════════════════════════════════════════
         # DATA PREPARATION AND VALIDATION
         # ═══════════════════════════════════════════════════════════════════
 
         try:
-            vars_all = fetch_vars_for_report(report, db_path)
-            if not vars_all:
-                return False, "Failed to fetch variables from database", None
-            
-            heu_vars_data = vars_all.get('table_2a_HE')
-            h2020_vars_data = vars_all.get('table_2a_H2020')
+            budget_tables = load_frames(report, ['table_2a_HE', 'table_2a_H2020'], db_path)
+            heu_vars_data = budget_tables['table_2a_HE'].to_dict('records') \
+                if budget_tables['table_2a_HE'] is not None else None
+            h2020_vars_data = budget_tables['table_2a_H2020'].to_dict('records') \
+                if budget_tables['table_2a_H2020'] is not None else None
 
             # Validate required data exists
             if not heu_vars_data and not h2020_vars_data:
@@ -1718,22 +1553,7 @@ def generate_ttp_summary_overview (df_paym, cutoff, db_path, report, table_color
             """
             Calculate current TTP metrics from df_paym data
             """
-            # Filter data up to cutoff and deduplicate by Pay Payment Key
-            quarter_dates = get_scope_start_end(cutoff=cutoff)
-            last_valid_date = quarter_dates[1]
-
-            df_filtered = df_paym[
-                df_paym['Pay Document Date (dd/mm/yyyy)'] <= last_valid_date
-            ].copy()
-            df_unique = df_filtered.drop_duplicates(subset=['Pay Payment Key']).copy()
-            
-            # Convert to numeric
-            df_unique['v_TTP_NET'] = pd.to_numeric(df_unique['v_TTP_NET'], errors='coerce')
-            df_unique['v_TTP_GROSS'] = pd.to_numeric(df_unique['v_TTP_GROSS'], errors='coerce')
-            df_unique['v_payment_in_time'] = pd.to_numeric(df_unique['v_payment_in_time'], errors='coerce')
-
-            # Filter out negative TTP_NET values
-            df_unique = df_unique[df_unique['v_TTP_NET'] >= 0]
+            df_unique = facts.payments
             
             results = {}
             
@@ -2619,7 +2439,8 @@ def generate_ttp_summary_overview (df_paym, cutoff, db_path, report, table_color
 # ──────────────────────────────────────────────────────────────
 # PAYMENTS TABLES : 3. TTP TABLES
 # ──────────────────────────────────────────────────────────────
-def generate_ttp_tables (df_paym, cutoff, db_path, report, table_colors, report_params):
+def generate_ttp_tables (df_paym, cutoff, db_path, report, table_colors, report_params,
+                         facts: Optional[PaymentFacts] = None):
         
     try:
         # ═══════════════════════════════════════════════════════════════════
@@ -2659,6 +2480,8 @@ def generate_ttp_tables (df_paym, cutoff, db_path, report, table_colors, report_
         if missing_columns:
             return False, f"Missing required columns: {missing_columns}", None
 
+        facts = payment_facts(df_paym, cutoff, facts)
+
         print("✅ Input validation completed successfully")
 
         # ═══════════════════════════════════════════════════════════════════
@@ -2672,27 +2495,7 @@ def generate_ttp_tables (df_paym, cutoff, db_path, report, table_colors, report_
             Returns table, programme, payment_type, and a flag indicating if the table is empty
             """
             try: 
-                # Use same logic as calculate_current_ttp_metrics
-                quarter_dates = get_scope_start_end(cutoff=cutoff)
-                last_valid_date = quarter_dates[1]
-
-                # Filter data up to cutoff and deduplicate by Pay Payment Key (same as comparison table)
-                df_filtered = df_paym[
-                    df_paym['Pay Document Date (dd/mm/yyyy)'] <= last_valid_date
-                ].copy()
-                df_unique = df_filtered.drop_duplicates(subset=['Pay Payment Key']).copy()
-                
-                # Convert to numeric and filter negative v_TTP_NET (same as comparison table)
-                df_unique['v_TTP_NET'] = pd.to_numeric(df_unique['v_TTP_NET'], errors='coerce')
-                df_unique['v_TTP_GROSS'] = pd.to_numeric(df_unique['v_TTP_GROSS'], errors='coerce')
-                df_unique['v_payment_in_time'] = pd.to_numeric(df_unique['v_payment_in_time'], errors='coerce')
-                df_unique = df_unique[df_unique['v_TTP_NET'] >= 0]
-                
-                # Now filter by programme and payment type (same as comparison table order)
-                df_filtered = df_unique[
-                    (df_unique['Programme'] == programme) &
-                    (df_unique['v_payment_type'] == payment_type)
-                ].copy()
+                df_filtered = facts.slice(programme, payment_type).copy()
                 
                 # If no data after filtering, return an empty table with a flag
                 if df_filtered.empty:
@@ -3055,7 +2858,8 @@ def generate_ttp_tables (df_paym, cutoff, db_path, report, table_colors, report_
 # ──────────────────────────────────────────────────────────────
 # PAYMENTS TABLES : 4. TTP CHARTS
 # ──────────────────────────────────────────────────────────────
-def generate_ttp_charts (df_paym, cutoff, db_path, report, table_colors, report_params, quarterly_tables):
+def generate_ttp_charts (df_paym, cutoff, db_path, report, table_colors, report_params, quarterly_tables,
+                         facts: Optional[PaymentFacts] = None):
      
     """
     Generate TTP charts with comprehensive error handling
@@ -3104,6 +2908,8 @@ def generate_ttp_charts (df_paym, cutoff, db_path, report, table_colors, report_
         if missing_columns:
             return False, f"Missing required columns: {missing_columns}", None
 
+        facts = payment_facts(df_paym, cutoff, facts)
+
         print("✅ Input validation completed successfully")
 
         # ═══════════════════════════════════════════════════════════════════
@@ -3111,46 +2917,31 @@ def generate_ttp_charts (df_paym, cutoff, db_path, report, table_colors, report_
         # ═══════════════════════════════════════════════════════════════════
 
 
-        def rolling_ttp(df,programme,typeofpayment):
+        def rolling_ttp_all(programmes, payment_types):
 
             """
-            Calculate rolling average TTP with error handling
+            Year-to-date rolling average TTP for every programme × payment type
+            in one pass (long frame: Programme, v_payment_type, Month, TTP)
             """
-            
+
             try:
-        
+
                 start, end  = get_scope_start_end(cutoff)
                 last_month = int(end.month)
-                i = 1
-                moving_avg_ttp = []
-                months = []
 
-                quarter_dates = get_scope_start_end(cutoff=cutoff)
-                last_valid_date = quarter_dates[1]
-
-                df_filtered = df[
-                        df['Pay Document Date (dd/mm/yyyy)'] <= last_valid_date
-                ].copy()
-                df_unique = df_filtered.drop_duplicates(subset=['Pay Payment Key']).copy()
-                
-                # Convert to numeric and filter negative v_TTP_NET
-                df_unique['v_TTP_NET'] = pd.to_numeric(df_unique['v_TTP_NET'], errors='coerce')
-                df_unique['v_TTP_GROSS'] = pd.to_numeric(df_unique['v_TTP_GROSS'], errors='coerce')
-                df_unique['v_payment_in_time'] = pd.to_numeric(df_unique['v_payment_in_time'], errors='coerce')
-                df_unique = df_unique[df_unique['v_TTP_NET'] >= 0]
-
-                while i <= last_month : 
-                        df_test =  df_unique.loc[( df_unique['Programme'] == programme) & ( df_unique['v_payment_type'] == typeofpayment) & ( df_unique['Month']<= i )]    
-                        mean = round(df_test['TTP_NET'].mean(),1)
-                        moving_avg_ttp.insert(i,mean)
-                        months.insert(i,i)
-                        i+=1
-
-                d = {'Month': months, 'TTP': moving_avg_ttp}
-                df_mov_ttp = pd.DataFrame(data=d)
-                return df_mov_ttp 
+                # one payment counted once per chart: the fact table is deduplicated
+                return ytd_rolling_mean(
+                    facts.payments,
+                    group_cols=['Programme', 'v_payment_type'],
+                    month_col='Month',
+                    value_col='v_TTP_NET',
+                    months=range(1, last_month + 1),
+                    groups=[(prog, pt) for prog in programmes for pt in payment_types],
+                    decimals=1,
+                    out_col='TTP',
+                )
             except Exception as e:
-                raise Exception(f"Error in rolling_ttp for {programme} {typeofpayment}: {str(e)}")
+                raise Exception(f"Error in rolling_ttp_all: {str(e)}")
 
 
         def avg_ttp(df,programme,typeofpayment):
@@ -3166,21 +2957,8 @@ def generate_ttp_charts (df_paym, cutoff, db_path, report, table_colors, report_
                     moving_avg_ttp = []
                     months = []
 
-                    quarter_dates = get_scope_start_end(cutoff=cutoff)
-                    last_valid_date = quarter_dates[1]
-
-                    df_filtered = df[
-                            df['Pay Document Date (dd/mm/yyyy)'] <= last_valid_date
-                    ].copy()
-                    df_unique = df_filtered.drop_duplicates(subset=['Pay Payment Key']).copy()
-                    
-                    # Convert to numeric and filter negative v_TTP_NET
-                    df_unique['v_TTP_NET'] = pd.to_numeric(df_unique['v_TTP_NET'], errors='coerce')
-                    df_unique['v_TTP_GROSS'] = pd.to_numeric(df_unique['v_TTP_GROSS'], errors='coerce')
-                    df_unique['v_payment_in_time'] = pd.to_numeric(df_unique['v_payment_in_time'], errors='coerce')
-                    df_unique = df_unique[df_unique['v_TTP_NET'] >= 0]
-
-                    pivot_ttp_month =  df_unique.pivot_table( index= df_unique[["Month"]], values= df_unique[['TTP_NET']],fill_value=0,aggfunc='mean')
+                    # df is a facts.slice: already one row per payment with TTP_NET ≥ 0
+                    pivot_ttp_month =  df.pivot_table( index= df[["Month"]], values= df[['TTP_NET']],fill_value=0,aggfunc='mean')
                     pivot_ttp_month['TTP_NET'] = pivot_ttp_month['TTP_NET'].round(1)
                     #pivot_ttp_month.columns =  pivot_ttp_month.columns.droplevel()
                     pivot_ttp_month.reset_index(inplace = True)
@@ -3388,6 +3166,10 @@ def generate_ttp_charts (df_paym, cutoff, db_path, report, table_colors, report_
                 payment_types = ['IP', 'FP', 'EXPERTS', 'PF']
                 programs = ['H2020', 'HEU']
 
+                rolling_all = rolling_ttp_all(programs, payment_types)
+                # metrics of every programme × payment type, from the same payments as the charts
+                current_metrics = calculate_current_ttp_metrics(df_paym, cutoff, facts)
+
                 for prog in programs:
                     for pt in payment_types:
                         table_key = f'{prog}_{pt}_table'
@@ -3401,10 +3183,7 @@ def generate_ttp_charts (df_paym, cutoff, db_path, report, table_colors, report_
                                 continue
 
                             # Prepare data for chart
-                            df_chart = df_paym[
-                                (df_paym['Programme'] == prog) &
-                                (df_paym['v_payment_type'] == pt)
-                            ].copy()
+                            df_chart = facts.slice(prog, pt)
                             
                             if df_chart.empty:
                                 chart_results.append((False, f"No data available for {var_name}"))
@@ -3412,19 +3191,14 @@ def generate_ttp_charts (df_paym, cutoff, db_path, report, table_colors, report_
                                 print(f"⚠️ No data for chart {var_name}")
                                 continue
                             
-                            df_chart['Month'] = pd.to_datetime(df_chart['Pay Document Date (dd/mm/yyyy)']).dt.month
-                            df_chart['TTP_NET'] = pd.to_numeric(df_chart['v_TTP_NET'], errors='coerce')
-                            df_chart = df_chart[df_chart['TTP_NET'] >= 0]
+                            df_chart = df_chart.assign(TTP_NET=df_chart['v_TTP_NET'])
 
-                            # Calculate metrics for this combination
-                            current_metrics = calculate_current_ttp_metrics(df_chart, cutoff)
-                            
                             # Safely extract average
                             avg_ttp_net = 0
                             if prog in current_metrics and pt in current_metrics[prog]:
                                 avg_ttp_net = round(float(current_metrics[prog][pt]['avg_ttp_net']), 1)
                             
-                            rolling_avg = rolling_ttp(df_chart, prog, pt)
+                            rolling_avg = group_curve(rolling_all, ['Programme', 'v_payment_type'], (prog, pt), 'TTP')
                             df_ttp = avg_ttp(df_chart, prog, pt)
 
                             # Generate chart
@@ -3572,7 +3346,8 @@ def generate_ttp_charts (df_paym, cutoff, db_path, report, table_colors, report_
 # PAYMENTS TABLES : 5. Annex Tables TTP and Effectiveness 
 # ──────────────────────────────────────────────────────────────    
 
-def annex_tables_ttp_eff (df_paym, cutoff, db_path, report, table_colors, report_params):
+def annex_tables_ttp_eff (df_paym, cutoff, db_path, report, table_colors, report_params,
+                          facts: Optional[PaymentFacts] = None):
 
     """
     Generate Annex tables for TTP and Effectiveness with comprehensive error handling
@@ -3617,6 +3392,8 @@ def annex_tables_ttp_eff (df_paym, cutoff, db_path, report, table_colors, report
         if missing_columns:
             return False, f"Missing required columns: {missing_columns}", None
 
+        facts = payment_facts(df_paym, cutoff, facts)
+
         print("✅ Input validation completed successfully")
 
         # ═══════════════════════════════════════════════════════════════════
@@ -3628,22 +3405,7 @@ def annex_tables_ttp_eff (df_paym, cutoff, db_path, report, table_colors, report
             Create effectiveness breakdown tables by directorate and payment type
             """
             try:
-                # Filter data up to cutoff and deduplicate by Pay Payment Key
-                quarter_dates = get_scope_start_end(cutoff=cutoff)
-                last_valid_date = quarter_dates[1]
-
-                df_filtered = df_paym[
-                    df_paym['Pay Document Date (dd/mm/yyyy)'] <= last_valid_date
-                ].copy()
-                df_unique = df_filtered.drop_duplicates(subset=['Pay Payment Key']).copy()
-                
-                # Convert to numeric
-                df_unique['v_TTP_NET'] = pd.to_numeric(df_unique['v_TTP_NET'], errors='coerce')
-                df_unique['v_TTP_GROSS'] = pd.to_numeric(df_unique['v_TTP_GROSS'], errors='coerce')
-                df_unique['v_payment_in_time'] = pd.to_numeric(df_unique['v_payment_in_time'], errors='coerce')
-                
-                # Filter out negative TTP_NET values
-                df_unique = df_unique[df_unique['v_TTP_NET'] >= 0]
+                df_unique = facts.payments
                 
                 # Determine year label from cutoff
                 cutoff_date = pd.to_datetime(cutoff)
@@ -3668,22 +3430,7 @@ def annex_tables_ttp_eff (df_paym, cutoff, db_path, report, table_colors, report
 
             try:
 
-                # Filter data up to cutoff and deduplicate by Pay Payment Key
-                quarter_dates = get_scope_start_end(cutoff=cutoff)
-                last_valid_date = quarter_dates[1]
-
-                df_filtered = df_paym[
-                    df_paym['Pay Document Date (dd/mm/yyyy)'] <= last_valid_date
-                ].copy()
-                df_unique = df_filtered.drop_duplicates(subset=['Pay Payment Key']).copy()
-                
-                # Convert to numeric
-                df_unique['v_TTP_NET'] = pd.to_numeric(df_unique['v_TTP_NET'], errors='coerce')
-                df_unique['v_TTP_GROSS'] = pd.to_numeric(df_unique['v_TTP_GROSS'], errors='coerce')
-                df_unique['v_payment_in_time'] = pd.to_numeric(df_unique['v_payment_in_time'], errors='coerce')
-                
-                # Filter out negative TTP_NET values
-                df_unique = df_unique[df_unique['v_TTP_NET'] >= 0]
+                df_unique = facts.payments.copy()
                 
                 # Extract quarter from date
                 df_unique['Quarter'] = pd.to_datetime(df_unique['Pay Document Date (dd/mm/yyyy)']).dt.to_period('Q')
@@ -4165,22 +3912,7 @@ def annex_tables_ttp_eff (df_paym, cutoff, db_path, report, table_colors, report
             """
 
             try:
-                # Filter data up to cutoff and deduplicate by Pay Payment Key
-                quarter_dates = get_scope_start_end(cutoff=cutoff)
-                last_valid_date = quarter_dates[1]
-
-                df_filtered = df_paym[
-                    df_paym['Pay Document Date (dd/mm/yyyy)'] <= last_valid_date
-                ].copy()
-                df_unique = df_filtered.drop_duplicates(subset=['Pay Payment Key']).copy()
-                
-                # Convert to numeric
-                df_unique['v_TTP_NET'] = pd.to_numeric(df_unique['v_TTP_NET'], errors='coerce')
-                df_unique['v_TTP_GROSS'] = pd.to_numeric(df_unique['v_TTP_GROSS'], errors='coerce')
-                df_unique['v_payment_in_time'] = pd.to_numeric(df_unique['v_payment_in_time'], errors='coerce')
-
-                # Filter out negative TTP_NET values
-                df_unique = df_unique[df_unique['v_TTP_NET'] >= 0]
+                df_unique = facts.payments
                 
                 results = {}
                 
@@ -5368,7 +5100,8 @@ def annex_tables_ttp_eff (df_paym, cutoff, db_path, report, table_colors, report
 # PAYMENTS TABLES : 6. Payment Charts and Summary Tables
 # ──────────────────────────────────────────────────────────────    
 
-def paym_charts_summary_tables (df_paym, cutoff, db_path, report, table_colors, report_params, df_forecast ):
+def paym_charts_summary_tables (df_paym, cutoff, db_path, report, table_colors, report_params, df_forecast,
+                                facts: Optional[PaymentFacts] = None):
 
         """
         Generate Annex tables for TTP and Effectiveness with comprehensive error handling
@@ -5397,6 +5130,10 @@ def paym_charts_summary_tables (df_paym, cutoff, db_path, report, table_colors,
             if report_params is None:
                 return False, "Report parameters are required", None
 
+            # in-scope rows shared with the other builders of the run (read-only)
+            if facts is not None:
+                df_paym = facts.rows
+
             # Validate required columns
             required_columns = [
                 'Pay Document Date (dd/mm/yyyy)', 
@@ -5431,10 +5168,6 @@ def paym_charts_summary_tables (df_paym, cutoff, db_path, report, table_colors,
 
             print("\n📈 Generating Payment Analysis Charts...")
 
-            vars_all = fetch_vars_for_report(report, db_path)
-            if not vars_all:
-                return False, "Failed to fetch variables from database", None
-
             # ──────────────────────────────────────────────────────────────
             # 2.1 Setup Locale and Configuration
             # ──────────────────────────────────────────────────────────────
@@ -5496,11 +5229,8 @@ def paym_charts_summary_tables (df_paym, cutoff, db_path, report, table_colors,
                     print(f"Scope: {scope_start} to {scope_end}")
                     print(f"Months in scope: {len(months_list)} months")
                     
-                    # Copy and filter data
-                    df = df_paym.copy()
-                    
-                    # Filter by programme
-                    df = df[df['Programme'] == programme].copy()
+                    # Filter by programme (copies only that programme's rows)
+                    df = df_paym[df_paym['Programme'] == programme].copy()
                     
                     # Parse dates if they're strings
                     if df['Pay Document Date (dd/mm/yyyy)'].dtype == 'object':
@@ -0,0 +1,71 @@
+# reporting/quarterly_report/report_utils/rolling.py
+"""
+Year-to-date rolling means for the TTP / TTA charts: the value for month
+``m`` is the mean over the group's rows dated in a month ≤ ``m``, computed
+from cumulative sums and counts per month.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ingestion.profiler import profiled
+
+
+@profiled()
+def ytd_rolling_mean(
+    df: pd.DataFrame,
+    group_cols: Sequence[str],
+    month_col: str,
+    value_col: str,
+    months: Iterable[int],
+    groups: Optional[Iterable[Tuple]] = None,
+    decimals: Optional[int] = None,
+    out_col: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Cumulative mean of ``value_col`` up to each month of ``months``, per group.
+
+    Returns a long frame ``[*group_cols, 'Month', out_col]`` with one row
+    per group × month; months without any data so far are NaN. ``groups``
+    (tuples of group values) fixes which groups are returned, including
+    ones with no rows at all; by default every group present in ``df``.
+    """
+    group_cols = list(group_cols)
+    months = [int(m) for m in months]
+    out_col = out_col or value_col
+
+    data = df.loc[df[value_col].notna() & df[month_col].notna(), group_cols + [month_col, value_col]]
+    agg = data.groupby(group_cols + [month_col])[value_col].agg(['sum', 'count'])
+
+    # every month that can contribute, so the cumulative sums see rows outside ``months`` too
+    all_months = sorted(set(months) | {int(m) for m in agg.index.get_level_values(month_col)})
+    sums = agg['sum'].unstack(month_col).reindex(columns=all_months, fill_value=0).fillna(0)
+    counts = agg['count'].unstack(month_col).reindex(columns=all_months, fill_value=0).fillna(0)
+
+    if groups is not None:
+        index = pd.MultiIndex.from_tuples([tuple(g) for g in groups], names=group_cols) \
+            if len(group_cols) > 1 else pd.Index([g[0] if isinstance(g, tuple) else g for g in groups],
+                                                 name=group_cols[0])
+        sums = sums.reindex(index, fill_value=0)
+        counts = counts.reindex(index, fill_value=0)
+
+    cum_counts = counts.cumsum(axis=1)
+    means = sums.cumsum(axis=1).div(cum_counts.where(cum_counts > 0, np.nan))[months]
+    if decimals is not None:
+        means = means.round(decimals)
+
+    long = means.reset_index().melt(id_vars=group_cols, var_name='Month', value_name=out_col)
+    # melt lays months out one after the other; put each group's months back together
+    order = np.tile(np.arange(len(means)), len(months))
+    return long.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+
+
+def group_curve(rolling: pd.DataFrame, group_cols: Sequence[str], key: Tuple, value_col: str) -> pd.DataFrame:
+    """The ``Month`` / ``value_col`` curve of one group out of a ``ytd_rolling_mean`` result."""
+    mask = np.ones(len(rolling), dtype=bool)
+    for col, val in zip(group_cols, key):
+        mask &= (rolling[col] == val).to_numpy()
+    return rolling.loc[mask, ['Month', value_col]].reset_index(drop=True)
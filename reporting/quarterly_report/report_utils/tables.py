@@ -2,7 +2,9 @@ import pandas as pd
 from datetime import datetime, date
 from great_tables import GT, md, google_font, style, loc, html
 import sqlite3
+from ingestion.sqlite_pool import connection
 from ingestion.db_utils import insert_variable, upsert_report_param 
+from ingestion.artifact_store import save_frame, load_frames
 import logging
 from typing import Optional, Dict, Union
 
@@ -272,6 +274,7 @@ def build_commitment_summary_table(df: pd.DataFrame, current_year: int, report:
                 anchor="table_1a",
                 gt_table=tbl
             )
+            save_frame(report, "BudgetModule", "table_1a_commitment_summary", agg, db_path, anchor="table_1a")
             logging.debug("Successfully stored table_1a_commitment_summary")
         except Exception as e:
             logging.error(f"Error storing table: {str(e)}")
@@ -520,6 +523,8 @@ def build_payment_summary_tables(
                         anchor=f"table_2a_{programme}",
                         gt_table=tbl
                     )
+                    save_frame(report, "BudgetModule", f"table_2a_{programme}_data", agg, db_path,
+                               anchor=f"table_2a_{programme}")
                     logging.debug(f"Stored table_2a_{programme}_data ({len(agg)} rows)")
                     time.sleep(0.2)  # Small delay between tables
                 except Exception as e:
@@ -957,6 +962,7 @@ def build_commitment_detail_table_2(df: pd.DataFrame, current_year: int, report:
         anchor=f"table_1c",
         gt_table=tbl,
     )
+    save_frame(report, "BudgetModule", "table_1c_L1_previous_year", agg_with_subtotals, db_path, anchor="table_1c")
 
     logging.debug("Stored 1c table and data")
 
@@ -966,18 +972,17 @@ def build_commitment_detail_table_2(df: pd.DataFrame, current_year: int, report:
 # 1. build the context in ONE pass directly from the table
 # ------------------------------------------------------------------
 def build_docx_context(report_name: str, db_path: str , table_colors: dict = None) -> dict:
-    con = sqlite3.connect(db_path)
-    df = pd.read_sql_query(
-        """
-        SELECT anchor_name, value, gt_image
-        FROM   report_variables
-        WHERE  report_name = ?
-        ORDER  BY created_at
-        """,
-        con,
-        params=(report_name,),
-    )
-    con.close()
+    with connection(db_path) as con:
+        df = pd.read_sql_query(
+            """
+            SELECT anchor_name, value, gt_image
+            FROM   report_variables
+            WHERE  report_name = ?
+            ORDER  BY created_at
+            """,
+            con,
+            params=(report_name,),
+        )
 
     context = {}
     for _, row in df.iterrows():
@@ -999,7 +1004,7 @@ def build_docx_context(report_name: str, db_path: str , table_colors: dict = Non
 def build_budget_summary_table(conn, db_path, report, cutoff, table_colors):
     import pandas as pd
     from datetime import datetime
-    from ingestion.db_utils import load_report_params, fetch_vars_for_report, fetch_latest_table_data, insert_variable
+    from ingestion.db_utils import load_report_params, fetch_latest_table_data, insert_variable
     from great_tables import GT, style, loc
     import logging
 
@@ -1019,9 +1024,9 @@ def build_budget_summary_table(conn, db_path, report, cutoff, table_colors):
         outline_b = '2px'
 
         # Commitment Summary
-        report_variables = fetch_vars_for_report(report, db_path)
-        df_comm = pd.DataFrame(report_variables.get("table_1a"))
-        l1_comm = pd.DataFrame(report_variables.get("table_1c"))
+        budget_tables = load_frames(report, ["table_1a", "table_1c", "table_2a_H2020", "table_2a_HE"], db_path)
+        df_comm = pd.DataFrame(budget_tables["table_1a"])
+        l1_comm = pd.DataFrame(budget_tables["table_1c"])
 
         tot = df_comm.iloc[-1]
         ratio_pct = f"{tot['ratio_consumed_of_L1_and_L2_against_Commitment_Appropriations']*100:.2f}%"
@@ -1060,8 +1065,8 @@ def build_budget_summary_table(conn, db_path, report, cutoff, table_colors):
         })
 
         # Payment Summary
-        df_p_h2020 = pd.DataFrame(report_variables.get("table_2a_H2020"))
-        df_p_he = pd.DataFrame(report_variables.get("table_2a_HE"))
+        df_p_h2020 = pd.DataFrame(budget_tables["table_2a_H2020"])
+        df_p_he = pd.DataFrame(budget_tables["table_2a_HE"])
 
         total_p_cons = df_p_h2020.iloc[-1]['Paid_Amount'] + df_p_he.iloc[-1]['Paid_Amount']
         total_p_appr = df_p_h2020.iloc[-1]['Available_Payment_Appropriations'] + df_p_he.iloc[-1]['Available_Payment_Appropriations']
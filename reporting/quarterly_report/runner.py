@@ -1,9 +1,12 @@
 # In reporting/quarterly_report/runner.py
-from ingestion.db_utils import list_report_modules, insert_variable
+from ingestion.db_utils import list_report_modules
 from importlib import import_module
-from reporting.quarterly_report.utils import get_modules, RenderContext,Database
-from reporting.quarterly_report.utils import BaseModule
-import streamlit as st
+from reporting.quarterly_report.utils import get_modules
+from reporting.quarterly_report.scheduler import (
+    run_modules, run_modules_inline, new_context,
+    DEFAULT_MODULE_TIMEOUT, STATUS_SUCCESS, STATUS_SKIPPED, STATUS_REUSED,
+)
+from ingestion import profiler
 
 
 pkg = import_module(__package__)
@@ -12,42 +15,67 @@ MODULES = get_modules("Quarterly_Report")
 def _ordered_enabled(report_name, db_path):
     df = list_report_modules(report_name, db_path)
     if df.empty:
-        return MODULES.values()
+        return dict(MODULES)
     enabled = df[df.enabled == 1].sort_values("run_order")
-    return [MODULES[m] for m in enabled.module_name if m in MODULES]
+    return {m: MODULES[m] for m in enabled.module_name if m in MODULES}
 
-def run_report(cutoff_date, tolerance, db_path, selected_modules=None):
-    ctx = RenderContext(
-        db=Database(db_path),
-        params={"tolerance_days": tolerance},
-        cutoff=cutoff_date,
-        out={"tables": {}, "charts": {}}
-    )
-    ctx.report_name = "Quarterly_Report"  # manually inject this attribute
+def _log_to_docx(result):
+    import streamlit as st   # not needed by background job workers (reporting/jobs.py)
 
-    results = []
-    modules_to_run = selected_modules.values() if selected_modules else _ordered_enabled(ctx.report_name, db_path)
+    mod_name, state, msg = result
+    if "staged_docx" in st.session_state:
+        if state == STATUS_SUCCESS:
+            st.session_state.staged_docx.add_paragraph(f"✅ {mod_name} completed successfully.")
+        elif state == STATUS_REUSED:
+            st.session_state.staged_docx.add_paragraph(f"♻️ {mod_name} unchanged, previous outputs reused.")
+        elif state == STATUS_SKIPPED:
+            st.session_state.staged_docx.add_paragraph(f"⏭️ {mod_name} skipped: {msg}")
+        else:
+            st.session_state.staged_docx.add_paragraph(f"❌ {mod_name} failed: {msg}")
 
-    for mod_cls in modules_to_run:
-        mod_name = mod_cls.__name__
-        try:
-            mod_instance = mod_cls()
-            ctx = mod_instance.run(ctx)
+def run_report(cutoff_date, tolerance, db_path, selected_modules=None,
+               max_workers=None, timeout=DEFAULT_MODULE_TIMEOUT, continue_on_failure=True,
+               incremental=False, profile=None, on_result=None, on_start=None, cancel=None):
+    """
+    Run the report modules along their dependency graph (see scheduler.py).
 
-            for k, v in ctx.out.items():
-                insert_variable(ctx.report_name, mod_name, k, v, db_path, anchor=k)
+    Independent modules run in parallel worker processes; ``max_workers=1``
+    runs everything in-process on a single shared context instead.
+    ``incremental`` skips modules whose inputs are unchanged since their last run.
+    ``profile`` ("off" / "summary" / "detailed", default ``REPORT_PROFILE``)
+    records timing spans to ``run_metrics`` under ``ctx.run_id``.
+    ``on_result`` (default: log to the staged DOCX) / ``on_start`` are called per
+    module and ``cancel`` stops the run once it returns True (see scheduler.py).
+    Returns ``(ctx, [(module, status, error), ...])``.
+    """
+    ctx = new_context(cutoff_date, tolerance, db_path, "Quarterly_Report")
+    ctx.run_id = profiler.start_run(ctx.report_name, profile)
 
-            if "staged_docx" in st.session_state:
-                st.session_state.staged_docx.add_paragraph(f"✅ {mod_name} completed successfully.")
+    on_result = on_result or _log_to_docx
+    modules_to_run = dict(selected_modules) if selected_modules else _ordered_enabled(ctx.report_name, db_path)
 
-            results.append((mod_name, "✅ Success", None))
-
-        except Exception as e:
-            error_msg = str(e)
-            results.append((mod_name, "❌ Failed", error_msg))
-
-            if "staged_docx" in st.session_state:
-                st.session_state.staged_docx.add_paragraph(f"❌ {mod_name} failed: {error_msg}")
-            break
+    try:
+        with profiler.span(ctx.report_name, "run", modules=len(modules_to_run), max_workers=max_workers):
+            if max_workers == 1:
+                return run_modules_inline(
+                    modules_to_run, ctx, db_path,
+                    continue_on_failure=continue_on_failure,
+                    on_result=on_result,
+                    incremental=incremental,
+                    on_start=on_start,
+                    cancel=cancel,
+                )
 
+            results = run_modules(
+                modules_to_run, cutoff_date, tolerance, db_path, ctx.report_name,
+                max_workers=max_workers,
+                timeout=timeout,
+                continue_on_failure=continue_on_failure,
+                on_result=on_result,
+                incremental=incremental,
+                on_start=on_start,
+                cancel=cancel,
+            )
+    finally:
+        profiler.flush(db_path)
     return ctx, results
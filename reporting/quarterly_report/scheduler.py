@@ -0,0 +1,365 @@
+# reporting/quarterly_report/scheduler.py
+"""
+Dependency-aware module scheduler.
+
+Every module declares what it reads and writes (see ``BaseModule``):
+    reads_aliases / writes_aliases  → uploaded snapshot tables
+    reads_vars    / writes_vars     → report_variables anchors
+A module depends on every other module that writes something it reads;
+``reads_vars = ("*",)`` makes it depend on all the others (CommentsModule).
+
+Independent modules are run concurrently, one worker process each. Every
+worker opens its own Database / RenderContext, because sqlite connections
+cannot cross process boundaries, and persists its own ``ctx.out``.
+
+With ``incremental=True`` a module whose input fingerprint is unchanged
+since its last successful run is not run; its previous report_variables
+are reused (see fingerprints.py).
+
+``cancel`` (a callable polled between scheduler checks, see reporting/jobs.py)
+stops a run: running workers are terminated and every module without a
+result is reported as cancelled.
+
+Each module run is a profiler span (see ingestion/profiler.py); workers
+join the run id of the parent and write their own ``run_metrics`` rows.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple, Type
+
+from reporting.quarterly_report.utils import BaseModule, RenderContext, Database
+from reporting.quarterly_report.fingerprints import clear_fingerprint, is_unchanged, save_fingerprint
+from ingestion import profiler
+
+logger = logging.getLogger(__name__)
+
+ALL_VARS = "*"
+DEFAULT_MAX_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_MODULE_TIMEOUT = 30 * 60      # seconds, overridable per module via ``timeout_s``
+POLL_INTERVAL = 0.5                   # seconds between scheduler checks
+
+STATUS_SUCCESS = "✅ Success"
+STATUS_FAILED = "❌ Failed"
+STATUS_SKIPPED = "⏭️ Skipped"
+STATUS_REUSED = "♻️ Unchanged"
+STATUS_CANCELLED = "🛑 Cancelled"
+OK_STATUSES = (STATUS_SUCCESS, STATUS_REUSED)   # outputs are in report_variables
+REUSED_MSG = "Inputs unchanged since the last run, previous outputs reused"
+CANCELLED_MSG = "Run cancelled"
+
+Result = Tuple[str, str, Optional[str]]   # (module class name, status, error message)
+
+
+# ──────────────────────────────────────────────────────────────
+# DAG
+# ──────────────────────────────────────────────────────────────
+@dataclass
+class ModuleNode:
+    key: str
+    cls: Type[BaseModule]
+    depends_on: Set[str] = field(default_factory=set)   # hard deps (explicit reads)
+    runs_after: Set[str] = field(default_factory=set)   # soft deps ("*" readers)
+
+
+def build_module_graph(modules: Dict[str, Type[BaseModule]]) -> Dict[str, ModuleNode]:
+    """Build the dependency graph from the modules' read/write declarations."""
+    nodes = {key: ModuleNode(key, cls) for key, cls in modules.items()}
+
+    for key, node in nodes.items():
+        reads_vars = set(node.cls.reads_vars)
+        reads_aliases = set(node.cls.reads_aliases)
+
+        for other_key, other in nodes.items():
+            if other_key == key:
+                continue
+            if ALL_VARS in reads_vars:
+                # "*" readers never wait on each other, otherwise they would deadlock
+                if ALL_VARS not in other.cls.reads_vars:
+                    node.runs_after.add(other_key)
+                continue
+            if reads_vars & set(other.cls.writes_vars) or reads_aliases & set(other.cls.writes_aliases):
+                node.depends_on.add(other_key)
+
+    topological_order(nodes)  # raises on cycles
+    return nodes
+
+
+def topological_order(nodes: Dict[str, ModuleNode]) -> List[str]:
+    """Kahn's algorithm; ties keep the configured run order."""
+    remaining = {k: set(n.depends_on | n.runs_after) for k, n in nodes.items()}
+    order: List[str] = []
+    while remaining:
+        ready = [k for k, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Cyclic module dependencies: {sorted(remaining)}")
+        for k in ready:
+            order.append(k)
+            del remaining[k]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+# ──────────────────────────────────────────────────────────────
+# EXECUTION
+# ──────────────────────────────────────────────────────────────
+def new_context(cutoff, tolerance, db_path, report_name) -> RenderContext:
+    ctx = RenderContext(
+        db=Database(db_path),
+        params={"tolerance_days": tolerance},
+        cutoff=cutoff,
+        out={"tables": {}, "charts": {}}
+    )
+    ctx.report_name = report_name  # manually inject this attribute
+    return ctx
+
+
+def upstream_names(modules: Dict[str, Type[BaseModule]], node: ModuleNode) -> List[str]:
+    """Class names of the modules ``node`` runs after (their fingerprints feed into its own)."""
+    return sorted(modules[k].__name__ for k in node.depends_on | node.runs_after)
+
+
+def execute_module(mod_cls: Type[BaseModule], ctx: RenderContext, db_path,
+                   upstream: Tuple[str, ...] = ()) -> RenderContext:
+    """
+    Run one module and persist whatever it left in ``ctx.out``.
+    All variables the module writes go through one batched transaction.
+    Charts render in the background while the module runs; if any failed,
+    the module fails (its other variables are kept). The inputs it read
+    are fingerprinted for later incremental runs.
+    """
+    from ingestion.db_utils import insert_variable, variable_batch
+    from ingestion.input_tracker import track_inputs
+
+    tolerance = ctx.params.get("tolerance_days")
+    clear_fingerprint(db_path, ctx.report_name, mod_cls)
+    try:
+        with profiler.module_span(mod_cls.__name__), track_inputs() as inputs:
+            with variable_batch(db_path) as batch, ctx.cache.activate(db_path):
+                ctx = mod_cls().run(ctx)
+                for k, v in ctx.out.items():
+                    insert_variable(ctx.report_name, mod_cls.__name__, k, v, db_path, anchor=k)
+    finally:
+        profiler.flush(db_path)
+    if batch.failed_renders:
+        failed = ", ".join(f"{var} ({err})" for var, err in batch.failed_renders)
+        raise RuntimeError(f"{len(batch.failed_renders)} chart(s) failed to render: {failed}")
+    save_fingerprint(db_path, ctx.report_name, mod_cls, ctx.cutoff, tolerance, inputs.inputs, upstream,
+                     outputs=batch.var_names)
+    return ctx
+
+
+def _shutdown_renderers():
+    """Close the worker's warm browser pool and chart render pool, if the module used them."""
+    import sys
+    render_service = sys.modules.get("ingestion.render_service")
+    if render_service is not None:
+        render_service.shutdown_browser_pool()
+    chart_renderer = sys.modules.get("ingestion.chart_renderer")
+    if chart_renderer is not None:
+        chart_renderer.shutdown_chart_pool()
+
+
+def _module_worker(key, mod_cls, cutoff, tolerance, db_path, report_name, upstream, results_q,
+                   profile=(None, profiler.MODE_OFF)):
+    """Process entry point: fresh context, run, report back through the queue."""
+    try:
+        profiler.attach_run(profile[0], report_name, profile[1])
+        ctx = new_context(cutoff, tolerance, db_path, report_name)
+        try:
+            execute_module(mod_cls, ctx, db_path, upstream)
+        finally:
+            ctx.db.conn.close()
+            _shutdown_renderers()
+        results_q.put((key, STATUS_SUCCESS, None))
+    except Exception as e:
+        logger.debug(traceback.format_exc())
+        results_q.put((key, STATUS_FAILED, str(e)))
+
+
+def run_modules(
+    modules: Dict[str, Type[BaseModule]],
+    cutoff,
+    tolerance,
+    db_path,
+    report_name: str,
+    max_workers: Optional[int] = None,
+    timeout: Optional[float] = DEFAULT_MODULE_TIMEOUT,
+    continue_on_failure: bool = True,
+    on_result: Optional[Callable[[Result], None]] = None,
+    incremental: bool = False,
+    on_start: Optional[Callable[[str], None]] = None,
+    cancel: Optional[Callable[[], bool]] = None,
+) -> List[Result]:
+    """
+    Run ``modules`` (key → class, in configured order) following the DAG.
+
+    • up to ``max_workers`` modules run at once, each in its own process
+    • a module exceeding its timeout is terminated and reported as failed
+    • with ``continue_on_failure`` a failure only skips the modules that
+      explicitly read its outputs; "*" readers still run on what is there
+    • without it, nothing new is started after the first failure
+    • with ``incremental`` unchanged modules are reported as reused, not run
+    • ``on_start(name)`` is called as a module's worker starts; once
+      ``cancel()`` returns True the run is stopped (see module docstring)
+
+    Returns one result per module, in configured order.
+    """
+    nodes = build_module_graph(modules)
+    max_workers = max(1, max_workers or DEFAULT_MAX_WORKERS)
+    mp_ctx = mp.get_context("spawn")   # no forked sqlite handles / streamlit state
+    results_q = mp_ctx.Queue()
+
+    pending: List[str] = topological_order(nodes)
+    running: Dict[str, Tuple[mp.Process, float]] = {}
+    outcome: Dict[str, Result] = {}
+    stop_launching = False
+
+    def _finish(key, status, msg):
+        res = (modules[key].__name__, status, msg)
+        outcome[key] = res
+        running.pop(key, None)
+        if status in OK_STATUSES:
+            logger.info(f"{key}: {status}")
+        else:
+            logger.warning(f"{key}: {status} {msg or ''}")
+        if on_result:
+            on_result(res)
+
+    def _drain(block: bool):
+        try:
+            while True:
+                key, status, msg = results_q.get(timeout=POLL_INTERVAL) if block else results_q.get_nowait()
+                block = False
+                proc, _ = running.get(key, (None, None))
+                if proc is not None:
+                    proc.join()
+                    _finish(key, status, msg)
+        except queue.Empty:
+            pass
+
+    while pending or running:
+        # 0. cancellation: stop the workers, nothing new starts
+        if cancel is not None and cancel():
+            for key, (proc, _) in list(running.items()):
+                proc.terminate()
+                proc.join()
+                _finish(key, STATUS_CANCELLED, CANCELLED_MSG)
+            for key in pending:
+                _finish(key, STATUS_CANCELLED, CANCELLED_MSG)
+            pending.clear()
+            break
+
+        # 1. start whatever is ready
+        for key in list(pending):
+            node = nodes[key]
+            if any(outcome.get(d, (None, None))[1] not in (None, *OK_STATUSES) for d in node.depends_on):
+                pending.remove(key)
+                failed = [d for d in node.depends_on if d in outcome and outcome[d][1] not in OK_STATUSES]
+                _finish(key, STATUS_SKIPPED, f"Upstream module(s) failed: {', '.join(sorted(failed))}")
+                continue
+            if stop_launching:
+                pending.remove(key)
+                _finish(key, STATUS_SKIPPED, "Run stopped after an earlier failure")
+                continue
+            if len(running) >= max_workers:
+                break
+            if not (node.depends_on | node.runs_after) <= outcome.keys():
+                continue
+
+            pending.remove(key)
+            upstream = tuple(upstream_names(modules, node))
+            if incremental and is_unchanged(db_path, report_name, node.cls, cutoff, tolerance, upstream):
+                _finish(key, STATUS_REUSED, REUSED_MSG)
+                continue
+            proc = mp_ctx.Process(
+                target=_module_worker,
+                args=(key, node.cls, cutoff, tolerance, db_path, report_name, upstream, results_q,
+                      profiler.current_run()),
+                name=f"module-{key}",
+                daemon=True,
+            )
+            proc.start()
+            running[key] = (proc, time.monotonic())
+            logger.info(f"{key}: started (pid {proc.pid})")
+            if on_start:
+                on_start(node.cls.__name__)
+
+        if not running:
+            continue
+
+        # 2. collect finished modules
+        _drain(block=True)
+
+        # 3. timeouts and workers that died without reporting
+        now = time.monotonic()
+        for key, (proc, started) in list(running.items()):
+            limit = modules[key].timeout_s or timeout
+            if limit and now - started > limit:
+                proc.terminate()
+                proc.join()
+                _finish(key, STATUS_FAILED, f"Timed out after {int(limit)}s")
+            elif not proc.is_alive():
+                _drain(block=False)   # the result may have landed right before exit
+                if key in running:
+                    proc.join()
+                    _finish(key, STATUS_FAILED, f"Worker exited with code {proc.exitcode}")
+
+        if not continue_on_failure and any(r[1] == STATUS_FAILED for r in outcome.values()):
+            stop_launching = True
+
+    results_q.close()
+    return [outcome[k] for k in modules]
+
+
+def run_modules_inline(
+    modules: Dict[str, Type[BaseModule]],
+    ctx: RenderContext,
+    db_path,
+    continue_on_failure: bool = True,
+    on_result: Optional[Callable[[Result], None]] = None,
+    incremental: bool = False,
+    on_start: Optional[Callable[[str], None]] = None,
+    cancel: Optional[Callable[[], bool]] = None,
+) -> Tuple[RenderContext, List[Result]]:
+    """Serial fallback (``max_workers=1``): same DAG order and semantics, one shared context, no timeouts."""
+    nodes = build_module_graph(modules)
+    outcome: Dict[str, Result] = {}
+    stopped = cancelled = False
+
+    for key in topological_order(nodes):
+        mod_cls = modules[key]
+        upstream = tuple(upstream_names(modules, nodes[key]))
+        failed = [d for d in nodes[key].depends_on if outcome[d][1] not in OK_STATUSES]
+        cancelled = cancelled or (cancel is not None and cancel())
+        if cancelled:
+            res = (mod_cls.__name__, STATUS_CANCELLED, CANCELLED_MSG)
+        elif failed:
+            res = (mod_cls.__name__, STATUS_SKIPPED, f"Upstream module(s) failed: {', '.join(sorted(failed))}")
+        elif stopped:
+            res = (mod_cls.__name__, STATUS_SKIPPED, "Run stopped after an earlier failure")
+        elif incremental and is_unchanged(db_path, ctx.report_name, mod_cls, ctx.cutoff,
+                                          ctx.params.get("tolerance_days"), upstream):
+            res = (mod_cls.__name__, STATUS_REUSED, REUSED_MSG)
+        else:
+            if on_start:
+                on_start(mod_cls.__name__)
+            try:
+                ctx = execute_module(mod_cls, ctx, db_path, upstream)
+                res = (mod_cls.__name__, STATUS_SUCCESS, None)
+            except Exception as e:
+                res = (mod_cls.__name__, STATUS_FAILED, str(e))
+                stopped = not continue_on_failure
+        outcome[key] = res
+        if on_result:
+            on_result(res)
+
+    _shutdown_renderers()
+    return ctx, [outcome[k] for k in modules]
@@ -1,9 +1,23 @@
 ## reporting/quarterly/utils.py   (simplified)
-from typing import Any, Dict
-from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple, Type
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+import importlib, threading
 import sqlite3, pandas as pd
+from ingestion.run_cache import RunCache
+from ingestion.sqlite_pool import open_connection
 
 class BaseModule:
+    # Data-flow declarations used by the scheduler to build the run DAG.
+    # Aliases are uploaded snapshot tables, vars are report_variables anchors.
+    # reads_vars = ("*",) means "runs after every other module".
+    reads_aliases: Tuple[str, ...] = ()
+    writes_aliases: Tuple[str, ...] = ()
+    reads_vars: Tuple[str, ...] = ()
+    writes_vars: Tuple[str, ...] = ()
+    timeout_s: Optional[int] = None  # per-module override of the run timeout
+    code_version: Optional[str] = None  # bump to force re-runs in incremental mode (default: source hash)
+
     def run(self, ctx, cutoff, db_path):
         raise NotImplementedError
     
@@ -13,10 +27,11 @@ class RenderContext:
     params: dict                    # report parameters (already looked up)
     cutoff: str                     # ISO date string
     out: Dict[str, Dict[str, Any]]  # artefacts collected along the way
+    cache: RunCache = field(default_factory=RunCache)  # loaded / derived frames shared within the run
 
 class Database:                     # very thin helper
     def __init__(self, path: str):
-        self.conn = sqlite3.connect(path)
+        self.conn = open_connection(path)   # tuned (WAL …), owned by the context
     def read_table(self, name) -> pd.DataFrame:
         return pd.read_sql_query(f"SELECT * FROM {name}", self.conn)
 
@@ -26,3 +41,51 @@ def get_modules(report_name):
     return MODULES
 
 
+class LazyModuleRegistry(Mapping):
+    """
+    Module key → BaseModule class, registered as ``"package.module:ClassName"``
+    entry points and imported on first access.
+
+    Listing keys (UI pickers, report_modules checks) imports nothing, so a
+    module's code – and the renderer / LLM libraries it pulls in – only loads
+    when a run, the DAG or a page actually asks for that class.
+    """
+
+    def __init__(self, entry_points: Dict[str, str]):
+        self._entry_points = dict(entry_points)
+        self._loaded: Dict[str, Type[BaseModule]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, key: str, entry_point: str) -> None:
+        with self._lock:
+            self._entry_points[key] = entry_point
+            self._loaded.pop(key, None)
+
+    def entry_point(self, key: str) -> str:
+        return self._entry_points[key]
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self._loaded
+
+    def __getitem__(self, key: str) -> Type[BaseModule]:
+        cls = self._loaded.get(key)
+        if cls is None:
+            module_path, _, attr = self._entry_points[key].partition(":")
+            with self._lock:
+                cls = self._loaded.get(key)
+                if cls is None:
+                    cls = self._loaded[key] = getattr(importlib.import_module(module_path), attr)
+        return cls
+
+    def __contains__(self, key) -> bool:        # Mapping's default would import the module
+        return key in self._entry_points
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entry_points)
+
+    def __len__(self) -> int:
+        return len(self._entry_points)
+
+    def __repr__(self) -> str:
+        loaded = [k for k in self._entry_points if k in self._loaded]
+        return f"LazyModuleRegistry({list(self._entry_points)}, loaded={loaded})"
@@ -0,0 +1,172 @@
+# tests/test_call_types.py
+"""
+Equivalence of the vectorised call-type resolution (report_utils/call_types.py)
+with the per-row helpers it replaced in modules/payments.py. The reference
+helpers below are the former row functions, copied unchanged in behaviour.
+"""
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from reporting.quarterly_report.report_utils.call_types import (
+    CALLS_TYPES_LIST,
+    apply_po_fallback,
+    classify_call_type,
+    extract_project_numbers,
+    resolve_call_types,
+)
+
+
+# ──────────────────────────────────────────────────────────────
+# REFERENCE (former per-row helpers of modules/payments.py)
+# ──────────────────────────────────────────────────────────────
+def determine_po_category(row):
+    instrument = str(row.get('Instrument', '')).strip()
+    topic = str(row.get('Topic', '')).strip()
+    if topic and any(call_type in topic for call_type in CALLS_TYPES_LIST):
+        return next(call_type for call_type in CALLS_TYPES_LIST if call_type in topic).upper()
+    elif instrument and any(call_type in instrument for call_type in CALLS_TYPES_LIST):
+        return next(call_type for call_type in CALLS_TYPES_LIST if call_type in instrument).upper()
+    return ''
+
+
+def extract_project_number(row):
+    payment_type = row['v_check_payment_type']
+    inv_text = row['Inv Text']
+    if pd.isna(payment_type):
+        return payment_type
+    payment_type_str = str(payment_type)
+    rp_patterns = [r'RP\d+=(?:FP|IP)', r'RP\d+-(?:FP|IP)']
+    if any(re.search(pattern, payment_type_str) for pattern in rp_patterns):
+        if pd.notna(inv_text):
+            number_match = re.match(r'^(\d+)', str(inv_text).strip())
+            if number_match:
+                return number_match.group(1)
+        return payment_type
+    return payment_type
+
+
+def map_call_type_with_experts(row, grant_map):
+    project_num = row['project_number']
+    contract_type = row['v_payment_type']
+    try:
+        numeric_key = int(project_num)
+        if numeric_key in grant_map:
+            return grant_map[numeric_key]
+    except (ValueError, TypeError):
+        pass
+    if str(project_num).upper() == 'EXPERTS' or str(contract_type).upper() == 'EXPERTS':
+        return 'EXPERTS'
+    return project_num
+
+
+def safe_map_project_to_call_type(project_num, mapping_dict):
+    try:
+        if pd.isna(project_num):
+            return None
+        if isinstance(project_num, str):
+            if project_num.endswith('.0'):
+                numeric_key = int(project_num[:-2])
+            else:
+                numeric_key = int(float(project_num))
+        else:
+            numeric_key = int(float(project_num))
+        if numeric_key in mapping_dict:
+            result = mapping_dict[numeric_key]
+            if pd.notna(result) and result != '':
+                return result
+    except (ValueError, TypeError, OverflowError):
+        pass
+    return None
+
+
+def apply_conditional_mapping(row, po_mapping_dict):
+    current_call_type = row['call_type']
+    should_map = (
+        pd.isna(current_call_type)
+        or current_call_type == ''
+        or current_call_type not in CALLS_TYPES_LIST
+        or current_call_type in ['EXPERTS', 'CSA']
+    )
+    if should_map:
+        mapped_value = safe_map_project_to_call_type(row['PO Purchase Order Key'], po_mapping_dict)
+        return mapped_value if mapped_value is not None else current_call_type
+    return current_call_type
+
+
+def _assert_same(actual: pd.Series, expected: pd.Series) -> None:
+    assert len(actual) == len(expected)
+    for i, (a, e) in enumerate(zip(actual.tolist(), expected.tolist())):
+        if pd.isna(e):
+            assert pd.isna(a), f"row {i}: expected {e!r}, got {a!r}"
+        else:
+            assert a == e and type(a) is type(e), f"row {i}: expected {e!r}, got {a!r}"
+
+
+# ──────────────────────────────────────────────────────────────
+# INPUTS
+# ──────────────────────────────────────────────────────────────
+GRANT_MAP = {101: 'STG', 202: 'CSA', 4500053782: 'ADG', 303: ''}
+PO_MAP = {4500053782: 'POC', 7: 'CSA', 8: ''}
+
+PROJECTS = [101, '101', '101.0', 101.0, 101.7, np.nan, None, 'EXPERTS', 'experts',
+            '202', 202, '999', 'abc', ' 101 ', '4500053782', 303]
+
+
+# ──────────────────────────────────────────────────────────────
+# TESTS
+# ──────────────────────────────────────────────────────────────
+def test_classify_call_type_matches_row_helper():
+    df = pd.DataFrame({
+        'Topic': ['ERC-2024-StG', 'HORIZON-CSA-01', np.nan, '', 'ERC-2024-POC', 'AdG and CoG', 'nothing'],
+        'Instrument': ['ERC-ADG', 'ERC-SyG', 'ERC-CSA', 'ERC-COG', np.nan, '', np.nan],
+    })
+    expected = df.apply(determine_po_category, axis=1)
+    _assert_same(classify_call_type(df, 'Topic', 'Instrument'), expected)
+
+
+def test_classify_call_type_missing_column():
+    df = pd.DataFrame({'Topic': ['ERC-StG', 'x']})
+    expected = df.apply(determine_po_category, axis=1)
+    _assert_same(classify_call_type(df, 'Topic', 'Instrument'), expected)
+
+
+def test_extract_project_numbers_matches_row_helper():
+    df = pd.DataFrame({
+        'v_check_payment_type': ['RP2=FP', 'RP3-IP', 'RP1=FP', 'RP4=IP', np.nan, 'PF', 'RP2=XX',
+                                 'RP10-FP', 123.0, 'RP1=FP'],
+        'Inv Text': ['101234 final', np.nan, 'no digits', '  555 padded', '777', '888', '999',
+                     '4500053782.0', '42', 101.0],
+    })
+    expected = df.apply(extract_project_number, axis=1)
+    _assert_same(extract_project_numbers(df), expected)
+
+
+@pytest.mark.parametrize('payment_type', ['PF', 'EXPERTS', 'experts', np.nan])
+def test_resolve_call_types_matches_row_helper(payment_type):
+    df = pd.DataFrame({
+        'project_number': pd.Series(PROJECTS, dtype=object),
+        'v_payment_type': payment_type,
+    })
+    expected = df.apply(map_call_type_with_experts, axis=1, grant_map=GRANT_MAP)
+    actual = resolve_call_types(
+        df['project_number'], GRANT_MAP,
+        experts=df['v_payment_type'].astype(str).str.upper().eq('EXPERTS'),
+    )
+    _assert_same(actual, expected)
+
+
+def test_apply_po_fallback_matches_row_helper():
+    call_types = ['STG', 'CSA', 'EXPERTS', np.nan, '', 'ZZZ', 'StG', 'ADG', 'CSA', 'EXPERTS', np.nan]
+    po_keys = [4500053782, '4500053782.0', '4500053782', np.nan, 'abc', 4500053782.0,
+               '7', '7.0', 8, 'abc.0', '12.5']
+    df = pd.DataFrame({
+        'call_type': pd.Series(call_types, dtype=object),
+        'PO Purchase Order Key': pd.Series(po_keys, dtype=object),
+    })
+    expected = df.apply(apply_conditional_mapping, axis=1, po_mapping_dict=PO_MAP)
+    _assert_same(apply_po_fallback(df['call_type'], df['PO Purchase Order Key'], PO_MAP), expected)
@@ -0,0 +1,276 @@
+# tests/test_llm_client.py
+"""
+Concurrency of the pooled LLM client (report_utils/llm_client.py) against a
+local stub HTTP endpoint: ``run_ordered`` keeps input order, calls in flight
+never exceed the endpoint's limit, and the keep-alive session reuses its
+connections. Streamed generation (EnhancedReportGenerator._stream_with_model)
+stops a response bound to fail the quality check, never one that can pass,
+and frees the endpoint slot either way.
+"""
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from reporting.quarterly_report.report_utils.llm_client import LLMClient, run_ordered  # noqa: E402
+
+STUB_DELAY_S = 0.05
+STREAM_TOKEN_DELAY_S = 0.002
+
+
+class _StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+        self.requests = 0
+        self.connections = set()
+        self.stream_tokens: list = []        # NDJSON tokens sent for ``"stream": true``
+        self.tokens_sent = 0
+        self.client_disconnected = False
+        self.stream_done = threading.Event()
+
+
+def _handler(state: _StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, as Ollama
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if body.get("stream"):
+                return self._stream()
+            with state.lock:
+                state.in_flight += 1
+                state.requests += 1
+                state.peak = max(state.peak, state.in_flight)
+                state.connections.add(self.client_address)
+            time.sleep(STUB_DELAY_S)
+            with state.lock:
+                state.in_flight -= 1
+            payload = json.dumps({"response": body["prompt"], "done": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            chunks = [{"response": t, "done": False} for t in state.stream_tokens] + [{"response": "", "done": True}]
+            try:
+                for chunk in chunks:
+                    line = json.dumps(chunk).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    self.wfile.flush()
+                    state.tokens_sent += 1
+                    time.sleep(STREAM_TOKEN_DELAY_S)
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                state.client_disconnected = True
+                self.close_connection = True
+            finally:
+                state.stream_done.set()
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+
+@pytest.fixture
+def stub_endpoint():
+    state = _StubState()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/api/generate", state
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_run_ordered_returns_results_in_input_order():
+    def slow_square(i):
+        time.sleep(0.01 * (5 - i))   # later items finish first
+        return i * i
+
+    assert run_ordered(slow_square, range(5), max_workers=5) == [0, 1, 4, 9, 16]
+
+
+def test_run_ordered_returns_exceptions_in_place():
+    def fn(i):
+        if i == 1:
+            raise ValueError("bad item")
+        return i
+
+    for workers in (1, 3):
+        results = run_ordered(fn, [0, 1, 2], max_workers=workers)
+        assert results[0] == 0 and results[2] == 2
+        assert isinstance(results[1], ValueError)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_in_flight_calls_capped_per_endpoint(stub_endpoint, limit):
+    url, state = stub_endpoint
+    client = LLMClient(url, concurrency=limit)
+    try:
+        prompts = [f"p{i}" for i in range(8)]
+        answers = run_ordered(lambda p: client.post({"model": "m", "prompt": p}).json()["response"],
+                              prompts, max_workers=8)
+    finally:
+        client.close()
+
+    assert answers == prompts
+    assert state.requests == len(prompts)
+    assert state.peak == limit
+
+
+def test_session_reuses_connections(stub_endpoint):
+    url, state = stub_endpoint
+    client = LLMClient(url, concurrency=2)
+    try:
+        run_ordered(lambda i: client.post({"model": "m", "prompt": str(i)}), range(10), max_workers=4)
+        run_ordered(lambda i: client.post({"model": "m", "prompt": str(i)}), range(10), max_workers=4)
+    finally:
+        client.close()
+
+    assert state.requests == 20
+    # one keep-alive connection per slot, not one per call
+    assert len(state.connections) <= client.concurrency
+
+
+# ──────────────────────────────────────────────────────────────
+# STREAMED GENERATION: early stop only when the response cannot pass
+# ──────────────────────────────────────────────────────────────
+SENTENCES = [
+    "Payments were executed within the contractual time limits",
+    "The average time to pay improved compared with the previous quarter",
+    "Interim payments for HEU grants increased steadily",
+    "Experts payments remained stable at EUR 2 million",
+    "Final payments for H2020 projects accelerated in the period",
+    "Pre-financing payments followed the signature of new grants",
+    "Compliance with the payment deadlines stays above target",
+]
+
+
+@pytest.fixture
+def generator():
+    pytest.importorskip("langchain_core")
+    from reporting.quarterly_report.report_utils.enhanced_report_generator import EnhancedReportGenerator
+    return EnhancedReportGenerator()
+
+
+@pytest.fixture
+def streaming_endpoint(stub_endpoint, monkeypatch):
+    from reporting.quarterly_report.modules.comments import CommentsConfig
+    from reporting.quarterly_report.report_utils import llm_client
+
+    url, state = stub_endpoint
+    monkeypatch.setattr(CommentsConfig, "API_ENDPOINT", url)
+    monkeypatch.setitem(llm_client.ENDPOINT_CONCURRENCY, url, 1)
+    yield url, state
+    llm_client.close_llm_clients()
+
+
+def _tokens(text: str) -> list:
+    return [w + " " for w in text.split(" ")]
+
+
+def _stream(generator, state, text: str, word_limit: int):
+    state.stream_tokens = _tokens(text)
+    result = generator._stream_with_model({"model": "m", "prompt": "p"}, word_limit, verbose=False)
+    assert state.stream_done.wait(5)
+    return result
+
+
+def _assert_slot_released(url):
+    from reporting.quarterly_report.report_utils.llm_client import get_llm_client
+
+    slots = get_llm_client(url)._slots
+    assert slots.acquire(timeout=1)
+    slots.release()
+
+
+def _sentence(rng: random.Random) -> str:
+    """A random payment sentence; short ones (just over the 10-char floor) test the room estimate."""
+    if rng.random() < 0.3:
+        return rng.choice(["Payments rose", "TTP improved", "Costs fell", "EUR 5m paid", "HEU on time"])
+    return (f"{rng.choice(['H2020', 'HEU'])} {rng.choice(['interim', 'final', 'experts'])} payments "
+            f"reached EUR {rng.randint(1, 999)} million in {rng.choice(['January', 'March', 'June'])}")
+
+
+def _passing_responses(generator, word_limit: int, n: int = 40) -> list:
+    """Random responses that pass the quality check, filled up to its length limit with some repeats."""
+    rng = random.Random(7)
+    found = []
+    for _ in range(2000):
+        repeat_rate = rng.uniform(0, 0.45)
+        said, text = [], ""
+        while True:
+            sentence = rng.choice(said) if said and rng.random() < repeat_rate else _sentence(rng)
+            candidate = text + sentence + ". "
+            if len(candidate.strip()) > word_limit * 8:
+                break
+            said.append(sentence)
+            text = candidate
+        text = text.strip()
+        if generator._validate_response_quality(text, "payments", word_limit):
+            found.append(text)
+            if len(found) == n:
+                return found
+    raise AssertionError(f"only {len(found)} passing responses generated")
+
+
+@pytest.mark.parametrize("word_limit", [40, 100, 250])
+def test_early_abort_never_fires_on_a_passing_response(generator, word_limit):
+    for text in _passing_responses(generator, word_limit):
+        for end in range(1, len(text) + 1):
+            assert generator._early_abort_reason(text[:end], word_limit) is None, (text, end)
+
+
+def test_stream_cut_off_when_too_long(generator, streaming_endpoint):
+    url, state = streaming_endpoint
+    word_limit = 40
+    text = ". ".join(SENTENCES * 3) + "."
+    assert not generator._validate_response_quality(text, "payments", word_limit)
+
+    assert _stream(generator, state, text, word_limit) is None
+    assert state.client_disconnected
+    assert state.tokens_sent < len(state.stream_tokens)
+    _assert_slot_released(url)
+
+
+def test_stream_cut_off_when_repetitive(generator, streaming_endpoint):
+    url, state = streaming_endpoint
+    word_limit = 100
+    text = " ".join(["Payments were processed on time."] * 22)
+    assert len(text) <= word_limit * 8
+    assert not generator._validate_response_quality(text, "payments", word_limit)
+
+    assert _stream(generator, state, text, word_limit) is None
+    assert state.client_disconnected
+    assert state.tokens_sent < len(state.stream_tokens)
+    _assert_slot_released(url)
+
+
+def test_stream_passing_response_runs_to_completion(generator, streaming_endpoint):
+    url, state = streaming_endpoint
+    word_limit = 100
+    text = max(_passing_responses(generator, word_limit, n=10), key=len)
+
+    result = _stream(generator, state, text, word_limit)
+    assert result == text
+    assert generator._validate_response_quality(result, "payments", word_limit)
+    assert not state.client_disconnected
+    assert state.tokens_sent == len(state.stream_tokens) + 1
+    _assert_slot_released(url)
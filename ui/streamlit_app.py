@@ -12,14 +12,27 @@ from ingestion.db_utils import (
     define_expected_table, get_suggested_structure,
     load_report_params, upsert_report_param, save_report_object,
     get_report_object, list_report_objects, delete_report_object, get_variable_status,
-    fetch_vars_for_report, compute_cutoff_related_dates, fetch_gt_image, insert_variable, get_existing_rule_for_report
+    report_variables, compute_cutoff_related_dates, fetch_gt_image, insert_variable, get_existing_rule_for_report,
+    bump_generation,
 )
 from ingestion.report_check import check_report_readiness
+from ingestion.sqlite_pool import connection, open_connection
+from reporting.jobs import (
+    EVENT_FINISHED, EVENT_STARTED, JOB_CANCELLED, JOB_INTERRUPTED, JOB_QUEUED, JOB_RUNNING,
+    JOB_SUCCEEDED, RESUMABLE_STATES, job_status, list_jobs, request_cancel, resume_job, submit_job,
+)
+from reporting.quarterly_report.scheduler import (
+    OK_STATUSES, STATUS_CANCELLED, STATUS_REUSED, STATUS_SKIPPED, STATUS_SUCCESS,
+)
 import io, docx
 import pyperclip
 from pathlib import Path
 from io import BytesIO
 from ui_helpers.ui_tables_helpers import *
+from ui_helpers.cached_data import (
+    ensure_db, cached_all_reports, cached_report_modules, cached_variable_status,
+    cached_upload_summary, cached_upload_history,
+)
 
 
 DB_PATH = 'database/reporting.db'
@@ -53,6 +66,12 @@ if 'file_uploader_key_counter' not in st.session_state:
 if 'completed_modules' not in st.session_state:
     st.session_state.completed_modules = []
 
+# Background report jobs: report → job shown in the workflow, jobs already applied to the session
+if 'report_jobs' not in st.session_state:
+    st.session_state.report_jobs = {}
+if 'applied_jobs' not in st.session_state:
+    st.session_state.applied_jobs = set()
+
 # Track the last chosen report to persist across reruns
 if 'last_chosen_report' not in st.session_state:
     st.session_state.last_chosen_report = None
@@ -89,6 +108,8 @@ try:
         get_alias_last_load, # Added
         log_cutoff # Added
     )
+    from ingestion.snapshot_store import drop_snapshot_files
+    from ingestion.stream_ingest import stream_snapshot
 except ImportError as e:
     st.error(f"Failed to import db_utils: {e}")
     st.stop() # Stop execution if core imports fail
@@ -111,8 +132,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- Init DB ---
-init_db(db_path=DB_PATH)
+# --- Init DB (once per server process, see ui_helpers/cached_data.py) ---
+ensure_db(DB_PATH)
 
 # --- Navigation Selectbox ---
 # Define your sections
@@ -164,10 +185,163 @@ def _pretty_print_value(value: str | None) -> None:
 # Helper function to fetch raw value
 def _fetch_raw_value(report: str, var: str) -> str | None:
     q = "SELECT value FROM report_variables WHERE report_name = ? AND var_name = ? ORDER BY created_at DESC LIMIT 1"
-    with sqlite3.connect(DB_PATH) as con:
+    with connection(DB_PATH) as con:
         row = con.execute(q, (report, var)).fetchone()
     return row[0] if row else None
 
+# Helper – waterfall of a profiled run (see ingestion/profiler.py)
+def _render_run_profile(run_id: str | None) -> None:
+    import altair as alt
+    from ingestion.profiler import load_run_metrics
+
+    if not run_id:
+        return
+    metrics = load_run_metrics(DB_PATH, run_id)
+    if metrics.empty:
+        st.info("No timings recorded for this run.")
+        return
+
+    spans = metrics[metrics["kind"] == "span"].copy()
+    t0 = spans["started_at"].min()
+    spans["start_s"] = spans["started_at"] - t0
+    spans["end_s"] = spans["start_s"] + spans["duration_s"]
+    spans["module_name"] = spans["module_name"].fillna("(run)")
+    spans["label"] = spans["module_name"] + " · " + spans["span_name"]
+
+    modules = spans[spans["category"] == "module"]
+    if not modules.empty:
+        slowest = modules.sort_values("duration_s", ascending=False).iloc[0]
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Wall time", f"{spans['end_s'].max():.1f} s")
+        c2.metric("Slowest module", slowest["span_name"], f"{slowest['duration_s']:.1f} s", delta_color="off")
+        c3.metric("Peak RSS", f"{modules['peak_rss_mb'].max():.0f} MB")
+
+    waterfall = alt.Chart(spans).mark_bar().encode(
+        x=alt.X("start_s:Q", title="Seconds since start"),
+        x2="end_s:Q",
+        y=alt.Y("label:N", sort=alt.EncodingSortField("started_at", order="ascending"), title=None),
+        color=alt.Color("category:N", title="Category"),
+        tooltip=["module_name", "span_name", "category",
+                 alt.Tooltip("duration_s:Q", format=".3f", title="seconds"),
+                 alt.Tooltip("peak_rss_mb:Q", format=".0f", title="peak RSS (MB)"), "attrs"],
+    ).properties(height=max(200, 18 * len(spans)))
+    st.altair_chart(waterfall, use_container_width=True)
+
+    totals = metrics[metrics["kind"] == "total"]
+    if not totals.empty:
+        st.markdown("**Time per module and category**")
+        st.dataframe(
+            totals.pivot_table(index="module_name", columns="category", values="duration_s",
+                               aggfunc="sum").round(2),
+            use_container_width=True,
+        )
+
+# Helper – apply a finished job to the session: progress, staged DOCX, cutoff log
+def _apply_job_results(job: dict, mod) -> None:
+    from datetime import date
+
+    if job["job_id"] in st.session_state.applied_jobs:
+        return
+    st.session_state.applied_jobs.add(job["job_id"])
+    for ev in job["events"]:
+        if ev["event"] != EVENT_FINISHED:
+            continue
+        mod_name, state, msg = ev["module_name"], ev["status"], ev["message"]
+        if state in OK_STATUSES and ev["module_key"] not in st.session_state.completed_modules:
+            st.session_state.completed_modules.append(ev["module_key"])
+        if "staged_docx" in st.session_state:
+            if state == STATUS_SUCCESS:
+                st.session_state.staged_docx.add_paragraph(f"✅ {mod_name} completed successfully.")
+            elif state == STATUS_REUSED:
+                st.session_state.staged_docx.add_paragraph(f"♻️ {mod_name} unchanged, previous outputs reused.")
+            elif state == STATUS_SKIPPED:
+                st.session_state.staged_docx.add_paragraph(f"⏭️ {mod_name} skipped: {msg}")
+            elif state == STATUS_CANCELLED:
+                st.session_state.staged_docx.add_paragraph(f"🛑 {mod_name} cancelled.")
+            else:
+                st.session_state.staged_docx.add_paragraph(f"❌ {mod_name} failed: {msg}")
+
+    if job["status"] == JOB_SUCCEEDED:
+        job_cutoff = date.fromisoformat(job["params"]["cutoff_date"])
+        if hasattr(mod, "render_and_export"):
+            final_report_path = mod.render_and_export(job["report_name"], job_cutoff, None)
+            st.success(f"Final report saved as `{final_report_path}` in `app_files/`")
+        log_cutoff(
+            job["report_name"],
+            f"Validation_{job_cutoff}",
+            job_cutoff.isoformat(),
+            validated=True,
+            db_path=DB_PATH,
+        )
+
+
+# Helper – live status of a background report job (see reporting/jobs.py)
+@st.fragment(run_every=2)
+def _render_job_status(job_id: str, mod) -> None:
+    job = job_status(DB_PATH, job_id)
+    if job is None:
+        st.warning(f"Job {job_id} not found.")
+        return
+
+    st.markdown(f"### 🛰️ Run {job_id} · {job['status']}")
+    finished = [ev for ev in job["events"] if ev["event"] == EVENT_FINISHED]
+    running = {ev["module_name"] for ev in job["events"] if ev["event"] == EVENT_STARTED} - {ev["module_name"] for ev in finished}
+    label = f"{job['modules_done']}/{job['modules_total']} modules"
+    if running:
+        label += f" · running: {', '.join(sorted(running))}"
+    st.progress(job["progress"], text=label)
+
+    if job["status"] == JOB_QUEUED:
+        st.info("Waiting for the job worker…")
+    for ev in finished:
+        if ev["status"] == STATUS_SUCCESS:
+            st.success(f"{ev['module_name']}: {ev['status']}")
+        elif ev["status"] == STATUS_REUSED:
+            st.info(f"{ev['module_name']}: {ev['status']}")
+        else:
+            st.error(f"{ev['module_name']}: {ev['status']}")
+            if ev["message"]:
+                st.code(ev["message"])
+
+    if job["status"] in (JOB_QUEUED, JOB_RUNNING):
+        if job["cancel_requested"]:
+            st.warning("Cancelling…")
+        elif st.button("🛑 Cancel run", key=f"cancel_{job_id}"):
+            request_cancel(DB_PATH, job_id)
+            st.toast("Cancel requested", icon="🛑")
+        return
+
+    # final state: apply once, then a full rerun refreshes the progress section
+    if job["job_id"] not in st.session_state.applied_jobs:
+        _apply_job_results(job, mod)
+        st.rerun(scope="app")
+
+    if job["status"] == JOB_SUCCEEDED:
+        st.success(f"Report **{job['report_name']}** completed successfully.")
+        if not hasattr(mod, "render_and_export"):
+            st.warning(f"No render_and_export function found for `{job['report_name']}`.")
+    elif job["status"] == JOB_CANCELLED:
+        st.warning("Run cancelled. Modules that finished keep their outputs.")
+    elif job["status"] == JOB_INTERRUPTED:
+        st.warning("The job worker stopped responding; the run was interrupted.")
+    else:
+        st.warning("Some modules failed. See details above.")
+        if job["error"]:
+            st.code(job["error"])
+
+    if job["status"] in RESUMABLE_STATES:
+        if st.button("⏯️ Resume (run the modules that did not complete)", key=f"resume_{job_id}"):
+            new_job_id = resume_job(DB_PATH, job_id)
+            if new_job_id is None:
+                st.info("Every module of this run completed already.")
+            else:
+                st.session_state.report_jobs[job["report_name"]] = new_job_id
+                st.rerun(scope="app")
+
+    if job["run_id"]:
+        with st.expander("⏱️ Run profile", expanded=False):
+            _render_run_profile(job["run_id"])
+
 # ──────────────────────────────────────────────────
 # WORKFLOW – Launch & Validation (Refactored)
 # ──────────────────────────────────────────────────
@@ -181,7 +355,7 @@ if selected_section == "workflow":
     st.title("📊 Report Launch & Validation")
 
     # Step 1: Pick a report
-    reports_df = get_all_reports(DB_PATH)
+    reports_df = cached_all_reports(DB_PATH)
     if reports_df.empty:
         st.info("No reports defined yet. Create one in “Single File Upload”.")
         st.stop()
@@ -265,7 +439,7 @@ if selected_section == "workflow":
         st.stop()
 
     # Fetch modules from the report_modules table
-    saved_modules_df = list_report_modules(chosen_report, DB_PATH)
+    saved_modules_df = cached_report_modules(chosen_report, DB_PATH)
     saved_module_names = saved_modules_df['module_name'].tolist() if not saved_modules_df.empty else []
 
     # Step 6: Choose subset of modules
@@ -303,58 +477,56 @@ if selected_section == "workflow":
         st.toast("Progress reset.", icon="🔄")
 
     # Step 9: Run report with selected modules
+    incremental_run = st.checkbox(
+        "♻️ Incremental run (skip modules whose uploads, parameters and code are unchanged)",
+        value=False,
+        key=f"incremental_{chosen_report}",
+    )
+    profile_mode = st.selectbox(
+        "⏱️ Profiling",
+        ["off", "summary", "detailed"],
+        index=0,
+        key=f"profile_{chosen_report}",
+        help="summary: module timings and peak memory; detailed: every fetch, render, write and LLM call",
+    )
     if run_button_visible and st.button("🚀 Run Report"):
         if not selected_modules:
             st.warning("Please select at least one module to run.")
+        elif not hasattr(mod, "run_report"):
+            st.error(f"💥 Module `{mod_path}` has no `run_report()`")
         else:
-            status = st.empty()
-            status.info(f"Launching report **{chosen_report}** …")
-
             try:
-                with st.spinner("Running selected modules…"):
-                    if not hasattr(mod, "run_report"):
-                        raise RuntimeError(f"Module `{mod_path}` has no `run_report()`")
-                    ctx, run_results = mod.run_report(
-                        cutoff_date=cutoff_date,
-                        tolerance=tolerance_days,
-                        db_path=DB_PATH,
-                        selected_modules=selected_modules
-                    )
+                job_id = submit_job(
+                    DB_PATH, chosen_report, mod_path, list(selected_modules),
+                    cutoff_date=cutoff_date,
+                    tolerance=tolerance_days,
+                    incremental=incremental_run,
+                    profile=profile_mode,
+                )
             except Exception as e:
-                status.empty()
-                st.error(f"💥 Error running report: {e}")
+                st.error(f"💥 Error launching report: {e}")
                 st.code(traceback.format_exc())
             else:
-                status.empty()
-                st.markdown("### 📝 Module Run Results")
-                all_ok = True
-                for mod_name, state, msg in run_results:
-                    if state == "✅ Success":
-                        st.success(f"{mod_name}: {state}")
-                        if mod_name not in st.session_state.completed_modules:
-                            st.session_state.completed_modules.append(mod_name)
-                    else:
-                        st.error(f"{mod_name}: {state}")
-                        if msg:
-                            st.code(msg)
-                        all_ok = False
-                if all_ok:
-                    st.toast("Report finished", icon="✅")
-                    st.success(f"Report **{chosen_report}** completed successfully.")
-                    if hasattr(mod, "render_and_export"):
-                        final_report_path = mod.render_and_export(chosen_report, cutoff_date, ctx)
-                        st.success(f"Final report saved as `{final_report_path}` in `app_files/`")
-                    else:
-                        st.warning(f"No render_and_export function found for `{chosen_report}`.")
-                else:
-                    st.warning("Some modules failed. See details above.")
-                log_cutoff(
-                    chosen_report,
-                    f"Validation_{cutoff_date}",
-                    cutoff_date.isoformat(),
-                    validated=True,
-                    db_path=DB_PATH,
-                )
+                st.session_state.report_jobs[chosen_report] = job_id
+                st.toast(f"Report **{chosen_report}** queued (job {job_id}).", icon="🚀")
+
+    # Step 10: Status of the report's latest job (polled, the run happens in a worker process)
+    active_job_id = st.session_state.report_jobs.get(chosen_report)
+    if active_job_id:
+        _render_job_status(active_job_id, mod)
+
+    with st.expander("🗂️ Recent runs", expanded=False):
+        jobs_df = list_jobs(DB_PATH, chosen_report)
+        if jobs_df.empty:
+            st.write("No runs yet.")
+        else:
+            for col in ("submitted_at", "started_at", "finished_at"):
+                jobs_df[col] = pd.to_datetime(jobs_df[col], unit="s").dt.strftime("%Y-%m-%d %H:%M:%S")
+            st.dataframe(jobs_df, use_container_width=True, hide_index=True)
+            picked = st.selectbox("Show job", jobs_df["job_id"].tolist(), key=f"job_pick_{chosen_report}")
+            if st.button("👁️ Show status", key=f"job_show_{chosen_report}"):
+                st.session_state.report_jobs[chosen_report] = picked
+                st.rerun()
 
 ###############################################################################
 # EXPORT REPORT TAB                                                       #####
@@ -368,12 +540,12 @@ if selected_section == "export_report":
     # helper that also fetches raw value (extra query)
     def _fetch_raw_value(report: str, var: str) -> str | None:
         q = "SELECT value, anchor_name FROM report_variables WHERE report_name = ? AND var_name = ? ORDER BY created_at DESC LIMIT 1"
-        with sqlite3.connect(DB_PATH) as con:
+        with connection(DB_PATH) as con:
             row = con.execute(q, (report, var)).fetchone()
         return row[0] if row else None
 
     st.title("📤 Export Final Report")
-    reports_df = get_all_reports(DB_PATH)
+    reports_df = cached_all_reports(DB_PATH)
     if reports_df.empty:
         st.info("No reports available.")
         st.stop()
@@ -381,7 +553,7 @@ if selected_section == "export_report":
     chosen_report = st.selectbox("Select Report", reports_df["report_name"].tolist())
 
     # ---------------- Variable snapshot ----------------
-    snap_df = get_variable_status(chosen_report, DB_PATH)
+    snap_df = cached_variable_status(chosen_report, DB_PATH)
     if "anchor_name" in snap_df.columns:
         snap_df = snap_df[["anchor_name"] + [c for c in snap_df.columns if c != "anchor_name"]]
 
@@ -697,7 +869,8 @@ if selected_section == "export_report":
 
     def _build_context(report: str, tpl: DocxTemplate) -> dict:
         q = "SELECT anchor_name, value, gt_image FROM report_variables WHERE report_name = ? ORDER BY created_at"
-        df = pd.read_sql_query(q, sqlite3.connect(DB_PATH), params=(report,))
+        with connection(DB_PATH) as con:
+            df = pd.read_sql_query(q, con, params=(report,))
         ctx: dict[str, object] = {}
         for _idx, row in df.iterrows():
             anchor = row["anchor_name"]
@@ -753,7 +926,7 @@ if selected_section == "export_report":
 elif selected_section == "single_upload":
     st.title("📂 Single File Upload")
     # Load reports from DB
-    reports_df = get_all_reports(DB_PATH)
+    reports_df = cached_all_reports(DB_PATH)
     report_names = ["-- Create new --"] + reports_df["report_name"].tolist()
 
     # Default selection logic
@@ -1013,110 +1186,70 @@ elif selected_section == "single_upload":
                 st.success("✅ Transformation rules saved.")
 
 
-                # --- Apply Rules to FULL DataFrame and Upload ---
-                full_df = None
+                # --- Stream the FULL file through the rules into the DB ---
+                final_table_name_in_db = cleaned_input_name # Use the validated name from the text input
                 try:
-                    uploaded_file.seek(0)
-                    if extension in [".xlsx", ".xls"]:
-                        xls = pd.ExcelFile(uploaded_file)
-                        full_df = xls.parse(sheet_to_use, skiprows=start_row)
-                    elif extension == ".csv":
-                        full_df = pd.read_csv(uploaded_file, skiprows=start_row)
-                    st.write("🧪 DEBUG: Full DataFrame shape:", full_df.shape)
-                except Exception as load_full_error:
-                    st.error(f"Error loading full data from file: {load_full_error}")
-                    print(traceback.format_exc())
-                    # Don't stop here, let the error message show, the check below handles full_df being None
-                    full_df = None # Ensure full_df is None if loading fails
-
-                # --- Validate + Transform ---
-                if full_df is not None and not full_df.empty:
-                    try:
-                        # Filter and rename the *full* DataFrame based on the saved/edited rules
-                        cols_to_include_original_full = [r["original_column"] for r in edited_rules if r["included"] and r["original_column"] in full_df.columns]
-                        upload_df = full_df[cols_to_include_original_full].copy()
-                        upload_rename_map = {r["original_column"]: r["renamed_column"] for r in edited_rules if r["included"] and r["original_column"] in full_df.columns}
-                        upload_df.rename(columns=upload_rename_map, inplace=True)
-
-                        st.write("🧪 DEBUG: Upload DF shape:", upload_df.shape)
-                        st.write("🧪 DEBUG: Upload DF columns:", upload_df.columns.tolist())
-
-                        if upload_df.empty:
-                            st.warning("Upload resulted in an empty dataset after applying transformations. No data uploaded.")
-                            # Don't stop here, let the warning show, the rest of the block handles upload_df being empty
-                            # exit the try block gracefully
-                            raise ValueError("Upload resulted in empty data after transformations.") # Raise to jump to except
-
-
-                        # --- Final Alias & Database Save using User-Defined Name ---
-
-                        # Use the user-defined name as the actual table name
-                        final_table_name_in_db = cleaned_input_name # Use the validated name from the text input
-                        st.write("🧪 DEBUG: Final table name:", final_table_name_in_db)
-
-                        # Register the user's chosen table name AS the alias for this filename.
-                        # This makes the alias match the table name for simplicity.
-                        file_alias = final_table_name_in_db
-                        register_file_alias(filename, file_alias, db_path=DB_PATH)
-                        st.info(f"Alias `{file_alias}` registered for file `{filename}`.")
-
-                        with sqlite3.connect(DB_PATH) as conn:
-                            # Insert upload log using the original filename, the derived *raw* table_name (for log detail),
-                            # the selected report, AND the user-defined table name AS the alias
-                            upload_id = insert_upload_log(
-                                filename, 
-                                default_raw_table_name, 
-                                upload_df.shape[0], 
-                                upload_df.shape[1],
-                                chosen_report, 
-                                table_alias=file_alias, 
-                                db_path=DB_PATH # Log the alias (user's name)
-                            )
-                            st.success(f"✅ Upload log created (ID: {upload_id}).")
-                            # Append metadata
-                            upload_df["upload_id"] = upload_id
-                            upload_df["uploaded_at"] = now
-                            
-                            st.write("🧪 DEBUG: Saving table", final_table_name_in_db)
-                            st.write("🧪 DEBUG: Upload DF preview", upload_df.head(3))
-
-                            # Save to SQL
-                            upload_df.to_sql(final_table_name_in_db, conn, index=False, if_exists="replace")
-                            conn.commit()
-                            sample_df = pd.read_sql_query(f"SELECT * FROM `{final_table_name_in_db}` LIMIT 5", conn)
-                            st.markdown(f"### 🧪 Sample of `{final_table_name_in_db}` from DB")
-                            st.dataframe(sample_df)
-
-                            # Only show success if data is there
-                            if not sample_df.empty:
-                                st.success(f"📦 Uploaded to table `{final_table_name_in_db}` with {len(sample_df)}+ rows visible.")
-                            else:
-                                st.warning(f"⚠️ Upload to `{final_table_name_in_db}` completed, but no data appears in preview. Check start row / rules.")
+                    st.write("🧪 DEBUG: Final table name:", final_table_name_in_db)
+
+                    # Register the user's chosen table name AS the alias for this filename.
+                    # This makes the alias match the table name for simplicity.
+                    file_alias = final_table_name_in_db
+                    register_file_alias(filename, file_alias, db_path=DB_PATH)
+                    st.info(f"Alias `{file_alias}` registered for file `{filename}`.")
+
+                    # Row / column counts are filled in once the file has been streamed
+                    upload_id = insert_upload_log(
+                        filename,
+                        default_raw_table_name,
+                        0,
+                        0,
+                        chosen_report,
+                        table_alias=file_alias,
+                        db_path=DB_PATH # Log the alias (user's name)
+                    )
+                    st.success(f"✅ Upload log created (ID: {upload_id}).")
+
+                    with connection(DB_PATH) as conn:
+                        uploaded_file.seek(0)
+                        streamed = stream_snapshot(
+                            conn, final_table_name_in_db, uploaded_file, extension, upload_id,
+                            sheet=sheet_to_use if extension in [".xlsx", ".xls"] else None,
+                            start_row=start_row,
+                            rules=edited_rules,
+                            extra_columns={"uploaded_at": now},
+                            retention_days=load_report_params(chosen_report, DB_PATH).get("snapshot_retention_days"),
+                        )
+                        st.write("🧪 DEBUG: Streamed rows:", streamed.rows)
+                        st.write("🧪 DEBUG: Column types:", streamed.types)
 
-                            # Verify insert
-                            try:
-                                result = pd.read_sql_query(f"SELECT COUNT(*) AS cnt FROM `{final_table_name_in_db}`", conn)
-                                st.write(f"🧪 DEBUG: Row count in `{final_table_name_in_db}` after insert:", result['cnt'].iloc[0])
-                            except Exception as verify_error:
-                                st.error(f"⚠️ Failed to verify row count: {verify_error}")
+                        sample_df = pd.read_sql_query(f"SELECT * FROM `{final_table_name_in_db}` WHERE upload_id = ? LIMIT 5", conn, params=(upload_id,))
+                        st.markdown(f"### 🧪 Sample of `{final_table_name_in_db}` from DB")
+                        st.dataframe(sample_df)
 
-                    except ValueError as ve: # Catch the ValueError for empty data gracefully
-                        st.warning(f"Upload failed: {ve}")
-                    except Exception as e:
-                        st.error(f"❌ Upload failed: {e}")
-                        import traceback
-                        st.code(traceback.format_exc())
+                        # Only show success if data is there
+                        if not sample_df.empty:
+                            st.success(f"📦 Uploaded to table `{final_table_name_in_db}` with {streamed.rows} rows.")
+                        else:
+                            st.warning(f"⚠️ Upload to `{final_table_name_in_db}` completed, but no data appears in preview. Check start row / rules.")
 
-                    # 🔄 Trigger reset
-                    st.toast(f"✅ Upload complete for `{filename}` → `{final_table_name_in_db}`", icon="📥")
-                    st.session_state.file_uploader_key_counter += 1
-                    st.rerun()
+                        # Verify insert
+                        try:
+                            result = pd.read_sql_query(f"SELECT COUNT(*) AS cnt FROM `{final_table_name_in_db}`", conn)
+                            st.write(f"🧪 DEBUG: Row count in `{final_table_name_in_db}` after insert:", result['cnt'].iloc[0])
+                        except Exception as verify_error:
+                            st.error(f"⚠️ Failed to verify row count: {verify_error}")
 
-                elif full_df is not None and full_df.empty:
-                    st.warning("Upload failed: Loaded data from file is empty after applying start row.")
+                except ValueError as ve: # Empty data / no columns after transformations
+                    st.warning(f"Upload failed: {ve}")
+                except Exception as e:
+                    st.error(f"❌ Upload failed: {e}")
+                    import traceback
+                    st.code(traceback.format_exc())
 
-                else: # full_df is None
-                    st.error("❌ Upload failed: Could not load data from file.")
+                # 🔄 Trigger reset
+                st.toast(f"✅ Upload complete for `{filename}` → `{final_table_name_in_db}`", icon="📥")
+                st.session_state.file_uploader_key_counter += 1
+                st.rerun()
 
 
 # ------------------------------------------------------------------
@@ -1130,7 +1263,7 @@ elif selected_section == "mass_upload":
 
     
     def alias_exists(alias: str, db_path: str) -> bool:
-        with sqlite3.connect(db_path) as conn:
+        with connection(db_path) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
@@ -1150,7 +1283,7 @@ elif selected_section == "mass_upload":
         st.success(f"Saved **{uf.name}** to `app_files/`")
 
     # ─────────────────────────── 2. choose report ──────────────────────────
-    reports_df = get_all_reports(DB_PATH)
+    reports_df = cached_all_reports(DB_PATH)
     if reports_df.empty:
         st.warning("No reports yet – create one in *Single File Upload*.")
         st.stop()
@@ -1194,43 +1327,22 @@ elif selected_section == "mass_upload":
                     fp = Path("app_files") / file
                     ext = fp.suffix.lower()
 
-                    # 4a read file
-                    try:
-                        if ext in {".xlsx", ".xls"}:
-                            df = pd.read_excel(fp, sheet_name=sheet, skiprows=start_row)
-                        else:
-                            df = pd.read_csv(fp, skiprows=start_row)
-                    except Exception as e:
-                        st.error(f"❌ **{file}** – read error: {e}")
-                        fail_cnt += 1
-                        continue
-
-                    # 4b transform rules (if any)
-                    rules = get_transform_rules(file, sheet, DB_PATH)
-                    if rules:
-                        try:
-                            keep = [r["original_column"] for r in rules
-                                    if r["included"] and r["original_column"] in df.columns]
-                            rename = {r["original_column"]: r["renamed_column"]
-                                      for r in rules if r["included"] and r["original_column"] in df.columns}
-                            df = df[keep].rename(columns=rename)
-                        except Exception as e:
-                            st.error(f"❌ **{file}** – transform error: {e}")
-                            fail_cnt += 1
-                            continue
-
-                    # 4c write to DB
+                    # 4a stream file → transform rules → DB
                     try:
                         upload_id = insert_upload_log(
                             file, f"raw_{fp.stem.lower()}",
-                            df.shape[0], df.shape[1], chosen_report,
+                            0, 0, chosen_report,
                             table_alias=alias, db_path=DB_PATH
                         )
-                        df["upload_id"] = upload_id
-                        df["uploaded_at"] = datetime.now().isoformat()
-
-                        with sqlite3.connect(DB_PATH) as con:
-                            df.to_sql(alias, con, if_exists="replace", index=False)
+                        with connection(DB_PATH) as con:
+                            stream_snapshot(
+                                con, alias, fp, ext, upload_id,
+                                sheet=sheet if ext in {".xlsx", ".xls"} else None,
+                                start_row=start_row,
+                                rules=get_transform_rules(file, sheet, DB_PATH),
+                                extra_columns={"uploaded_at": datetime.now().isoformat()},
+                                retention_days=load_report_params(chosen_report, DB_PATH).get("snapshot_retention_days"),
+                            )
 
                         update_alias_status(alias, file, DB_PATH)
                         st.success(f"✅ {file} → table **{alias}**")
@@ -1265,7 +1377,7 @@ elif selected_section == "history":
 
             # Fetch details for the uploads being deleted to display in the warning
             try:
-                with sqlite3.connect(DB_PATH) as conn:
+                with connection(DB_PATH) as conn:
                     placeholders = ','.join('?' for _ in upload_ids_to_confirm_delete)
                     query = f"""
                         SELECT filename, table_alias, uploaded_at, rows, cols, id
@@ -1301,7 +1413,7 @@ elif selected_section == "history":
                     deleted_count = 0
                     uploads_list_to_delete = st.session_state.pending_delete_uploads
 
-                    with sqlite3.connect(DB_PATH) as conn:
+                    with connection(DB_PATH) as conn:
                          cursor = conn.cursor()
                          for upload_id in uploads_list_to_delete:
                              try:
@@ -1313,6 +1425,7 @@ elif selected_section == "history":
                                      delete_data_sql = f"DELETE FROM {table_to_clean} WHERE upload_id = ?"
                                      try:
                                         cursor.execute(delete_data_sql, (upload_id,))
+                                        drop_snapshot_files(conn, table_to_clean, upload_id)
                                         st.write(f"✅ Deleted data from `{table_to_clean}` for upload ID `{upload_id}`")
                                      except sqlite3.OperationalError as oe:
                                          st.warning(f"⚠️ Data table `{table_to_clean}` or upload_id column not found for upload ID `{upload_id}`. Skipping data deletion for this upload.")
@@ -1321,6 +1434,7 @@ elif selected_section == "history":
                                          print(traceback.format_exc())
 
                                  cursor.execute("DELETE FROM upload_log WHERE id = ?", (upload_id,))
+                                 bump_generation(conn, "upload_log")
                                  st.write(f"✅ Deleted log entry for upload ID `{upload_id}`")
                                  deleted_count += 1
 
@@ -1373,7 +1487,7 @@ elif selected_section == "history":
                     deleted_count = 0
                     reports_list_to_delete = st.session_state.pending_delete_reports
 
-                    with sqlite3.connect(DB_PATH) as conn:
+                    with connection(DB_PATH) as conn:
                          cursor = conn.cursor()
                          for report_name in reports_list_to_delete:
                              try:
@@ -1383,6 +1497,7 @@ elif selected_section == "history":
                                      cursor.execute("DELETE FROM upload_log WHERE report_name = ?", (report_name,))
                                      cursor.execute("DELETE FROM report_structure WHERE report_name = ?", (report_name,))
                                      cursor.execute("DELETE FROM report_cutoff_log WHERE report_name = ?", (report_name,))
+                                     bump_generation(conn, "reports", "upload_log", "report_structure", "report_cutoff_log")
                                      deleted_count += 1
                                      st.write(f"✅ Deleted metadata for '{report_name}'")
                                  else:
@@ -1411,7 +1526,7 @@ elif selected_section == "history":
         else:
             # --- Multi-Select Report Metadata Deletion (checkboxes) ---
             st.markdown("### Delete Report Metadata")
-            reports_df_all = get_all_reports(DB_PATH)
+            reports_df_all = cached_all_reports(DB_PATH)
 
             if reports_df_all.empty:
                  st.info("No reports defined to delete metadata for.")
@@ -1436,13 +1551,7 @@ elif selected_section == "history":
 
             # --- Report Last Upload Summary ---
             st.markdown("### Report Last Upload Summary")
-            with sqlite3.connect(DB_PATH) as conn:
-                logs_summary = pd.read_sql_query("""
-                    SELECT report_name, MAX(uploaded_at) AS last_refresh
-                    FROM upload_log
-                    GROUP BY report_name
-                    ORDER BY last_refresh DESC
-                """, conn)
+            logs_summary = cached_upload_summary(DB_PATH)
 
             if logs_summary.empty:
                 st.info("No uploads recorded for any report.")
@@ -1465,13 +1574,7 @@ elif selected_section == "history":
                 )
 
                  # Fetch detailed logs using the correct 'id' column
-                 with sqlite3.connect(DB_PATH) as conn:
-                     report_logs_detail = pd.read_sql_query("""
-                         SELECT filename, table_alias, uploaded_at, rows, cols, id
-                         FROM upload_log
-                         WHERE report_name = ?
-                         ORDER BY uploaded_at DESC
-                     """, conn, params=(selected_report_history,))
+                 report_logs_detail = cached_upload_history(selected_report_history, DB_PATH)
 
                  st.markdown(f"#### 📁 Files uploaded for `{selected_report_history}`")
                  if report_logs_detail.empty:
@@ -1547,7 +1650,7 @@ elif selected_section == "history":
 
             if confirm_delete_all_data and confirm_delete_all_reports and st.button("🔥 Execute Delete EVERYTHING", key="execute_delete_all_button"):
                 st.info("Starting global deletion...")
-                with sqlite3.connect(DB_PATH) as conn:
+                with connection(DB_PATH) as conn:
                     cursor = conn.cursor()
                     st.info("Deleting all data tables...")
                     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
@@ -1577,6 +1680,8 @@ elif selected_section == "history":
                         conn.execute("DELETE FROM alias_upload_status")
                         conn.execute("DELETE FROM sheet_rules")
                         conn.execute("DELETE FROM transform_rules")
+                        bump_generation(conn, "reports", "upload_log", "report_structure", "report_cutoff_log",
+                                        "file_alias_map", "alias_upload_status", "sheet_rules", "transform_rules")
                         conn.commit()
                         st.success("🧨 All report metadata (definitions, logs, rules) were deleted.")
                     except Exception as e:
@@ -1612,7 +1717,7 @@ elif selected_section == "report_structure":
     # 1) Choose or create a report
     # --------------------------------------------------
     # Fetch reports and handle report selection/creation
-    reports = get_all_reports(DB_PATH)
+    reports = cached_all_reports(DB_PATH)
 
     # Handle different return types from get_all_reports
     if reports is not None and not reports.empty:
@@ -1658,7 +1763,7 @@ elif selected_section == "report_structure":
     # --------------------------------------------------
     # 2) Current structure
     # --------------------------------------------------
-    with sqlite3.connect(DB_PATH) as conn:
+    with connection(DB_PATH) as conn:
         structure_df = pd.read_sql_query(
             """
             SELECT id, table_alias, required, expected_cutoff
@@ -1699,7 +1804,7 @@ elif selected_section == "report_structure":
 
         if st.button("💾 Save Changes to Existing Rows"):
             diff_ct = 0
-            with sqlite3.connect(DB_PATH) as conn:
+            with connection(DB_PATH) as conn:
                 cur = conn.cursor()
                 for _, row in edited_df.iterrows():
                     orig = structure_df.loc[structure_df.id == row["id"]].iloc[0]
@@ -1794,12 +1899,13 @@ elif selected_section == "report_structure":
         )
 
         if ids_to_del and st.button(f"Delete {len(ids_to_del)} alias(es)"):
-            with sqlite3.connect(DB_PATH) as conn:
+            with connection(DB_PATH) as conn:
                 placeholders = ",".join("?" for _ in ids_to_del)
                 conn.execute(
                     f"DELETE FROM report_structure WHERE id IN ({placeholders})",
                     ids_to_del,
                 )
+                bump_generation(conn, "report_structure")
                 conn.commit()
             st.success("Selected aliases deleted.")
             st.rerun()
@@ -2138,7 +2244,7 @@ elif selected_section == "report_structure":
 
     # Verify the table exists
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with connection(DB_PATH) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='report_modules';")
             table_exists = cursor.fetchone()
@@ -2185,7 +2291,7 @@ elif selected_section == "report_structure":
     # Function to fetch all mappings from report_modules table
     def fetch_all_report_modules(db_path):
         try:
-            with sqlite3.connect(db_path) as conn:
+            with connection(db_path) as conn:
                 query = "SELECT * FROM report_modules ORDER BY report_name, run_order"
                 df = pd.read_sql_query(query, conn)
                 logger.debug(f"Fetched {len(df)} report modules from database")
@@ -2207,7 +2313,7 @@ elif selected_section == "report_structure":
             logger.debug(f"=== STARTING DELETE OPERATION FOR ID: {mapping_id} ===")
             
             # Step 1: Verify mapping exists
-            with sqlite3.connect(db_path) as conn:
+            with connection(db_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM report_modules WHERE id = ?", (mapping_id,))
                 existing_mapping = cursor.fetchone()
@@ -2219,7 +2325,7 @@ elif selected_section == "report_structure":
             
             # Step 2: Try direct SQL delete (bypass the original function)
             logger.debug("Attempting direct SQL delete...")
-            with sqlite3.connect(db_path) as conn:
+            with connection(db_path) as conn:
                 cursor = conn.cursor()
                 
                 # Get count before
@@ -2230,6 +2336,7 @@ elif selected_section == "report_structure":
                 # Perform delete
                 cursor.execute("DELETE FROM report_modules WHERE id = ?", (mapping_id,))
                 rows_affected = cursor.rowcount
+                bump_generation(conn, "report_modules")
                 logger.debug(f"Rows affected by DELETE: {rows_affected}")
                 
                 # IMPORTANT: Explicit commit
@@ -2266,7 +2373,7 @@ elif selected_section == "report_structure":
         
         if st.button("🔍 Check Database State"):
             try:
-                with sqlite3.connect(DB_PATH) as conn:
+                with connection(DB_PATH) as conn:
                     cursor = conn.cursor()
                     
                     # Check if table exists
@@ -2305,7 +2412,7 @@ elif selected_section == "report_structure":
         
         if st.button("🧪 Test Direct Delete"):
             try:
-                with sqlite3.connect(DB_PATH) as conn:
+                with connection(DB_PATH) as conn:
                     cursor = conn.cursor()
                     
                     # Create a test record
@@ -2414,7 +2521,7 @@ elif selected_section == "report_structure":
             st.markdown("### Delete a Mapping")
             
             # Get fresh data
-            with sqlite3.connect(DB_PATH) as conn:
+            with connection(DB_PATH) as conn:
                 fresh_df = pd.read_sql_query(
                     "SELECT * FROM report_modules ORDER BY report_name, run_order", 
                     conn
@@ -2440,13 +2547,14 @@ elif selected_section == "report_structure":
                     
                     try:
                         # Direct SQL approach
-                        conn = sqlite3.connect(DB_PATH)
+                        conn = open_connection(DB_PATH)   # own connection: the PRAGMA must not leak into the pool
                         conn.execute("PRAGMA foreign_keys = OFF")  # Temporarily disable FK constraints
                         
                         cursor = conn.cursor()
                         cursor.execute("DELETE FROM report_modules WHERE id = ?", (delete_id,))
                         
                         if cursor.rowcount > 0:
+                            bump_generation(conn, "report_modules")
                             conn.commit()
                             conn.close()
                             
@@ -2696,7 +2804,7 @@ elif selected_section == "audit_data_input":
     )
 
     # Fetch reports and handle report selection/creation
-    reports_df = get_all_reports(DB_PATH)
+    reports_df = cached_all_reports(DB_PATH)
     report_names = ["-- Create new --"] + reports_df["report_name"].tolist() if not reports_df.empty else ["-- Create new --"]
     chosen_report = st.selectbox("Select Report", report_names, key="audit_data_report_select")
 
@@ -2748,9 +2856,11 @@ elif selected_section == "audit_data_input":
         
         # Try to load existing data
         try:
-            existing_data = fetch_vars_for_report(chosen_report, DB_PATH)
-            
-            if existing_data:
+            with report_variables(chosen_report, DB_PATH) as existing_data:
+                existing_data.prefetch('external_audits', 'error_rates')
+                if 'external_audits' not in existing_data and 'error_rates' not in existing_data:
+                    st.info("📭 No existing data found, using defaults.")
+
                 # Check if we have external_audits data and extract field values
                 if 'external_audits' in existing_data:
                     st.success("✅ Found existing External Audits data - populating form!")
@@ -2888,8 +2998,6 @@ elif selected_section == "audit_data_input":
                             defaults['ercea_overall_error_rate'] = str(error_rates['2']).replace('%', '')
                             defaults['ercea_overall_comments'] = str(comments.get('2', defaults['ercea_overall_comments']))
                             defaults['ercea_overall_to_be_reported'] = str(reporting.get('2', defaults['ercea_overall_to_be_reported']))
-            else:
-                st.info("📭 No existing data found, using defaults.")
                 
         except Exception as e:
             st.info(f"📭 No existing data found, using defaults.")
@@ -0,0 +1,90 @@
+# ui/ui_helpers/cached_data.py
+"""
+Cached reads for the Streamlit UI, keyed on the generation counters of the
+tables they read (``table_generations`` in ingestion/db_utils.py): a result
+is served until a write helper bumps its table's counter.
+"""
+from __future__ import annotations
+
+import pandas as pd
+import streamlit as st
+
+from ingestion.db_utils import (
+    get_all_reports, get_variable_status, init_db, list_report_modules, table_generations,
+)
+from ingestion.sqlite_pool import connection
+
+CACHE_TTL_S = 15 * 60     # safety net for writes that bypass the helpers
+MAX_ENTRIES = 64
+
+
+@st.cache_resource(show_spinner=False)
+def ensure_db(db_path: str) -> bool:
+    """``init_db`` once per server process and database, not on every rerun."""
+    init_db(db_path=db_path)
+    return True
+
+
+# ──────────────────────────────────────────────────────────────
+# CACHED LOADERS (generation is part of the key, never used inside)
+# ──────────────────────────────────────────────────────────────
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=MAX_ENTRIES, show_spinner=False)
+def _all_reports(db_path: str, generation: tuple) -> pd.DataFrame:
+    return get_all_reports(db_path)
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=MAX_ENTRIES, show_spinner=False)
+def _report_modules(report_name: str, db_path: str, generation: tuple) -> pd.DataFrame:
+    return list_report_modules(report_name, db_path)
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=MAX_ENTRIES, show_spinner="Loading variables…")
+def _variable_status(report_name: str, db_path: str, generation: tuple) -> pd.DataFrame:
+    return get_variable_status(report_name, db_path)
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=MAX_ENTRIES, show_spinner=False)
+def _upload_summary(db_path: str, generation: tuple) -> pd.DataFrame:
+    with connection(db_path) as conn:
+        df = pd.read_sql_query("""
+            SELECT report_name, MAX(uploaded_at) AS last_refresh
+            FROM upload_log
+            GROUP BY report_name
+            ORDER BY last_refresh DESC
+        """, conn)
+    return df
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=MAX_ENTRIES, show_spinner=False)
+def _upload_history(report_name: str, db_path: str, generation: tuple) -> pd.DataFrame:
+    with connection(db_path) as conn:
+        df = pd.read_sql_query("""
+            SELECT filename, table_alias, uploaded_at, rows, cols, id
+            FROM upload_log
+            WHERE report_name = ?
+            ORDER BY uploaded_at DESC
+        """, conn, params=(report_name,))
+    return df
+
+
+# ──────────────────────────────────────────────────────────────
+# PUBLIC READERS
+# ──────────────────────────────────────────────────────────────
+def cached_all_reports(db_path: str) -> pd.DataFrame:
+    return _all_reports(db_path, table_generations(db_path, ("reports",)))
+
+
+def cached_report_modules(report_name: str, db_path: str) -> pd.DataFrame:
+    return _report_modules(report_name, db_path, table_generations(db_path, ("report_modules",)))
+
+
+def cached_variable_status(report_name: str, db_path: str) -> pd.DataFrame:
+    return _variable_status(report_name, db_path, table_generations(db_path, ("report_variables",)))
+
+
+def cached_upload_summary(db_path: str) -> pd.DataFrame:
+    return _upload_summary(db_path, table_generations(db_path, ("upload_log",)))
+
+
+def cached_upload_history(report_name: str, db_path: str) -> pd.DataFrame:
+    return _upload_history(report_name, db_path, table_generations(db_path, ("upload_log",)))